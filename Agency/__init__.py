@@ -1 +1,11 @@
-from .agent import LockmindAgent
\ No newline at end of file
+# Importing Agency stays cheap: the ADK-backed agent tree is only imported
+# and built when LockmindAgent is first used
+def __getattr__(name):
+    if name == "LockmindAgent":
+        from .agent import LockmindAgent
+
+        return LockmindAgent
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["LockmindAgent"]
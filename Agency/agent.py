@@ -1,11 +1,88 @@
-from google.adk.agents import SequentialAgent
+import functools
+from typing import AsyncGenerator
 
-from .workers.auth_manager import AuthManager
-from .workers.passwords_manager import PasswordsManager
+from google.adk.agents import BaseAgent
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.events import Event
+from google.genai import types
 
-# Sequential Agent that enforces authentication flow
-LockmindAgent = SequentialAgent(
-    name="Lockmind_Sequential_Agent",
-    sub_agents=[AuthManager, PasswordsManager],
-    description="Sequential authentication system that requires authentication before password management access",
-)
+from . import metrics
+from .workers.auth_manager.rate_limit import get_rate_limiter
+
+
+class AuthGatedAgent(BaseAgent):
+    """Runs the first sub-agent, then the rest only if the session is validated.
+
+    The first sub-agent is the authentication step. When it leaves
+    state["validated"] false the remaining sub-agents are skipped instead of
+    running a model call whose output main.py would throw away. Unvalidated
+    sessions that are over the login rate limit get a fixed reply without any
+    model call at all.
+    """
+
+    async def _run_async_impl(self, ctx: InvocationContext) -> AsyncGenerator[Event, None]:
+        turn = metrics.start_turn(ctx.invocation_id)
+        auth_agent, *protected_agents = self.sub_agents
+
+        try:
+            if not ctx.session.state.get("validated", False):
+                retry_after = get_rate_limiter().retry_after(session_id=ctx.session.id)
+                if retry_after:
+                    turn.skipped_agents = [agent.name for agent in self.sub_agents]
+                    turn.model_calls_saved = len(self.sub_agents)
+                    yield Event(
+                        invocation_id=ctx.invocation_id,
+                        author=self.name,
+                        branch=ctx.branch,
+                        content=types.Content(role="model", parts=[types.Part(
+                            text=f"Too many login attempts from this session. Please wait {int(retry_after) + 1} seconds before trying again."
+                        )]),
+                    )
+                    return
+
+            async for event in auth_agent.run_async(ctx):
+                _count_model_call(turn, auth_agent, event)
+                yield event
+
+            if not ctx.session.state.get("validated", False):
+                # Each skipped LLM agent would have made at least one model call
+                turn.skipped_agents = [agent.name for agent in protected_agents]
+                turn.model_calls_saved = len(protected_agents)
+                return
+
+            for agent in protected_agents:
+                async for event in agent.run_async(ctx):
+                    _count_model_call(turn, agent, event)
+                    yield event
+        finally:
+            metrics.record_turn(turn)
+
+
+def _count_model_call(turn: metrics.TurnMetrics, agent: BaseAgent, event: Event) -> None:
+    # Every model response becomes one non-partial event authored by the agent;
+    # function responses are authored by the agent too but are not model calls
+    if event.author == agent.name and event.content and not event.partial and not event.get_function_responses():
+        turn.model_calls += 1
+
+
+@functools.cache
+def build_lockmind_agent() -> AuthGatedAgent:
+    """The Lockmind agent tree, built on first use rather than at import.
+
+    Authentication-gated: PasswordsManager only runs for validated sessions.
+    """
+
+    from .workers.auth_manager.agent import build_auth_manager
+    from .workers.passwords_manager.agent import build_passwords_manager
+
+    return AuthGatedAgent(
+        name="Lockmind_Sequential_Agent",
+        sub_agents=[build_auth_manager(), build_passwords_manager()],
+        description="Sequential authentication system that requires authentication before password management access",
+    )
+
+
+def __getattr__(name):
+    if name == "LockmindAgent":
+        return build_lockmind_agent()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,209 @@
+import atexit
+import functools
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+from . import storage
+
+# Audit records live in their own file so their fsyncs don't contend with the session database
+AUDIT_DB_PATH = os.environ.get("LOCKMIND_AUDIT_DB_PATH", "./lockmind_audit.db")
+# Seconds the writer collects records before committing (and fsyncing) them as one batch
+FLUSH_INTERVAL = float(os.environ.get("LOCKMIND_AUDIT_FLUSH_INTERVAL", "1.0"))
+# Records written per transaction at most
+BATCH_SIZE = int(os.environ.get("LOCKMIND_AUDIT_BATCH_SIZE", "1000"))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lockmind_audit (
+    id INTEGER PRIMARY KEY,
+    timestamp REAL NOT NULL,
+    event TEXT NOT NULL,
+    outcome TEXT NOT NULL,
+    username TEXT,
+    session_id TEXT,
+    details TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_lockmind_audit_timestamp ON lockmind_audit (timestamp);
+CREATE INDEX IF NOT EXISTS ix_lockmind_audit_username_timestamp ON lockmind_audit (username, timestamp);
+CREATE TRIGGER IF NOT EXISTS lockmind_audit_no_update BEFORE UPDATE ON lockmind_audit
+BEGIN SELECT RAISE(ABORT, 'lockmind_audit is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS lockmind_audit_no_delete BEFORE DELETE ON lockmind_audit
+BEGIN SELECT RAISE(ABORT, 'lockmind_audit is append-only'); END;
+"""
+
+_STOP = object()
+
+
+def session_id_of(tool_context) -> str:
+    """The session id behind a tool context, or None if it has none."""
+
+    # ToolContext doesn't expose the session publicly; the router's shim sets session_id
+    invocation_context = getattr(tool_context, "_invocation_context", None)
+    if invocation_context is not None:
+        return invocation_context.session.id
+    return getattr(tool_context, "session_id", None)
+
+
+def _timestamp(value) -> float:
+    return value.timestamp() if isinstance(value, datetime) else value
+
+
+class AuditLog:
+    """Append-only audit trail written by a background thread.
+
+    record() only puts the record on a queue, so it adds no I/O to the tool
+    call. The writer thread commits whatever arrived within flush_interval
+    (up to batch_size records) in one transaction; with WAL and
+    synchronous=FULL each commit is one fsync. Triggers reject UPDATE and
+    DELETE on the table.
+    """
+
+    def __init__(self, path: str = None, flush_interval: float = FLUSH_INTERVAL, batch_size: int = BATCH_SIZE):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.written = 0
+        self._queue = queue.SimpleQueue()
+
+        self._conn = storage.connect(path or AUDIT_DB_PATH)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        self._conn.executescript(SCHEMA)
+        # Queries use their own connection; WAL lets them read while the writer commits
+        self._reader = storage.connect(path or AUDIT_DB_PATH)
+        self._reader_lock = threading.Lock()
+
+        self._writer = threading.Thread(target=self._run, name="lockmind-audit-writer", daemon=True)
+        self._writer.start()
+
+    def record(self, event: str, outcome: str, username: str = None, tool_context=None, **details) -> None:
+        """Queue an audit record. Never pass secrets (passwords, answers) as details.
+
+        Args:
+            event: What happened, e.g. "login" or "vault.add"
+            outcome: How it ended, e.g. "success" or "wrong_password"
+            username: The account the event is about
+            tool_context: The calling tool's context, used for the session id
+            **details: Extra JSON-serializable fields
+        """
+
+        self._queue.put((
+            time.time(),
+            event,
+            outcome,
+            username,
+            session_id_of(tool_context),
+            json.dumps(details) if details else None,
+        ))
+
+    def flush(self, timeout: float = None) -> bool:
+        """Block until every record queued so far is committed.
+
+        Returns:
+            False if the timeout expired first
+        """
+
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self) -> None:
+        """Commit the remaining records and stop the writer."""
+
+        if self._writer.is_alive():
+            self._queue.put(_STOP)
+            self._writer.join()
+
+    def query(self, start=None, end=None, username: str = None, event: str = None, limit: int = 1000) -> list:
+        """Audit records in a time range, oldest first.
+
+        Pending records are flushed first so the result includes everything
+        recorded before the call.
+
+        Args:
+            start: Earliest time (datetime or Unix timestamp), inclusive
+            end: Latest time (datetime or Unix timestamp), exclusive
+            username: Only records about this account
+            event: Only records of this event
+            limit: Maximum number of records returned
+
+        Returns:
+            Records as dicts, with details decoded
+        """
+
+        self.flush()
+
+        conditions, params = [], []
+        if username is not None:
+            conditions.append("username = ?")
+            params.append(username)
+        if start is not None:
+            conditions.append("timestamp >= ?")
+            params.append(_timestamp(start))
+        if end is not None:
+            conditions.append("timestamp < ?")
+            params.append(_timestamp(end))
+        if event is not None:
+            conditions.append("event = ?")
+            params.append(event)
+
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._reader_lock:
+            rows = self._reader.execute(
+                f"SELECT * FROM lockmind_audit {where} ORDER BY timestamp LIMIT ?", (*params, limit)
+            ).fetchall()
+
+        records = []
+        for row in rows:
+            record = dict(row)
+            record["details"] = json.loads(record["details"]) if record["details"] else {}
+            records.append(record)
+        return records
+
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            item = self._queue.get()
+            batch, waiters = [], []
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+
+            if batch:
+                self._write(batch)
+            for waiter in waiters:
+                waiter.set()
+
+    def _write(self, batch: list) -> None:
+        try:
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT INTO lockmind_audit (timestamp, event, outcome, username, session_id, details) VALUES (?, ?, ?, ?, ?, ?)",
+                    batch,
+                )
+            self.written += len(batch)
+        except Exception as e:
+            print(f"Audit log write failed, {len(batch)} records lost: {e}")
+
+
+@functools.lru_cache(maxsize=None)
+def get_audit_log() -> AuditLog:
+    """Shared audit log, started on first use and flushed at exit."""
+
+    audit_log = AuditLog()
+    atexit.register(audit_log.close)
+    return audit_log
@@ -0,0 +1,112 @@
+import asyncio
+import os
+
+from . import storage
+
+# Sessions with more events than this are compacted
+MAX_EVENTS = int(os.environ.get("LOCKMIND_COMPACT_MAX_EVENTS", "200"))
+# Most recent invocations (turns) whose events are kept as the session tail
+KEEP_INVOCATIONS = int(os.environ.get("LOCKMIND_COMPACT_KEEP_INVOCATIONS", "20"))
+# Seconds between background compaction passes
+INTERVAL_SECONDS = float(os.environ.get("LOCKMIND_COMPACT_INTERVAL_SECONDS", "60"))
+
+SCHEMA = """
+-- Written by earlier versions but never read: the sessions row already holds the state
+DROP TABLE IF EXISTS lockmind_session_snapshots;
+CREATE INDEX IF NOT EXISTS ix_events_session_timestamp ON events (app_name, user_id, session_id, timestamp);
+-- DatabaseSessionService loads events filtered on session_id alone, which can't use the index above
+CREATE INDEX IF NOT EXISTS ix_events_session_id_timestamp ON events (session_id, timestamp);
+"""
+
+
+def ensure_schema(conn) -> None:
+    """Create the event indexes used for session loads."""
+
+    conn.executescript(SCHEMA)
+
+
+def compact_session(conn, app_name: str, user_id: str, session_id: str, keep_invocations: int = KEEP_INVOCATIONS) -> int:
+    """Delete a session's old events, keeping the most recent invocations.
+
+    Nothing is lost for the state: DatabaseSessionService keeps every state
+    delta applied so far in the session row and loads the state from there, so
+    events only matter as conversation history. Whole invocations are kept so a
+    tool call is never separated from its response.
+
+    Args:
+        conn: A connection to the session database
+        app_name: The application name
+        user_id: The session's user id
+        session_id: The session id
+        keep_invocations: Number of most recent invocations to keep
+
+    Returns:
+        Number of events removed
+    """
+
+    key = (app_name, user_id, session_id)
+    with conn:
+        cutoff = conn.execute(
+            """
+            SELECT MIN(timestamp) FROM events
+            WHERE app_name = ? AND user_id = ? AND session_id = ?
+            GROUP BY invocation_id
+            ORDER BY MIN(timestamp) DESC
+            LIMIT 1 OFFSET ?
+            """,
+            (*key, keep_invocations - 1),
+        ).fetchone()
+        if cutoff is None:
+            return 0
+
+        return conn.execute(
+            "DELETE FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? AND timestamp < ?",
+            (*key, cutoff[0]),
+        ).rowcount
+
+
+def compact_all(path: str = None, max_events: int = MAX_EVENTS, keep_invocations: int = KEEP_INVOCATIONS) -> dict:
+    """Compact every session that has grown past max_events.
+
+    Args:
+        path: Session database path, defaults to storage.DB_PATH
+        max_events: Event count above which a session is compacted
+        keep_invocations: Number of most recent invocations each session keeps
+
+    Returns:
+        Number of sessions compacted and events removed
+    """
+
+    conn = storage.connect(path)
+    try:
+        ensure_schema(conn)
+        sessions = conn.execute(
+            """
+            SELECT app_name, user_id, session_id FROM events
+            GROUP BY app_name, user_id, session_id
+            HAVING COUNT(*) > ?
+            """,
+            (max_events,),
+        ).fetchall()
+
+        removed = 0
+        for app_name, user_id, session_id in sessions:
+            removed += compact_session(conn, app_name, user_id, session_id, keep_invocations)
+
+        # Freed pages are reused by new events, so the file stops growing;
+        # give them back to the OS as well when incremental auto-vacuum is on
+        conn.execute("PRAGMA incremental_vacuum")
+        return {"sessions": len(sessions), "events_removed": removed}
+    finally:
+        conn.close()
+
+
+async def run_periodically(path: str = None, interval: float = INTERVAL_SECONDS) -> None:
+    """Background task compacting sessions every interval seconds, off the event loop."""
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            await asyncio.to_thread(compact_all, path)
+        except Exception as e:
+            print(f"Session compaction failed: {e}")
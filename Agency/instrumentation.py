@@ -0,0 +1,287 @@
+import asyncio
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from . import metrics
+
+# Off by default: nothing is wrapped, so disabled instrumentation costs nothing
+ENABLED = os.environ.get("LOCKMIND_INSTRUMENT", "0") == "1"
+# Prometheus text file written at exit (and by write_metrics_file())
+METRICS_FILE = os.environ.get("LOCKMIND_METRICS_FILE", "./lockmind_metrics.prom")
+# Port for a /metrics endpoint in server.py, 0 for none
+METRICS_PORT = int(os.environ.get("LOCKMIND_METRICS_PORT", "0"))
+
+# Session-service methods timed by instrument_session_service()
+SESSION_METHODS = ("create_session", "get_session", "list_sessions", "delete_session", "append_event", "list_events")
+
+
+class SpanStats:
+    """Count, total and worst time of one kind of span."""
+
+    __slots__ = ("count", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+
+spans = {}
+counters = {"session_events_appended": 0, "session_state_bytes_written": 0, "tool_errors": 0}
+# Session-service calls run on the DB worker threads
+_lock = threading.Lock()
+# (invocation id, agent name) -> start time, for agent spans
+_agent_started = {}
+
+
+def record_span(kind: str, name: str, seconds: float) -> None:
+    """Add one timed span, e.g. ("tool", "authenticate_user", 0.12)."""
+
+    with _lock:
+        stats = spans.get((kind, name))
+        if stats is None:
+            stats = spans[(kind, name)] = SpanStats()
+        stats.add(seconds)
+
+
+def count(counter: str, amount: int = 1) -> None:
+    with _lock:
+        counters[counter] = counters.get(counter, 0) + amount
+
+
+class _Span:
+    __slots__ = ("kind", "name", "start")
+
+    def __init__(self, kind: str, name: str):
+        self.kind = kind
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        record_span(self.kind, self.name, time.perf_counter() - self.start)
+
+
+_NO_SPAN = nullcontext()
+
+
+def span(kind: str, name: str):
+    """Context manager timing a block as a span (a shared no-op when instrumentation is disabled)."""
+
+    return _Span(kind, name) if ENABLED else _NO_SPAN
+
+
+def timed(kind: str, name: str = None):
+    """Decorator timing every call of a function, coroutine function or async generator as a span.
+
+    The wrapper keeps the wrapped function's name, docstring and signature,
+    which ADK reads to build tool declarations.
+    """
+
+    def decorate(fn):
+        span_name = name or fn.__name__
+
+        if inspect.isasyncgenfunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    async for item in fn(*args, **kwargs):
+                        yield item
+                finally:
+                    record_span(kind, span_name, time.perf_counter() - start)
+
+        elif inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await fn(*args, **kwargs)
+                except Exception:
+                    count(f"{kind}_errors")
+                    raise
+                finally:
+                    record_span(kind, span_name, time.perf_counter() - start)
+
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                except Exception:
+                    count(f"{kind}_errors")
+                    raise
+                finally:
+                    record_span(kind, span_name, time.perf_counter() - start)
+
+        wrapper._lockmind_timed = True
+        return wrapper
+
+    return decorate
+
+
+def instrument_tools(agent) -> None:
+    """Time every function tool of an agent."""
+
+    agent.tools = [
+        timed("tool")(tool) if inspect.isfunction(tool) and not getattr(tool, "_lockmind_timed", False) else tool
+        for tool in agent.tools
+    ]
+
+
+def _before_agent(callback_context) -> None:
+    _agent_started[(callback_context.invocation_id, callback_context.agent_name)] = time.perf_counter()
+
+
+def _after_agent(callback_context) -> None:
+    start = _agent_started.pop((callback_context.invocation_id, callback_context.agent_name), None)
+    if start is not None:
+        record_span("agent", callback_context.agent_name, time.perf_counter() - start)
+
+
+def instrument_agents(agent) -> None:
+    """Time every agent in the tree, and every function tool of its LLM agents."""
+
+    from google.adk.agents import LlmAgent
+
+    if agent.before_agent_callback is None:
+        agent.before_agent_callback = _before_agent
+        agent.after_agent_callback = _after_agent
+    if isinstance(agent, LlmAgent):
+        instrument_tools(agent)
+    for sub_agent in agent.sub_agents:
+        instrument_agents(sub_agent)
+
+
+def instrument_session_service(session_service) -> None:
+    """Time every call of a session service, and count the events and state bytes it writes."""
+
+    if getattr(session_service, "_lockmind_instrumented", False):
+        return
+
+    for method in SESSION_METHODS:
+        bound = getattr(session_service, method, None)
+        if bound is not None:
+            setattr(session_service, method, timed("session", method)(bound))
+
+    timed_append = session_service.append_event
+
+    @functools.wraps(timed_append)
+    def append_event(session, event):
+        result = timed_append(session, event)
+        count("session_events_appended")
+        if event.actions and event.actions.state_delta:
+            count("session_state_bytes_written", len(json.dumps(event.actions.state_delta, default=str)))
+        return result
+
+    session_service.append_event = append_event
+    session_service._lockmind_instrumented = True
+
+
+def instrument_runner(runner) -> None:
+    """Time every runner.run_async invocation, its agents and tools, and its session service."""
+
+    if not getattr(runner.run_async, "_lockmind_timed", False):
+        runner.run_async = timed("runner", "run_async")(runner.run_async)
+    instrument_agents(runner.agent)
+    instrument_session_service(runner.session_service)
+
+
+def prometheus_text() -> str:
+    """All spans and counters in the Prometheus text exposition format."""
+
+    lines = [
+        "# HELP lockmind_span_seconds Time spent in tools, agents, runner invocations and session-service calls.",
+        "# TYPE lockmind_span_seconds summary",
+    ]
+    with _lock:
+        items = sorted((key, (stats.count, stats.total, stats.max)) for key, stats in spans.items())
+        counter_items = sorted(counters.items())
+
+    for (kind, name), (calls, total, worst) in items:
+        labels = f'kind="{kind}",name="{name}"'
+        lines.append(f"lockmind_span_seconds_count{{{labels}}} {calls}")
+        lines.append(f"lockmind_span_seconds_sum{{{labels}}} {total:.6f}")
+    lines.append("# TYPE lockmind_span_seconds_max gauge")
+    for (kind, name), (_, _, worst) in items:
+        lines.append(f'lockmind_span_seconds_max{{kind="{kind}",name="{name}"}} {worst:.6f}')
+
+    for counter, value in counter_items + [
+        ("turns", metrics.totals["turns"]),
+        ("model_calls", metrics.totals["model_calls"]),
+        ("model_calls_saved", metrics.totals["model_calls_saved"]),
+        ("prompt_tokens", metrics.totals["prompt_tokens"]),
+    ]:
+        lines.append(f"# TYPE lockmind_{counter}_total counter")
+        lines.append(f"lockmind_{counter}_total {value}")
+    lines.append("# TYPE lockmind_model_seconds_total counter")
+    lines.append(f"lockmind_model_seconds_total {metrics.totals['model_seconds']:.6f}")
+
+    return "\n".join(lines) + "\n"
+
+
+def write_metrics_file(path: str = None) -> str:
+    """Write prometheus_text() to a file (atomically) and return its path."""
+
+    path = path or METRICS_FILE
+    temporary = f"{path}.tmp"
+    with open(temporary, "w", encoding="utf-8") as out:
+        out.write(prometheus_text())
+    os.replace(temporary, path)
+    return path
+
+
+def summary() -> str:
+    """Table of every span, slowest total first, for printing at exit."""
+
+    with _lock:
+        items = sorted(spans.items(), key=lambda item: item[1].total, reverse=True)
+    rows = [f"{'span':<44} {'calls':>6} {'total ms':>10} {'avg ms':>8} {'max ms':>8}"]
+    for (kind, name), stats in items:
+        rows.append(
+            f"{kind + ':' + name:<44} {stats.count:>6} {stats.total * 1000:>10.1f}"
+            f" {stats.total / stats.count * 1000:>8.2f} {stats.max * 1000:>8.2f}"
+        )
+    totals = metrics.totals
+    rows.append(
+        f"model: {totals['model_calls']} call(s), {totals['model_seconds'] * 1000:.0f} ms, ~{totals['prompt_tokens']} prompt tokens;"
+        f" session: {counters['session_events_appended']} event(s), {counters['session_state_bytes_written']} state bytes written"
+    )
+    return "\n".join(rows)
+
+
+async def serve_metrics(host: str, port: int) -> asyncio.AbstractServer:
+    """Serve prometheus_text() over HTTP for scraping (any path)."""
+
+    async def handle(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            # Request line and headers; the body (if any) is ignored
+            while (await reader.readline()).strip():
+                pass
+            body = prometheus_text().encode()
+            writer.write(
+                b"HTTP/1.1 200 OK\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                + f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    return await asyncio.start_server(handle, host, port)
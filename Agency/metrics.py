@@ -0,0 +1,110 @@
+import time
+from collections import deque
+
+# Most recent turns kept for reporting; older turns only count towards the totals
+MAX_TURNS = 1000
+
+
+class TurnMetrics:
+    """Counters for a single runner invocation (one user turn)."""
+
+    def __init__(self, invocation_id: str):
+        self.invocation_id = invocation_id
+        self.model_calls = 0
+        self.model_calls_saved = 0
+        self.skipped_agents = []
+        # Estimated tokens sent to the model, and history tokens left out of it
+        self.prompt_tokens = 0
+        self.history_tokens_dropped = 0
+        self.model_seconds = 0.0
+        self._model_started = None
+
+    def model_request(self, prompt_tokens: int, history_tokens_dropped: int = 0) -> None:
+        """Count a request about to be sent to the model and start timing it."""
+
+        self.prompt_tokens += prompt_tokens
+        self.history_tokens_dropped += history_tokens_dropped
+        self._model_started = time.perf_counter()
+
+    def model_response(self) -> float:
+        """Stop timing the model request started by model_request().
+
+        Returns:
+            Seconds the request took, or 0.0 if none was being timed
+        """
+
+        if self._model_started is None:
+            return 0.0
+        seconds = time.perf_counter() - self._model_started
+        self.model_seconds += seconds
+        self._model_started = None
+        return seconds
+
+    def to_dict(self) -> dict:
+        return {
+            "invocation_id": self.invocation_id,
+            "model_calls": self.model_calls,
+            "model_calls_saved": self.model_calls_saved,
+            "skipped_agents": list(self.skipped_agents),
+            "prompt_tokens": self.prompt_tokens,
+            "history_tokens_dropped": self.history_tokens_dropped,
+            "model_ms": round(self.model_seconds * 1000, 1),
+        }
+
+    def report(self) -> str:
+        """One-line token and latency report for the turn."""
+
+        return (
+            f"{self.model_calls} model call(s), ~{self.prompt_tokens} prompt tokens"
+            f" ({self.history_tokens_dropped} history tokens trimmed), {self.model_seconds * 1000:.0f} ms in the model"
+        )
+
+
+recent_turns = deque(maxlen=MAX_TURNS)
+totals = {
+    "turns": 0,
+    "model_calls": 0,
+    "model_calls_saved": 0,
+    "prompt_tokens": 0,
+    "history_tokens_dropped": 0,
+    "model_seconds": 0.0,
+}
+# Turns still running, by invocation id, so model callbacks can find their turn
+_open_turns = {}
+
+
+def start_turn(invocation_id: str) -> TurnMetrics:
+    """Counters for a turn that is starting."""
+
+    turn = TurnMetrics(invocation_id)
+    _open_turns[invocation_id] = turn
+    return turn
+
+
+def open_turn(invocation_id: str) -> TurnMetrics:
+    """The counters of a running turn, or None outside of a turn."""
+
+    return _open_turns.get(invocation_id)
+
+
+def record_turn(turn: TurnMetrics) -> None:
+    """Store a finished turn and add it to the running totals."""
+
+    _open_turns.pop(turn.invocation_id, None)
+    recent_turns.append(turn)
+    totals["turns"] += 1
+    totals["model_calls"] += turn.model_calls
+    totals["model_calls_saved"] += turn.model_calls_saved
+    totals["prompt_tokens"] += turn.prompt_tokens
+    totals["history_tokens_dropped"] += turn.history_tokens_dropped
+    totals["model_seconds"] += turn.model_seconds
+
+
+def summary() -> str:
+    """One-line summary of model usage across all recorded turns."""
+
+    return (
+        f"{totals['turns']} turn(s), {totals['model_calls']} model call(s), "
+        f"{totals['model_calls_saved']} saved by the authentication gate, "
+        f"~{totals['prompt_tokens']} prompt tokens ({totals['history_tokens_dropped']} history tokens trimmed)"
+    )
@@ -0,0 +1,16 @@
+import os
+
+# Model used by both worker agents. Set LOCKMIND_MODEL=stub to run offline
+# against StubLlm, with LOCKMIND_STUB_LATENCY_MS simulating model latency.
+MODEL_NAME = os.environ.get("LOCKMIND_MODEL", "gemini-2.0-flash")
+
+
+def get_model():
+    """Model for an Agent(model=...) slot: a model name or a local stub instance."""
+
+    if MODEL_NAME == "stub":
+        from .stub_model import StubLlm
+
+        return StubLlm(latency_ms=float(os.environ.get("LOCKMIND_STUB_LATENCY_MS", "0")))
+
+    return MODEL_NAME
@@ -0,0 +1,129 @@
+import json
+import os
+
+from google.genai import types
+
+from . import instrumentation, metrics
+
+# Estimated tokens of earlier conversation sent with each model call; the
+# current turn is always sent in full
+HISTORY_TOKEN_BUDGET = int(os.environ.get("LOCKMIND_HISTORY_TOKEN_BUDGET", "1500"))
+# Set to 0 to send the full instruction, every tool and the whole history (for comparisons)
+SLIMMING = os.environ.get("LOCKMIND_PROMPT_SLIMMING", "1") != "0"
+
+# Rough size of a token in characters of English text or JSON
+CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN
+
+
+def content_tokens(content: types.Content) -> int:
+    """Estimated tokens of one message: its text, function calls and function responses."""
+
+    size = 0
+    for part in content.parts or ():
+        if part.text:
+            size += len(part.text)
+        if part.function_call:
+            size += len(part.function_call.name or "") + len(json.dumps(part.function_call.args or {}, default=str))
+        if part.function_response:
+            size += len(part.function_response.name or "") + len(json.dumps(part.function_response.response or {}, default=str))
+    return size // CHARS_PER_TOKEN
+
+
+def request_tokens(llm_request) -> int:
+    """Estimated prompt tokens of an LlmRequest: system instruction, tool declarations and contents."""
+
+    size = 0
+    config = llm_request.config
+    if config is not None:
+        if isinstance(config.system_instruction, str):
+            size += len(config.system_instruction)
+        for tool in config.tools or ():
+            size += len(tool.model_dump_json(exclude_none=True))
+    return size // CHARS_PER_TOKEN + sum(content_tokens(content) for content in llm_request.contents)
+
+
+def _starts_turn(content: types.Content) -> bool:
+    # A user message (or another agent's reply, which ADK passes on as user text)
+    # rather than a function response, so cutting here never orphans a tool call
+    return content.role == "user" and any(part.text for part in content.parts or ())
+
+
+def trim_history(contents: list, budget: int = None) -> tuple:
+    """Drop the oldest whole turns of a conversation until it fits a token budget.
+
+    The turn in progress (from the last message that starts a turn) is always
+    kept; earlier turns are kept newest first while they fit. Dropped turns are
+    replaced by a one-line note so the model knows history was cut.
+
+    Returns:
+        (contents, estimated tokens dropped)
+    """
+
+    budget = HISTORY_TOKEN_BUDGET if budget is None else budget
+
+    starts = [i for i, content in enumerate(contents) if _starts_turn(content)]
+    if len(starts) < 2:
+        return contents, 0
+
+    cut = starts[-1]
+    used = 0
+    for start, end in zip(reversed(starts[:-1]), reversed(starts[1:])):
+        size = sum(content_tokens(content) for content in contents[start:end])
+        if used + size > budget:
+            break
+        used += size
+        cut = start
+
+    if cut == 0:
+        return contents, 0
+
+    dropped = sum(content_tokens(content) for content in contents[:cut])
+    note = types.Content(role="user", parts=[types.Part(
+        text=f"[{cut} earlier message(s) omitted to save tokens; ask the user if you need them.]"
+    )])
+    return [note] + contents[cut:], dropped
+
+
+def keep_tools(llm_request, names) -> None:
+    """Only declare the named tools to the model.
+
+    The other tools stay registered, so a call to one of them still runs; the
+    model just isn't sent their schemas.
+    """
+
+    tools = []
+    for tool in llm_request.config.tools or ():
+        if tool.function_declarations:
+            tool.function_declarations = [
+                declaration for declaration in tool.function_declarations if declaration.name in names
+            ]
+            if not tool.function_declarations:
+                continue
+        tools.append(tool)
+    llm_request.config.tools = tools
+
+
+def budget_history(callback_context, llm_request) -> None:
+    """before_model_callback: trim history to the token budget and count the request's tokens."""
+
+    dropped = 0
+    if SLIMMING:
+        llm_request.contents, dropped = trim_history(llm_request.contents)
+
+    turn = metrics.open_turn(callback_context.invocation_id)
+    if turn is not None:
+        turn.model_request(request_tokens(llm_request), dropped)
+
+
+def record_model_response(callback_context, llm_response) -> None:
+    """after_model_callback: stop timing the model call for the turn's latency report."""
+
+    turn = metrics.open_turn(callback_context.invocation_id)
+    if turn is not None:
+        seconds = turn.model_response()
+        if instrumentation.ENABLED and seconds:
+            instrumentation.record_span("model", callback_context.agent_name, seconds)
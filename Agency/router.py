@@ -0,0 +1,165 @@
+import inspect
+import shlex
+
+from google.adk.agents.invocation_context import new_invocation_context_id
+from google.adk.events import Event, EventActions
+from google.adk.sessions.state import State
+from google.genai import types
+
+from . import session_store
+from .workers.auth_manager.agent import authenticate_user, logout_user
+from .workers.auth_manager.rate_limit import get_rate_limiter, too_many_attempts
+from .workers.passwords_manager.agent import (
+    add_password,
+    get_passwords,
+    modify_password,
+    remove_password,
+    reveal_password,
+    search_passwords,
+)
+
+ROUTER_AUTHOR = "Lockmind_Router"
+
+# Marks a line as a structured command; anything else is free-form conversation
+COMMAND_PREFIX = "/"
+
+# Structured commands that map straight onto a tool, so they skip the model.
+# Each entry is (command name, tool, argument names). Only lines starting with
+# COMMAND_PREFIX are commands, so ordinary sentences ("login as alice", "delete
+# password github account") always go to the model. Arguments are whitespace
+# separated; quote them to include spaces, e.g. /add "My Bank" me "p w".
+COMMANDS = [
+    ("/login", authenticate_user, ("username", "password")),
+    ("/logout", logout_user, ()),
+    ("/list", get_passwords, ()),
+    ("/search", search_passwords, ("query",)),
+    ("/reveal", reveal_password, ("service_name", "username")),
+    ("/add", add_password, ("service_name", "username", "password")),
+    ("/update", modify_password, ("service_name", "username", "new_password")),
+    ("/remove", remove_password, ("service_name", "username")),
+]
+
+
+class DirectToolContext:
+    """ToolContext stand-in for calling tool functions without going through the runner.
+
+    Tools only use tool_context.state, so this wraps the session state in the same
+    State class the runner uses and keeps the resulting delta for the caller to persist.
+    """
+
+    def __init__(self, state: dict, session_id: str = None):
+        self.session_id = session_id
+        self.state_delta = {}
+        self.state = State(value=dict(state), delta=self.state_delta)
+        self.invocation_id = new_invocation_context_id()
+
+
+def match_command(text: str):
+    """Match user input against the structured command grammar.
+
+    Args:
+        text: The raw user input line
+
+    Returns:
+        (tool, kwargs) for a structured command, or None for free-form conversation
+        and for command lines that don't fit the grammar (see is_command)
+    """
+
+    if not is_command(text):
+        return None
+    try:
+        words = shlex.split(text)
+    except ValueError:
+        return None
+
+    for name, tool, arg_names in COMMANDS:
+        if words[0].lower() == name and len(words) == 1 + len(arg_names):
+            return tool, dict(zip(arg_names, words[1:]))
+
+    return None
+
+
+def is_command(text: str) -> bool:
+    """Whether a line is meant as a structured command (it starts with COMMAND_PREFIX)."""
+
+    return text.lstrip().startswith(COMMAND_PREFIX)
+
+
+def command_usage() -> str:
+    """The reply to a command line that doesn't fit the grammar, listing the commands."""
+
+    lines = ["Unknown command or wrong number of arguments. Commands:"]
+    lines += [" ".join([f"  {name}", *(f"<{arg}>" for arg in arg_names)]) for name, _, arg_names in COMMANDS]
+    return "\n".join(lines)
+
+
+async def run_command(command, session_service, app_name: str, user_id: str, session_id: str):
+    """Run a matched command directly and record its state changes in the session.
+
+    Args:
+        command: A (tool, kwargs) pair returned by match_command
+        session_service: The session service holding the session
+        app_name: The application name
+        user_id: The session's user id
+        session_id: The session id
+
+    Returns:
+        (tool result, event appended to the session or None if nothing was recorded)
+    """
+
+    tool, kwargs = command
+
+    # Refuse login attempts that are over the limit before loading the session
+    if tool is authenticate_user:
+        retry_after = get_rate_limiter().retry_after(kwargs["username"], session_id)
+        if retry_after:
+            return too_many_attempts(retry_after), None
+
+    session = await session_store.run(session_service.get_session, app_name=app_name, user_id=user_id, session_id=session_id)
+
+    tool_context = DirectToolContext(session.state, session_id=session_id)
+    result = tool(**kwargs, tool_context=tool_context)
+    if inspect.isawaitable(result):
+        result = await result
+
+    # Record the outcome (never the arguments or stored secrets) so the agents
+    # still see it in the conversation history
+    if "passwords" in result:
+        history_text = f"Listed {result['count']} saved password(s)."
+    elif "matches" in result:
+        history_text = f"Found {result['count']} matching password(s)."
+    else:
+        history_text = result.get("message", "")
+
+    event = Event(
+        invocation_id=tool_context.invocation_id,
+        author=ROUTER_AUTHOR,
+        content=types.Content(role="model", parts=[types.Part(text=history_text)]),
+        actions=EventActions(state_delta=tool_context.state_delta),
+    )
+    await session_store.run(session_service.append_event, session, event)
+
+    return result, event
+
+
+def format_result(result: dict) -> str:
+    """Render a tool result as a reply line for the user."""
+
+    if "passwords" in result:
+        if not result["passwords"]:
+            return "You don't have any saved passwords yet."
+        lines = [f"You have {result['count']} saved password(s):"]
+        lines += [f"  - {entry['service']}: {entry['username']}" for entry in result["passwords"]]
+        return "\n".join(lines)
+
+    if "matches" in result:
+        if not result["matches"]:
+            return "No saved passwords match."
+        lines = [f"Found {result['count']} matching password(s):"]
+        lines += [f"  - {entry['service']}: {entry['username']}" for entry in result["matches"]]
+        return "\n".join(lines)
+
+    if "password" in result:
+        return f"{result['service_name']} / {result['username']}: {result['password']}"
+
+    return result.get("message", str(result))
@@ -0,0 +1,69 @@
+class SessionStateView:
+    """In-memory view of a session's state, kept current from event state deltas.
+
+    main.py needs to know whether the session is validated for every streamed
+    event. Reading that through session_service.get_session reloads the session
+    row and every one of its events, so the view applies each event's
+    actions.state_delta instead and only goes back to the database on a cache miss.
+    """
+
+    def __init__(self, session_service, app_name: str, user_id: str, session_id: str, state: dict = None):
+        """Create a view over one session.
+
+        Args:
+            session_service: The session service that owns the session
+            app_name: The application name the session belongs to
+            user_id: The user the session belongs to
+            session_id: The session id
+            state: Optional known state to seed the view with (e.g. from create_session)
+        """
+
+        self._session_service = session_service
+        self._app_name = app_name
+        self._user_id = user_id
+        self._session_id = session_id
+        self._state = dict(state) if state is not None else {}
+        self._loaded = state is not None
+        self.db_reads = 0
+
+    def apply(self, event) -> None:
+        """Fold the state delta carried by an event into the view.
+
+        Args:
+            event: An event yielded by runner.run_async
+        """
+
+        actions = getattr(event, "actions", None)
+        state_delta = getattr(actions, "state_delta", None)
+        if state_delta:
+            self._state.update(state_delta)
+
+    def get(self, key: str, default=None):
+        """Get a state value, reading the session from the database only on a cache miss.
+
+        Args:
+            key: The state key to read
+            default: Value returned when the key is not in the session state
+
+        Returns:
+            The current value for the key
+        """
+
+        if key not in self._state and not self._loaded:
+            self.refresh()
+
+        return self._state.get(key, default)
+
+    def refresh(self) -> None:
+        """Reload the full session state from the session service."""
+
+        session = self._session_service.get_session(
+            app_name=self._app_name,
+            user_id=self._user_id,
+            session_id=self._session_id,
+        )
+        self.db_reads += 1
+
+        if session is not None:
+            self._state = dict(session.state)
+        self._loaded = True
@@ -0,0 +1,20 @@
+def update_state(state, **values) -> dict:
+    """Set session state keys, skipping values that are already current.
+
+    Every assignment to an ADK State lands in the event's state_delta, which is
+    stored with the event and replayed on every session load, even when the
+    value did not change. Writing only real changes keeps each event's delta to
+    what actually changed.
+
+    Args:
+        state: A tool or callback context's state
+        **values: Keys and their new values
+
+    Returns:
+        The keys and values that were written
+    """
+
+    changed = {key: value for key, value in values.items() if key not in state or state[key] != value}
+    for key, value in changed.items():
+        state[key] = value
+    return changed
@@ -0,0 +1,25 @@
+import os
+import sqlite3
+
+# Default SQLite file of the session service (session_store.DB_URL); the Lockmind stores
+# keep their own tables next to the ADK session tables.
+DB_PATH = os.environ.get("LOCKMIND_DB_PATH", "./my_agent_data.db")
+
+
+def connect(path: str = None) -> sqlite3.Connection:
+    """Open a SQLite connection for the Lockmind stores.
+
+    Args:
+        path: Database file path, defaults to DB_PATH
+
+    Returns:
+        A connection usable from any thread, returning rows as sqlite3.Row
+    """
+
+    conn = sqlite3.connect(path or DB_PATH, check_same_thread=False, timeout=30)
+    conn.row_factory = sqlite3.Row
+    # Same tuning as the session engine (session_store.SQLITE_PRAGMAS): WAL so
+    # readers don't block the writer, and no fsync on every commit
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
@@ -0,0 +1,65 @@
+import asyncio
+import time
+from typing import AsyncGenerator
+
+from google.adk.models import BaseLlm, LlmRequest, LlmResponse
+from google.genai import types
+from pydantic import Field
+
+
+class StubLlm(BaseLlm):
+    """Offline stand-in for Gemini that replays scripted responses.
+
+    Each model call takes the next step from script, in order:
+        {"text": "..."}                               reply with text
+        {"call": "authenticate_user", "args": {...}}  call a tool with the given args
+    A step may set "latency_ms" to override the default latency. When streamed,
+    text replies arrive word by word, with the latency spread over the words.
+    Once the script is used up every call answers with reply. Used for load
+    testing and benchmarks, where model latency should be a fixed, known cost
+    rather than a network round trip.
+    """
+
+    model: str = "lockmind-stub"
+    latency_ms: float = 0
+    reply: str = "This is a stubbed model reply."
+    script: list = Field(default_factory=list)
+    calls: int = 0
+    elapsed: float = 0.0
+
+    def queue(self, steps: list) -> None:
+        """Append steps to the script."""
+
+        self.script.extend(steps)
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        start = time.perf_counter()
+        step = self.script.pop(0) if self.script else {"text": self.reply}
+        latency_ms = step.get("latency_ms", self.latency_ms)
+
+        if stream and "call" not in step:
+            # Like Gemini with SSE: the latency is spread over word chunks sent as
+            # partial responses, followed by one response with the whole text
+            words = step["text"].split(" ")
+            for i, word in enumerate(words):
+                if latency_ms:
+                    await asyncio.sleep(latency_ms / len(words) / 1000)
+                chunk = word if i == len(words) - 1 else word + " "
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+
+            self.calls += 1
+            self.elapsed += time.perf_counter() - start
+            yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=step["text"])]))
+            return
+
+        if latency_ms:
+            await asyncio.sleep(latency_ms / 1000)
+
+        if "call" in step:
+            part = types.Part(function_call=types.FunctionCall(name=step["call"], args=step.get("args", {})))
+        else:
+            part = types.Part(text=step["text"])
+
+        self.calls += 1
+        self.elapsed += time.perf_counter() - start
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
@@ -0,0 +1,121 @@
+import os
+from typing import AsyncGenerator
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.genai import types
+
+from . import instrumentation
+from .router import ROUTER_AUTHOR, command_usage, format_result, is_command, match_command, run_command
+from .session_view import SessionStateView
+
+# Stream model replies chunk by chunk instead of waiting for whole messages
+STREAMING = os.environ.get("LOCKMIND_STREAMING", "0") == "1"
+
+_STREAMING_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+
+def _may_show(author: str, session_view: SessionStateView) -> bool:
+    # PasswordsManager replies are only shown to validated sessions
+    return "Passwords_Manager" not in author or session_view.get("validated", False)
+
+
+async def stream_turn(
+    runner,
+    session_view: SessionStateView,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    user_input: str,
+    model_slots=None,
+    streaming: bool = False,
+) -> AsyncGenerator[tuple, None]:
+    """Run one user line and yield the replies to show the user, optionally as they stream in.
+
+    Structured commands go straight to the tools; everything else goes through
+    the runner. PasswordsManager replies are withheld unless the session is
+    validated. When streaming, that is decided at a message's first chunk and
+    holds for the rest of it, so nothing is shown that is later withheld.
+
+    Args:
+        runner: The Runner for LockmindAgent
+        session_view: State view for the session, updated from every event
+        app_name: The application name
+        user_id: The session's user id
+        session_id: The session id
+        user_input: The raw user line
+        model_slots: Optional asyncio.Semaphore capping concurrent model turns
+        streaming: Ask the model for partial responses (SSE streaming mode)
+
+    Yields:
+        (author, text, partial): partial chunks carry the next piece of text;
+        every message then ends with one non-partial item holding its full text
+    """
+
+    # Structured commands (e.g. "/login alice hunter2", "/list") call the
+    # tools directly instead of going through the model
+    command = match_command(user_input)
+    if command:
+        with instrumentation.span("command", command[0].__name__):
+            result, event = await run_command(command, runner.session_service, app_name, user_id, session_id)
+        session_view.apply(event)
+        yield ROUTER_AUTHOR, format_result(result), False
+        return
+    # A malformed command may hold a password, so it never reaches the model
+    if is_command(user_input):
+        yield ROUTER_AUTHOR, command_usage(), False
+        return
+
+    content = types.Content(role="user", parts=[types.Part(text=user_input)])
+    run_config = _STREAMING_CONFIG if streaming else RunConfig()
+    # Show/withhold decision for each author's message in progress
+    shown = {}
+
+    if model_slots is not None:
+        await model_slots.acquire()
+    try:
+        async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=content, run_config=run_config):
+            session_view.apply(event)
+
+            if not (event.content and event.content.parts and event.content.parts[0].text):
+                continue
+
+            agent_name = getattr(event, 'author', '') or ""
+            text = event.content.parts[0].text
+
+            if event.partial:
+                if agent_name not in shown:
+                    shown[agent_name] = _may_show(agent_name, session_view)
+                if shown[agent_name]:
+                    yield agent_name, text, True
+                continue
+
+            # The whole message: use the decision made for its chunks, if it streamed
+            show = shown.pop(agent_name, None)
+            if show is None:
+                show = _may_show(agent_name, session_view)
+            if show:
+                yield agent_name, text, False
+    finally:
+        if model_slots is not None:
+            model_slots.release()
+
+
+async def handle_turn(
+    runner,
+    session_view: SessionStateView,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    user_input: str,
+    model_slots=None,
+) -> AsyncGenerator[tuple, None]:
+    """Run one user line and yield the replies to show the user as whole messages.
+
+    See stream_turn(); this is the non-streaming form.
+
+    Yields:
+        (author, text) for each reply
+    """
+
+    async for author, text, _ in stream_turn(runner, session_view, app_name, user_id, session_id, user_input, model_slots):
+        yield author, text
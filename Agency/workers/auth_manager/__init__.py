@@ -1,3 +1,10 @@
-from .agent import AuthManager
+def __getattr__(name):
+    # Importing the package (e.g. for hashing or the user store) doesn't build the agent
+    if name == "AuthManager":
+        from .agent import AuthManager
 
-__all__ = ["Auth_Manager"]
+        return AuthManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["AuthManager"]
@@ -1,28 +1,64 @@
+import functools
+import time
+
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 
+from Agency import prompts
+from Agency.audit import get_audit_log, session_id_of
+from Agency.models import get_model
+from Agency.state import update_state
+from Agency.workers.passwords_manager.read_cache import get_read_cache
+
+from .answer_scoring import get_answer_scorer
+from .hashing import get_hasher
+from .instructions import auth_instruction, before_auth_model
+from .keyring import create_vault_key, get_key_cache, open_vault_key
+from .rate_limit import get_rate_limiter, lockout_seconds, too_many_attempts
+from .user_store import get_user_store
+
+def _locked_for(user_data: dict) -> float:
+    # Seconds left on the account's stored lockout; unlike the rate limiter's, it
+    # survives restarts and holds in every server worker
+    return max(0.0, (user_data.get("locked_until") or 0) - time.time())
+
+def _record_failure(username: str, lockout: float) -> float:
+    # Count the failure on the account and store the lockout it leads to (at least
+    # the rate limiter's); returns the lockout in seconds, 0 if none
+    lockout = max(lockout, lockout_seconds(get_user_store().record_failure(username)))
+    if lockout:
+        get_user_store().update(username, account_locked=True, locked_until=time.time() + lockout)
+    return lockout
+
 def get_user_data(username:str,tool_context: ToolContext) -> dict:
-    """Get user data from the database.
-    
+    """Look up whether an account exists, and which security questions it has.
+
     Args:
-        username: The username to retrieve data for
+        username: The username to look up
         tool_context: Context for accessing and updating session state
 
     Returns:
-        User data dictionary
+        Whether the account exists, its email and its security question names;
+        never the password, vault key or answers
     """
 
-    # Get user data from database
-    user_data = tool_context.state.get("user", {}).get(username, {})
+    user_data = get_user_store().get(username)
+    if not user_data:
+        return {"exists": False, "username": username}
 
-    return user_data
+    return {
+        "exists": True,
+        "username": username,
+        "email": user_data.get("email"),
+        "security_questions": sorted(user_data.get("personal_data") or {}),
+    }
 
-def save_user_data(username: str, password: str, personal_data: dict, tool_context: ToolContext) -> dict:
+async def save_user_data(username: str, password: str, personal_data: dict, tool_context: ToolContext) -> dict:
     """Save complete user data to the database for authentication and security verification.
 
     Args:
         username: The unique username for the account
-        password: The user's password (will be encrypted before storage)
+        password: The user's password (hashed with scrypt before storage)
         personal_data: Dictionary containing all personal security questions and answers:
             - age: User's age
             - favorite_color: User's favorite color
@@ -34,26 +70,34 @@ def save_user_data(username: str, password: str, personal_data: dict, tool_conte
             - elementary_school: Name of user's elementary school
             - favorite_movie: User's favorite movie
             - dream_vacation: User's dream vacation destination
+            - email: User's email address (indexed for account lookup)
             - Any additional custom security questions
         tool_context: Context for accessing and updating session state
 
     Returns:
         A confirmation message with account creation status"""
 
-    user_record = {
-        "username": username,
-        "password": password,
-        "personal_data": personal_data,
-        "created_at": str(__import__('datetime').datetime.now()),
-        "last_login": None,
-        "failed_attempts": 0,
-        "account_locked": False
-    }
-
-    if "user" not in tool_context.state:
-        tool_context.state["user"] = {}
+    # Email is indexed on its own column rather than scored as a security question
+    personal_data = dict(personal_data)
+    email = personal_data.pop("email", None)
+
+    try:
+        if get_user_store().exists(username):
+            raise ValueError(f"Username '{username}' is already taken.")
+        password_hash = await get_hasher().hash_async(password)
+        get_user_store().create(username, password_hash, personal_data, email=email)
+        get_answer_scorer().enroll(username, personal_data)
+        get_audit_log().record("signup", "success", username, tool_context, security_questions=len(personal_data))
+    except ValueError as e:
+        get_audit_log().record("signup", "username_taken", username, tool_context)
+        return {
+            "status": "error",
+            "message": f"{e} Please choose a different username.",
+            "username": username
+        }
 
-    tool_context.state["user"] = user_record
+    # The next thing a new user does is log in
+    update_state(tool_context.state, auth_phase="login")
 
     return {
         "status": "success",
@@ -62,7 +106,7 @@ def save_user_data(username: str, password: str, personal_data: dict, tool_conte
         "security_questions_count": len(personal_data)
     }
 
-def authenticate_user(username: str, password: str, tool_context: ToolContext) -> dict:
+async def authenticate_user(username: str, password: str, tool_context: ToolContext) -> dict:
     """Authenticate user with username and password, setting validation state.
 
     Args:
@@ -73,22 +117,39 @@ def authenticate_user(username: str, password: str, tool_context: ToolContext) -
     Returns:
         Authentication result with validation status"""
 
-    user_data = tool_context.state.get("user", {})
+    # Reject over-limit and locked-out attempts before any database or hashing work
+    session_id = session_id_of(tool_context)
+    rate_limiter = get_rate_limiter()
+    retry_after = rate_limiter.check(username, session_id)
+    if retry_after:
+        get_audit_log().record("login", "rate_limited", username, tool_context)
+        return too_many_attempts(retry_after)
+
+    user_store = get_user_store()
+    user_data = user_store.get(username)
 
-    if not user_data or user_data.get("username") != username:
+    if not user_data:
         # Set validation state to false
-        tool_context.state["validated"] = False
-        tool_context.state["authentication_attempts"] = tool_context.state.get("authentication_attempts", 0) + 1
+        rate_limiter.failure(username, session_id)
+        get_audit_log().record("login", "unknown_user", username, tool_context)
+        update_state(tool_context.state, validated=False, authentication_attempts=tool_context.state.get("authentication_attempts", 0) + 1)
         return {
             "status": "failed",
             "message": "Username not found. Please check your username or create a new account.",
             "validated": False
         }
 
-    if user_data.get("password") != password:
+    locked_for = _locked_for(user_data)
+    if locked_for:
+        get_audit_log().record("login", "account_locked", username, tool_context)
+        return too_many_attempts(locked_for)
+
+    hasher = get_hasher()
+    if not await hasher.verify_async(password, user_data.get("password")):
         # Set validation state to false
-        tool_context.state["validated"] = False
-        tool_context.state["authentication_attempts"] = tool_context.state.get("authentication_attempts", 0) + 1
+        lockout = _record_failure(username, rate_limiter.failure(username, session_id))
+        get_audit_log().record("login", "wrong_password", username, tool_context, lockout_seconds=lockout)
+        update_state(tool_context.state, validated=False, authentication_attempts=tool_context.state.get("authentication_attempts", 0) + 1)
         return {
             "status": "failed",
             "message": "Incorrect password. You can request a password reset if you've forgotten your password.",
@@ -96,10 +157,22 @@ def authenticate_user(username: str, password: str, tool_context: ToolContext) -
         }
 
     # Successful authentication - set validation state to true
-    tool_context.state["validated"] = True
-    tool_context.state["current_user"] = username
-    tool_context.state["authentication_attempts"] = 0
-    user_data["last_login"] = str(__import__('datetime').datetime.now())
+    update_state(tool_context.state, validated=True, current_user=username, authentication_attempts=0)
+    rate_limiter.success(username, session_id)
+    user_store.update(username, last_login=str(__import__('datetime').datetime.now()), failed_attempts=0, account_locked=False, locked_until=None)
+    get_audit_log().record("login", "success", username, tool_context)
+
+    # Upgrade hashes made with older cost parameters (or stored in plaintext)
+    if hasher.needs_rehash(user_data.get("password")):
+        user_store.update(username, password=await hasher.hash_async(password))
+
+    # Unlock the vault key for this session; accounts made before vault encryption get one now
+    if user_data["vault_key"]:
+        vault_key = await open_vault_key(username, password, user_data["vault_key"])
+    else:
+        vault_key, wrapped = await create_vault_key(username, password)
+        user_store.update(username, vault_key=wrapped)
+    get_key_cache().put(session_id, username, vault_key, user_data["key_generation"])
 
     return {
         "status": "success",
@@ -108,7 +181,7 @@ def authenticate_user(username: str, password: str, tool_context: ToolContext) -
         "username": username
     }
 
-def reset_password_with_verification(username: str, new_password: str, verification_answers: dict, tool_context: ToolContext) -> dict:
+async def reset_password_with_verification(username: str, new_password: str, verification_answers: dict, tool_context: ToolContext) -> dict:
     """Reset user password after personal verification questions.
 
     Args:
@@ -120,48 +193,67 @@ def reset_password_with_verification(username: str, new_password: str, verificat
     Returns:
         Password reset result with validation status"""
 
-    user_data = tool_context.state.get("user", {})
+    # Recovery attempts count against the same limits as logins
+    session_id = session_id_of(tool_context)
+    rate_limiter = get_rate_limiter()
+    retry_after = rate_limiter.check(username, session_id)
+    if retry_after:
+        get_audit_log().record("password_reset", "rate_limited", username, tool_context)
+        return too_many_attempts(retry_after)
+
+    user_store = get_user_store()
+    user_data = user_store.get(username)
 
-    if not user_data or user_data.get("username") != username:
-        tool_context.state["validated"] = False
+    if not user_data:
+        get_audit_log().record("password_reset", "unknown_user", username, tool_context)
+        update_state(tool_context.state, validated=False)
         return {
             "status": "failed",
             "message": "Username not found.",
             "validated": False
         }
 
-    stored_personal_data = user_data.get("personal_data", {})
+    locked_for = _locked_for(user_data)
+    if locked_for:
+        get_audit_log().record("password_reset", "account_locked", username, tool_context)
+        return too_many_attempts(locked_for)
 
-    # Calculate verification score based on answer similarity
-    total_questions = len(stored_personal_data)
-    correct_answers = 0
-
-    for question, stored_answer in stored_personal_data.items():
-        user_answer = verification_answers.get(question, "").lower().strip()
-        stored_answer_lower = str(stored_answer).lower().strip()
-
-        if user_answer == stored_answer_lower or user_answer in stored_answer_lower or stored_answer_lower in user_answer:
-            correct_answers += 1
-
-    confidence_score = (correct_answers / total_questions * 100) if total_questions > 0 else 0
+    # Calculate verification score based on answer similarity (typo-tolerant, empty answers never match)
+    confidence_score = get_answer_scorer().confidence(username, user_data.get("personal_data", {}), verification_answers)
 
     if confidence_score >= 80:
-        # High confidence - allow password reset
-        user_data["password"] = new_password
-        tool_context.state["validated"] = True
-        tool_context.state["current_user"] = username
-        tool_context.state["password_reset_in_progress"] = False
+        # High confidence - allow password reset. The vault key is wrapped with the old
+        # password, which a recovery doesn't have, so it always gets a new key; entries
+        # saved under the old one can't be read any more. Bumping the key generation
+        # locks the sessions holding the old key, in every process
+        vault_key, wrapped = await create_vault_key(username, new_password)
+        generation = user_store.replace_vault_key(
+            username,
+            wrapped,
+            password=await get_hasher().hash_async(new_password),
+            failed_attempts=0,
+            account_locked=False,
+            locked_until=None,
+        )
+        get_key_cache().evict_owner(username)
+        get_key_cache().put(session_id, username, vault_key, generation)
+        rate_limiter.success(username, session_id)
+        get_audit_log().record("password_reset", "success", username, tool_context, confidence=confidence_score)
+        update_state(tool_context.state, validated=True, current_user=username, password_reset_in_progress=False)
 
         return {
             "status": "success",
-            "message": f"Password reset successful! Your new password has been set. You are now authenticated and can access your password manager.",
+            "message": (
+                "Password reset successful! Your new password has been set. You are now authenticated and can access "
+                "your password manager. Passwords saved under your old master password can no longer be decrypted."
+            ),
             "validated": True,
             "confidence_score": confidence_score
         }
     elif confidence_score >= 60:
         # Medium confidence - ask for additional verification
-        tool_context.state["validated"] = False
-        tool_context.state["password_reset_in_progress"] = True
+        get_audit_log().record("password_reset", "partial", username, tool_context, confidence=confidence_score)
+        update_state(tool_context.state, validated=False, password_reset_in_progress=True)
 
         return {
             "status": "partial",
@@ -172,8 +264,9 @@ def reset_password_with_verification(username: str, new_password: str, verificat
         }
     else:
         # Low confidence - deny access
-        tool_context.state["validated"] = False
-        tool_context.state["password_reset_in_progress"] = False
+        _record_failure(username, rate_limiter.failure(username, session_id))
+        get_audit_log().record("password_reset", "denied", username, tool_context, confidence=confidence_score)
+        update_state(tool_context.state, validated=False, password_reset_in_progress=False)
 
         return {
             "status": "failed",
@@ -182,125 +275,44 @@ def reset_password_with_verification(username: str, new_password: str, verificat
             "confidence_score": confidence_score
         }
 
-AuthManager = Agent(
-    name="Auth_Manager",
-    model="gemini-2.0-flash",
-    description="Intelligent authentication manager that secures user accounts through multi-layered personal verification. Maintains a comprehensive database of user credentials and personal security questions to enable secure password recovery through identity verification.",
-    instruction="""
-    You are an intelligent Authentication Manager in a SEQUENTIAL AGENT SYSTEM. You are the FIRST agent that runs and must set the 'validated' state to control access to the password manager.
-
-    ## CRITICAL: Sequential Flow Control
-    - You MUST set tool_context.state["validated"] = True for successful authentication
-    - You MUST set tool_context.state["validated"] = False for failed authentication
-    - The next agent (PasswordsManager) will ONLY run if validated = True
-    - Use the authenticate_user tool to properly set validation state
-
-    ## Core Responsibilities:
-    1. **User Database Management**: Maintain a secure database containing:
-       - Username and password
-       - Personal security questions and answers
-       - User profile data (age, favorite color, favorite team, etc.)
-
-    2. **Account Creation Process** (for first-time user):
-       When a user doesn't have an account yet:
-
-       a) **Initial Setup**: Collect basic account information:
-          - Username (check for uniqueness)
-          - Password (ensure strong password requirements)
-          - Email address
-
-       b) **Personal Security Questions Setup**: Ask and store answers to security questions:
-          - "What is your age?"
-          - "What is your favorite color?"
-          - "What is your favorite sports team?"
-          - "What city were you born in?"
-          - "What was your first pet's name?"
-          - "What is your mother's maiden name?"
-          - "What is your favorite food?"
-          - "What was the name of your elementary school?"
-          - "What is your favorite movie?"
-          - "What is your dream vacation destination?"
-          - And any other custom personal questions you want to add
-
-       c) **Data Storage**: Use the available tools to securely save all user information:
-          - Store encrypted password
-          - Save all personal security questions and answers
-          - Create user profile with personal data
-          - Initialize authentication history
-
-    3. **Authentication Process**:
-       - Check if user exists in database first using available tools
-       - If user doesn't exist, initiate account creation process
-       - If user exists, verify credentials during login attempts
-       - Handle password reset requests securely
-
-    ## Tool Usage Guidelines:
-    - Always use the provided tools to interact with the database
-    - Call appropriate tools for user lookup, creation, and data storage
-    - Ensure all data is properly encrypted before storage
-    - Use tools to verify user existence before proceeding with authentication or account creation
-
-    4. **Password Recovery Through Personal Verification**:
-       When a user forgets their password, conduct a comprehensive identity verification process:
-
-       a) **Initial Verification**: Ask for basic identifying information (username, email)
-
-       b) **Personal Security Questions**: Present a series of personal questions from the database:
-          - "What is your age?"
-          - "What is your favorite color?"
-          - "What is your favorite sports team?"
-          - "What city were you born in?"
-          - "What was your first pet's name?"
-          - "What is your mother's maiden name?"
-          - And other custom personal questions stored in their profile
-
-       c) **Answer Analysis**:
-          - Compare user responses with stored answers
-          - Use fuzzy matching for slight variations (typos, different formatting)
-          - Calculate confidence score based on answer accuracy
-          - Consider partial matches (e.g., "blue" vs "dark blue")
-
-       d) **Decision Making**:
-          - If confidence score >= 80%: Allow password reset
-          - If confidence score 60-79%: Ask additional verification questions
-          - If confidence score < 60%: Deny access and log security event
-
-    ## Security Protocols:
-    - Implement rate limiting for failed attempts
-    - Never reveal stored answers, only verify against them
-    - Use secure random questions selection to prevent pattern recognition
-    - Maintain audit trail of all password recovery attempts
-
-    ## Response Guidelines:
-    - Be professional and security-conscious
-    - Explain verification steps clearly to user
-    - Provide helpful feedback without compromising security
-    - Guide user through the recovery process step-by-step
-    - Alert user to suspicious activity on their accounts
-
-    ## Error Handling:
-    - Handle database connection issues gracefully
-    - Provide clear error messages without revealing system details
-    - Implement fallback verification methods when needed
-    - Escalate to human administrators for complex cases
-
-    ## Workflow for New User:
-    1. **User Interaction**: When a user attempts to log in or requests access
-    2. **User Lookup**: Use tools to check if username exists in database
-    3. **New User Detection**: If user not found, explain account creation process
-    4. **Account Creation**: Guide user through complete setup:
-       - Collect username, password, email
-       - Ask all personal security questions one by one
-       - Confirm all information before saving
-    5. **Data Persistence**: Use tools to save all collected information securely
-    6. **Confirmation**: Confirm successful account creation and guide to login
-
-    ## Workflow for Existing User:
-    1. **Authentication**: Verify username and password using tools
-    2. **Success**: Grant access if credentials are correct
-    3. **Password Recovery**: If password forgotten, initiate personal verification process
-
-    Remember: Security is paramount. When in doubt, err on the side of caution and require additional verification. Always use the provided tools for database operations.
-    """,
-    tools=[get_user_data, save_user_data, authenticate_user, reset_password_with_verification],
-)
\ No newline at end of file
+def logout_user(tool_context: ToolContext) -> dict:
+    """Log the user out, locking their vault for this session.
+
+    Args:
+        tool_context: Tool context for state management
+
+    Returns:
+        Logout result with validation status"""
+
+    username = tool_context.state.get("current_user")
+    get_key_cache().evict(session_id_of(tool_context))
+    get_read_cache().evict(session_id_of(tool_context))
+    get_audit_log().record("logout", "success", username, tool_context)
+    update_state(tool_context.state, validated=False, current_user=None, auth_phase="login")
+
+    return {
+        "status": "success",
+        "message": "You have been logged out and your vault is locked.",
+        "validated": False
+    }
+
+@functools.cache
+def build_auth_manager() -> Agent:
+    """The AuthManager agent, built on first use rather than at import."""
+
+    return Agent(
+        name="Auth_Manager",
+        model=get_model(),
+        description="Intelligent authentication manager that secures user accounts through multi-layered personal verification. Maintains a comprehensive database of user credentials and personal security questions to enable secure password recovery through identity verification.",
+        # Only the current phase's instructions and tool schemas are sent (see instructions.py)
+        instruction=auth_instruction,
+        before_model_callback=before_auth_model,
+        after_model_callback=prompts.record_model_response,
+        tools=[get_user_data, save_user_data, authenticate_user, reset_password_with_verification, logout_user],
+    )
+
+
+def __getattr__(name):
+    if name == "AuthManager":
+        return build_auth_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
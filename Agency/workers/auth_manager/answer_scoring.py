@@ -0,0 +1,214 @@
+import functools
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# An answer counts as correct when its similarity to the stored answer reaches this
+MATCH_THRESHOLD = 0.8
+# Partial answers ("blue" for "dark blue") score slightly below an exact match
+CONTAINMENT_WEIGHT = 0.9
+# Shorter answers than this can't earn credit by being contained in the stored one
+MIN_CONTAINED_LENGTH = 3
+# Words an answer may have beyond the stored answer's; longer answers score 0, so
+# one bag of likely words can't be sprayed at every question
+MAX_EXTRA_TOKENS = 2
+
+# Profiles kept in memory; older ones are rebuilt from the user store on demand
+MAX_CACHED_PROFILES = 10_000
+
+_ARTICLES = {"the", "a", "an"}
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize_answer(value) -> str:
+    """Case-, accent- and punctuation-insensitive form of an answer or question key."""
+
+    text = str(value)
+    if not text.isascii():
+        text = "".join(ch for ch in unicodedata.normalize("NFKD", text) if not unicodedata.combining(ch))
+    text = text.casefold()
+    tokens = _NON_WORD.sub(" ", text).split()
+    # "The Beatles" and "Beatles" are the same answer
+    if len(tokens) > 1 and tokens[0] in _ARTICLES:
+        tokens = tokens[1:]
+    return " ".join(tokens)
+
+
+def edit_distance(a: str, b: str, max_distance: int) -> int:
+    """Edit distance between two strings, counting an adjacent swap as one edit.
+
+    The common prefix and suffix are skipped, since they never need an edit. Only
+    the diagonal band of width max_distance of the rest is computed and the search
+    stops as soon as the distance must exceed it; max_distance + 1 is returned then.
+    """
+
+    if len(a) < len(b):
+        a, b = b, a
+    if len(a) - len(b) > max_distance:
+        return max_distance + 1
+
+    start = 0
+    while start < len(b) and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < len(b) - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+    if start or end:
+        a, b = a[start:len(a) - end], b[start:len(b) - end]
+    if not b:
+        return min(len(a), max_distance + 1)
+
+    too_far = max_distance + 1
+    before = None
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        ca = a[i - 1]
+        current = [too_far] * (len(b) + 1)
+        current[0] = row_min = i
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        for j in range(low, high + 1):
+            cb = b[j - 1]
+            if ca == cb:
+                value = previous[j - 1]
+            else:
+                value = previous[j - 1] + 1
+                if previous[j] < value - 1:
+                    value = previous[j] + 1
+                if current[j - 1] < value - 1:
+                    value = current[j - 1] + 1
+                if before is not None and j > 1 and ca == b[j - 2] and a[i - 2] == cb and before[j - 2] + 1 < value:
+                    value = before[j - 2] + 1
+            current[j] = value
+            if value < row_min:
+                row_min = value
+        if row_min > max_distance:
+            return too_far
+        before, previous = previous, current
+    return min(previous[-1], too_far)
+
+
+def _ratio(a: str, b: str) -> float:
+    # 1 - distance / length, only resolved down to MATCH_THRESHOLD; anything
+    # further apart comes back just below it
+    longest = max(len(a), len(b))
+    max_distance = int(round(longest * (1 - MATCH_THRESHOLD), 6))
+    return 1 - edit_distance(a, b, max_distance) / longest
+
+
+def similarity(stored: tuple, answer: str) -> float:
+    """Similarity in [0, 1] between a normalized answer and a stored profile entry.
+
+    The score is the best of the edit-distance ratio on the whole answer, the same
+    ratio with words sorted (for reordered answers), and token containment for
+    partial answers: only an answer whose words all appear in the stored answer
+    gets that credit, never one that adds words to it. Empty answers and answers
+    more than MAX_EXTRA_TOKENS words longer than the stored one score 0, and
+    scores below MATCH_THRESHOLD are only approximate.
+    """
+
+    text, tokens, sorted_text, token_set = stored
+    if not answer or not text:
+        return 0.0
+    if answer == text:
+        return 1.0
+
+    answer_tokens = answer.split()
+    if len(answer_tokens) > len(tokens) + MAX_EXTRA_TOKENS:
+        return 0.0
+
+    score = _ratio(text, answer)
+    if score >= 1 - 1 / max(len(text), len(answer)):
+        return score
+
+    if len(tokens) > 1 or len(answer_tokens) > 1:
+        given = set(answer_tokens)
+        if len(" ".join(given)) >= MIN_CONTAINED_LENGTH and given <= token_set:
+            score = max(score, CONTAINMENT_WEIGHT)
+
+        # Words already in order give the same ratio as above
+        sorted_answer = " ".join(sorted(answer_tokens))
+        if sorted_text != text or sorted_answer != answer:
+            score = max(score, _ratio(sorted_text, sorted_answer))
+
+    return score
+
+
+class AnswerProfile:
+    """A user's security answers, normalized once at enrollment.
+
+    Each answer is stored as (text, tokens, sorted-token text, token set), so a
+    verification only prepares the given answers.
+    """
+
+    def __init__(self, personal_data: dict):
+        self.answers = {}
+        for question, answer in personal_data.items():
+            text = normalize_answer(answer)
+            tokens = tuple(text.split())
+            self.answers[normalize_answer(question)] = (text, tokens, " ".join(sorted(tokens)), frozenset(tokens))
+
+    def score(self, verification_answers: dict) -> dict:
+        """Similarity of every stored question against the given answers, in one pass.
+
+        Args:
+            verification_answers: Question to answer mapping; keys are matched
+                case- and punctuation-insensitively ("Favorite color" == "favorite_color")
+
+        Returns:
+            Question to similarity in [0, 1]; unanswered questions score 0
+        """
+
+        given = {normalize_answer(question): normalize_answer(answer) for question, answer in verification_answers.items()}
+        return {question: similarity(stored, given.get(question, "")) for question, stored in self.answers.items()}
+
+    def confidence(self, verification_answers: dict) -> float:
+        """Percentage of stored questions answered correctly (0 when there are none)."""
+
+        if not self.answers:
+            return 0
+
+        scores = self.score(verification_answers)
+        correct = sum(1 for value in scores.values() if value >= MATCH_THRESHOLD)
+        return correct / len(self.answers) * 100
+
+
+class AnswerScorer:
+    """Per-user cache of answer profiles, filled at enrollment or on first verification."""
+
+    def __init__(self, max_profiles: int = MAX_CACHED_PROFILES):
+        self._profiles = OrderedDict()
+        self._max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def enroll(self, username: str, personal_data: dict) -> AnswerProfile:
+        """Normalize and cache a user's answers."""
+
+        profile = AnswerProfile(personal_data)
+        with self._lock:
+            self._profiles[username] = profile
+            self._profiles.move_to_end(username)
+            while len(self._profiles) > self._max_profiles:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def confidence(self, username: str, personal_data: dict, verification_answers: dict) -> float:
+        """Confidence score for a verification attempt, using the cached profile when there is one."""
+
+        with self._lock:
+            profile = self._profiles.get(username)
+            if profile is not None:
+                self._profiles.move_to_end(username)
+
+        if profile is None:
+            profile = self.enroll(username, personal_data)
+
+        return profile.confidence(verification_answers)
+
+
+@functools.lru_cache(maxsize=None)
+def get_answer_scorer() -> AnswerScorer:
+    """Shared answer scorer for the auth tools."""
+
+    return AnswerScorer()
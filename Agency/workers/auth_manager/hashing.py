@@ -0,0 +1,143 @@
+import asyncio
+import base64
+import functools
+import hashlib
+import hmac
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PREFIX = "scrypt"
+
+# Verification latency the cost parameters are calibrated to at startup
+TARGET_MS = float(os.environ.get("LOCKMIND_HASH_TARGET_MS", "100"))
+# scrypt cost n to use instead of calibrating, 0 to calibrate (server workers get the front's)
+FIXED_N = int(os.environ.get("LOCKMIND_HASH_N", "0"))
+
+MIN_N = 2 ** 12
+MAX_N = 2 ** 20
+
+
+class PasswordHasher:
+    """scrypt password hashing with per-user salts and constant-time verification.
+
+    Hashes are stored as "scrypt$n$r$p$salt$hash" so each one records the cost
+    it was made with. needs_rehash() reports hashes made with other parameters
+    (or legacy plaintext values) so they can be upgraded on the next successful
+    login. The *_async methods run in a thread pool so a burst of logins does not
+    block the asyncio event loop; hashlib.scrypt releases the GIL while it runs.
+    """
+
+    def __init__(self, n: int = 2 ** 14, r: int = 8, p: int = 1, max_workers: int = None):
+        self.n = n
+        self.r = r
+        self.p = p
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="lockmind-hash")
+
+    @classmethod
+    def calibrate(cls, target_ms: float = TARGET_MS, r: int = 8, p: int = 1, **kwargs) -> "PasswordHasher":
+        """Pick the largest n whose hashing time stays within target_ms on this machine.
+
+        Args:
+            target_ms: Target verification latency in milliseconds
+            r: scrypt block size
+            p: scrypt parallelization factor
+
+        Returns:
+            A hasher using the calibrated cost
+        """
+
+        n = MIN_N
+        while n < MAX_N:
+            start = time.perf_counter()
+            _scrypt(b"calibration", os.urandom(16), n * 2, r, p)
+            if (time.perf_counter() - start) * 1000 > target_ms:
+                break
+            n *= 2
+
+        return cls(n=n, r=r, p=p, **kwargs)
+
+    def hash(self, password: str) -> str:
+        """Hash a password with a fresh random salt."""
+
+        salt = os.urandom(16)
+        digest = _scrypt(password.encode(), salt, self.n, self.r, self.p)
+        return "$".join((PREFIX, str(self.n), str(self.r), str(self.p), _b64(salt), _b64(digest)))
+
+    def verify(self, password: str, encoded: str) -> bool:
+        """Check a password against a stored hash in constant time."""
+
+        if not encoded:
+            return False
+
+        if not encoded.startswith(PREFIX + "$"):
+            # Plaintext value stored before hashing was introduced
+            return hmac.compare_digest(password.encode(), encoded.encode())
+
+        _, n, r, p, salt, digest = encoded.split("$")
+        candidate = _scrypt(password.encode(), _unb64(salt), int(n), int(r), int(p))
+        return hmac.compare_digest(candidate, _unb64(digest))
+
+    def needs_rehash(self, encoded: str) -> bool:
+        """Whether a stored hash was made with different cost parameters (or is plaintext)."""
+
+        if not encoded or not encoded.startswith(PREFIX + "$"):
+            return True
+
+        _, n, r, p, _, _ = encoded.split("$")
+        return (int(n), int(r), int(p)) != (self.n, self.r, self.p)
+
+    def derive_key(self, password: str, params: str = None) -> tuple:
+        """Derive a 256-bit encryption key from a password.
+
+        Args:
+            password: The password to derive from
+            params: "scrypt$n$r$p$salt" of an earlier derivation to repeat it,
+                or None for a fresh salt at this hasher's cost
+
+        Returns:
+            (key, params)
+        """
+
+        if params is None:
+            salt = os.urandom(16)
+            params = "$".join((PREFIX, str(self.n), str(self.r), str(self.p), _b64(salt)))
+
+        _, n, r, p, salt = params.split("$")
+        return _scrypt(password.encode(), _unb64(salt), int(n), int(r), int(p)), params
+
+    async def hash_async(self, password: str) -> str:
+        """hash() on the hashing thread pool."""
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.hash, password)
+
+    async def verify_async(self, password: str, encoded: str) -> bool:
+        """verify() on the hashing thread pool."""
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.verify, password, encoded)
+
+    async def derive_key_async(self, password: str, params: str = None) -> tuple:
+        """derive_key() on the hashing thread pool."""
+
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self.derive_key, password, params)
+
+
+def _scrypt(password: bytes, salt: bytes, n: int, r: int, p: int) -> bytes:
+    return hashlib.scrypt(password, salt=salt, n=n, r=r, p=p, maxmem=256 * n * r * p, dklen=32)
+
+
+def _b64(data: bytes) -> str:
+    return base64.b64encode(data).decode()
+
+
+def _unb64(data: str) -> bytes:
+    return base64.b64decode(data)
+
+
+@functools.lru_cache(maxsize=None)
+def get_hasher() -> PasswordHasher:
+    """Shared hasher, calibrated to TARGET_MS on first use unless LOCKMIND_HASH_N fixes the cost."""
+
+    if FIXED_N:
+        return PasswordHasher(n=FIXED_N)
+    return PasswordHasher.calibrate()
@@ -0,0 +1,129 @@
+import re
+
+from Agency import prompts
+from Agency.state import update_state
+
+# Instruction text is a template: ADK fills in {names} from session state, so avoid braces
+
+CORE = """
+You are the Authentication Manager, the first agent of Lockmind's sequential agent system.
+The password manager only runs once the session is validated. Only the tools change that:
+authenticate_user and reset_password_with_verification validate the session, logout_user ends it.
+Always use the tools for account lookups and changes. Be professional and security-conscious:
+never reveal stored passwords or security answers, and give clear errors without system details.
+"""
+
+SIGNUP = """
+## Account creation
+1. Collect a username, a strong password and an email address. Check the username is free with get_user_data.
+2. Ask the security questions one at a time: age, favorite color, favorite sports team, birth city,
+   first pet's name, mother's maiden name, favorite food, elementary school, favorite movie and
+   dream vacation. The user may add custom questions.
+3. Confirm the details, then call save_user_data with the answers and the email in personal_data.
+4. Confirm the account was created and invite the user to log in.
+"""
+
+LOGIN = """
+## Login
+Verify the username and password with authenticate_user. If it fails, say so without details and
+offer password recovery; if the account does not exist, offer to create one.
+"""
+
+RECOVERY = """
+## Password recovery
+1. Ask for the username (and email) and look the account up with get_user_data. It returns the
+   names of the account's security questions, never the answers.
+2. Ask several of those security questions.
+3. Call reset_password_with_verification with the answers and the new password. It scores the
+   answers, tolerating typos and formatting, and resets the password, asks for more answers or
+   refuses. Explain the outcome and the next step.
+"""
+
+LOGOUT = """
+## Logout
+When the user asks to log out, call logout_user to end the session and lock their vault.
+"""
+
+VAULT = """
+The user is logged in and the password manager handles their vault requests, so only acknowledge
+briefly (e.g. "You are already authenticated."). If they ask to log out, call logout_user.
+"""
+
+START = """
+Work out whether the user wants to create an account, log in or recover a forgotten password.
+"""
+
+PHASE_INSTRUCTIONS = {
+    "start": CORE + START + SIGNUP + LOGIN + RECOVERY + LOGOUT,
+    "signup": CORE + SIGNUP + LOGIN,
+    # A failed login leads to recovery, often in words no hint matches ("I lost it")
+    "login": CORE + LOGIN + RECOVERY,
+    "recovery": CORE + RECOVERY,
+    "vault": CORE + VAULT,
+}
+
+# Tool schemas sent to the model in each phase (None sends them all)
+PHASE_TOOLS = {
+    "start": None,
+    "signup": {"get_user_data", "save_user_data", "authenticate_user"},
+    "login": {"get_user_data", "authenticate_user", "reset_password_with_verification"},
+    "recovery": {"get_user_data", "reset_password_with_verification"},
+    "vault": {"logout_user"},
+}
+
+# What the user asks for in this message, checked in this order
+_PHASE_HINTS = (
+    ("recovery", re.compile(r"\b(forg[eo]t|reset|recover|lost)", re.IGNORECASE)),
+    ("signup", re.compile(r"\b(sign ?up|register|new account|create (an |a new |my )?account)", re.IGNORECASE)),
+    ("login", re.compile(r"\b(log ?(me )?in|sign ?(me )?in)\b", re.IGNORECASE)),
+)
+
+
+def auth_phase(state, user_text: str = "") -> str:
+    """The conversation phase for the AuthManager, from session state and the user's message.
+
+    Validated sessions are in the vault phase. Otherwise the message can start
+    a phase ("I forgot my password"), and replies such as a bare answer to a
+    security question stay in the phase recorded by earlier turns.
+    """
+
+    if state.get("validated", False):
+        return "vault"
+
+    for phase, pattern in _PHASE_HINTS:
+        if pattern.search(user_text or ""):
+            return phase
+
+    if state.get("password_reset_in_progress", False):
+        return "recovery"
+    return state.get("auth_phase") or "start"
+
+
+def _user_text(context) -> str:
+    content = context._invocation_context.user_content
+    if not content or not content.parts:
+        return ""
+    return " ".join(part.text for part in content.parts if part.text)
+
+
+def auth_instruction(context) -> str:
+    """Instruction provider: only the instructions for the current phase."""
+
+    if not prompts.SLIMMING:
+        return PHASE_INSTRUCTIONS["start"]
+    return PHASE_INSTRUCTIONS[auth_phase(context.state, _user_text(context))]
+
+
+def before_auth_model(callback_context, llm_request) -> None:
+    """before_model_callback: remember the phase and only declare its tools, then budget the history."""
+
+    if prompts.SLIMMING:
+        phase = auth_phase(callback_context.state, _user_text(callback_context))
+        if phase not in ("vault", "start"):
+            update_state(callback_context.state, auth_phase=phase)
+
+        names = PHASE_TOOLS[phase]
+        if names is not None:
+            prompts.keep_tools(llm_request, names)
+
+    prompts.budget_history(callback_context, llm_request)
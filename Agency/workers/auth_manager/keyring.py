@@ -0,0 +1,188 @@
+import base64
+import functools
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from .hashing import get_hasher
+
+# Seconds an unlocked vault key stays cached without being used
+KEY_TTL_SECONDS = float(os.environ.get("LOCKMIND_VAULT_KEY_TTL_SECONDS", "900"))
+
+NONCE_SIZE = 12
+
+
+class EntryCipher:
+    """AES-256-GCM encryption of single vault entries.
+
+    Every entry gets a fresh 96-bit nonce, stored in front of the ciphertext.
+    The associated data binds the ciphertext to its (owner, service, username)
+    so a stored value can't be moved to another entry.
+    """
+
+    def __init__(self, key: bytes):
+        self._aead = AESGCM(bytes(key))
+
+    def encrypt(self, plaintext: str, associated_data: bytes) -> bytes:
+        nonce = os.urandom(NONCE_SIZE)
+        return nonce + self._aead.encrypt(nonce, plaintext.encode(), associated_data)
+
+    def decrypt(self, blob: bytes, associated_data: bytes) -> str:
+        """Decrypt one entry.
+
+        Raises:
+            ValueError: If the entry was encrypted under another key or tampered with
+        """
+
+        try:
+            return self._aead.decrypt(blob[:NONCE_SIZE], blob[NONCE_SIZE:], associated_data).decode()
+        except InvalidTag:
+            raise ValueError("The entry can't be decrypted with this vault key.")
+
+
+async def create_vault_key(username: str, password: str) -> tuple:
+    """Generate a random vault key and wrap it with a key derived from the master password.
+
+    Returns:
+        (vault key, wrapped form to store on the account)
+    """
+
+    vault_key = bytearray(os.urandom(32))
+    return vault_key, await wrap_vault_key(username, password, vault_key)
+
+
+async def wrap_vault_key(username: str, password: str, vault_key: bytearray) -> str:
+    """Wrap a vault key under a new master password, as "scrypt$n$r$p$salt$wrapped"."""
+
+    wrapping_key, params = await get_hasher().derive_key_async(password)
+    nonce = os.urandom(NONCE_SIZE)
+    wrapped = nonce + AESGCM(wrapping_key).encrypt(nonce, bytes(vault_key), username.encode())
+    return f"{params}${base64.b64encode(wrapped).decode()}"
+
+
+async def open_vault_key(username: str, password: str, stored: str) -> bytearray:
+    """Unwrap a stored vault key with the master password.
+
+    Raises:
+        ValueError: If the password does not open the key
+    """
+
+    params, wrapped = stored.rsplit("$", 1)
+    wrapping_key, _ = await get_hasher().derive_key_async(password, params)
+    wrapped = base64.b64decode(wrapped)
+    try:
+        return bytearray(AESGCM(wrapping_key).decrypt(wrapped[:NONCE_SIZE], wrapped[NONCE_SIZE:], username.encode()))
+    except InvalidTag:
+        raise ValueError("The password does not open this vault key.")
+
+
+class _CachedKey:
+    __slots__ = ("owner", "key", "generation", "cipher", "expires")
+
+    def __init__(self, owner: str, key: bytearray, generation: int, expires: float):
+        self.owner = owner
+        self.key = key
+        self.generation = generation
+        self.cipher = EntryCipher(key)
+        self.expires = expires
+
+
+class KeyCache:
+    """Unlocked vault keys of validated sessions, evicted after ttl_seconds without use.
+
+    Each key remembers the account's key generation it was unlocked at; a
+    lookup with a newer generation (the key was replaced by a password reset,
+    maybe in another process) evicts it.
+
+    Keys are held in bytearrays that are overwritten with zeros on eviction.
+    That clears Lockmind's own copy; the copy inside the cipher object is only
+    released, as Python gives no way to wipe it.
+    """
+
+    def __init__(self, ttl_seconds: float = KEY_TTL_SECONDS, clock=time.monotonic):
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        # Ordered by last use, so expired keys are always at the front
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, session_id: str, owner: str, key: bytearray, generation: int = 0) -> None:
+        """Cache an unlocked key for a session, replacing any previous one."""
+
+        with self._lock:
+            now = self._clock()
+            self._discard(session_id)
+            self._keys[session_id] = _CachedKey(owner, key, generation, now + self.ttl_seconds)
+            self._expire(now)
+
+    def cipher(self, session_id: str, owner: str, generation: int = None) -> EntryCipher:
+        """The session's entry cipher for owner, or None if its key is not cached (or expired).
+
+        Args:
+            session_id: The session using the key
+            owner: The account the key must belong to
+            generation: The account's stored key generation; a key unlocked at
+                another generation has been replaced and is evicted
+
+        Returns:
+            The cipher, or None if the session has to log in again
+        """
+
+        with self._lock:
+            now = self._clock()
+            self._expire(now)
+            cached = self._keys.get(session_id)
+            if cached is None or cached.owner != owner:
+                return None
+            if generation is not None and cached.generation != generation:
+                self._discard(session_id)
+                return None
+
+            cached.expires = now + self.ttl_seconds
+            self._keys.move_to_end(session_id)
+            return cached.cipher
+
+    def evict_owner(self, owner: str) -> None:
+        """Drop and zero every session's key for owner in this process (when the owner's vault key is replaced)."""
+
+        with self._lock:
+            for session_id in [session_id for session_id, cached in self._keys.items() if cached.owner == owner]:
+                self._discard(session_id)
+
+    def evict(self, session_id: str) -> None:
+        """Drop and zero a session's key (on logout)."""
+
+        with self._lock:
+            self._discard(session_id)
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _discard(self, session_id: str) -> None:
+        # Caller holds the lock
+        cached = self._keys.pop(session_id, None)
+        if cached is not None:
+            _zero(cached.key)
+
+    def _expire(self, now: float) -> None:
+        # Caller holds the lock
+        while self._keys:
+            session_id, cached = next(iter(self._keys.items()))
+            if cached.expires > now:
+                break
+            self._discard(session_id)
+
+
+def _zero(key: bytearray) -> None:
+    key[:] = bytes(len(key))
+
+
+@functools.lru_cache(maxsize=None)
+def get_key_cache() -> KeyCache:
+    """Shared cache of unlocked vault keys."""
+
+    return KeyCache()
@@ -0,0 +1,332 @@
+import functools
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from Agency import storage
+
+# Login attempts allowed per window, per username and per session
+USERNAME_LIMIT = int(os.environ.get("LOCKMIND_LOGIN_LIMIT_PER_USER", "5"))
+SESSION_LIMIT = int(os.environ.get("LOCKMIND_LOGIN_LIMIT_PER_SESSION", "10"))
+WINDOW_SECONDS = float(os.environ.get("LOCKMIND_LOGIN_WINDOW_SECONDS", "60"))
+# Consecutive failures before a key is locked out; each further failure doubles the lockout
+LOCKOUT_THRESHOLD = int(os.environ.get("LOCKMIND_LOCKOUT_THRESHOLD", "5"))
+LOCKOUT_BASE_SECONDS = float(os.environ.get("LOCKMIND_LOCKOUT_BASE_SECONDS", "30"))
+LOCKOUT_MAX_SECONDS = float(os.environ.get("LOCKMIND_LOCKOUT_MAX_SECONDS", "3600"))
+# Keys tracked at once; the least recently used idle keys are evicted first
+MAX_KEYS = int(os.environ.get("LOCKMIND_RATE_LIMIT_MAX_KEYS", "100000"))
+# Keep the per-username limits in the database so every process counts against
+# one budget (server.py --workers turns this on for its workers)
+SHARED = os.environ.get("LOCKMIND_SHARED_RATE_LIMIT", "0") == "1"
+# Shared limiter calls between sweeps of idle rows
+SWEEP_EVERY = 1000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lockmind_login_limits (
+    key TEXT NOT NULL PRIMARY KEY,
+    window INTEGER NOT NULL,
+    previous INTEGER NOT NULL,
+    current INTEGER NOT NULL,
+    failures INTEGER NOT NULL,
+    locked_until REAL NOT NULL,
+    last_seen REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+class _KeyState:
+    """Fixed-size per-key record: two window counters plus lockout state."""
+
+    __slots__ = ("window", "previous", "current", "failures", "locked_until", "last_seen")
+
+    def __init__(self, window: int, now: float):
+        self.window = window
+        self.previous = 0
+        self.current = 0
+        self.failures = 0
+        self.locked_until = 0.0
+        self.last_seen = now
+
+
+class SlidingWindowLimiter:
+    """Sliding-window-counter rate limiter with progressive lockout.
+
+    Each key keeps the attempt counts of the current and previous fixed windows
+    and estimates the sliding count as current + previous * (unexpired share of
+    the previous window), so memory per key is constant. Consecutive failures
+    past lockout_threshold lock the key for lockout_base_seconds, doubling with
+    every further failure up to lockout_max_seconds. Idle keys are evicted
+    least recently used first.
+    """
+
+    def __init__(
+        self,
+        limit: int,
+        window_seconds: float = WINDOW_SECONDS,
+        lockout_threshold: int = LOCKOUT_THRESHOLD,
+        lockout_base_seconds: float = LOCKOUT_BASE_SECONDS,
+        lockout_max_seconds: float = LOCKOUT_MAX_SECONDS,
+        max_keys: int = MAX_KEYS,
+        clock=time.monotonic,
+    ):
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.lockout_threshold = lockout_threshold
+        self.lockout_base_seconds = lockout_base_seconds
+        self.lockout_max_seconds = lockout_max_seconds
+        self.max_keys = max_keys
+        self._clock = clock
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def retry_after(self, key: str) -> float:
+        """Seconds until the key may attempt again, 0 if it may attempt now."""
+
+        with self._lock:
+            now = self._clock()
+            state = self._keys.get(key)
+            if state is None:
+                return 0.0
+
+            self._roll(state, now)
+            if state.locked_until > now:
+                return state.locked_until - now
+
+            window_start = state.window * self.window_seconds
+            elapsed_share = (now - window_start) / self.window_seconds
+            estimated = state.current + state.previous * (1 - elapsed_share)
+            if estimated >= self.limit:
+                # The estimate drops below the limit once enough of the previous window expires
+                if state.previous and state.current < self.limit:
+                    return max(0.0, (1 - (self.limit - state.current) / state.previous) * self.window_seconds - (now - window_start))
+                return window_start + self.window_seconds - now
+            return 0.0
+
+    def hit(self, key: str) -> None:
+        """Count an attempt for the key."""
+
+        with self._lock:
+            self._state(key).current += 1
+
+    def failure(self, key: str) -> float:
+        """Record a failed attempt.
+
+        Returns:
+            Lockout duration in seconds if the key is now locked out, else 0
+        """
+
+        with self._lock:
+            state = self._state(key)
+            state.failures += 1
+            duration = lockout_seconds(state.failures, self.lockout_threshold, self.lockout_base_seconds, self.lockout_max_seconds)
+            if duration:
+                state.locked_until = state.last_seen + duration
+            return duration
+
+    def success(self, key: str) -> None:
+        """Clear the failure streak and any lockout for the key."""
+
+        with self._lock:
+            state = self._keys.get(key)
+            if state is not None:
+                state.failures = 0
+                state.locked_until = 0.0
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def _state(self, key: str) -> _KeyState:
+        # Caller holds the lock
+        now = self._clock()
+        state = self._keys.get(key)
+        if state is None:
+            state = self._keys[key] = _KeyState(self._window(now), now)
+        else:
+            self._roll(state, now)
+            self._keys.move_to_end(key)
+        state.last_seen = now
+        self._evict(now)
+        return state
+
+    def _window(self, now: float) -> int:
+        return math.floor(now / self.window_seconds)
+
+    def _roll(self, state: _KeyState, now: float) -> None:
+        window = self._window(now)
+        if window != state.window:
+            state.previous = state.current if window == state.window + 1 else 0
+            state.current = 0
+            state.window = window
+
+    def _evict(self, now: float) -> None:
+        # Oldest entries first: drop them while over capacity or idle for two
+        # windows, but never drop a key that is still locked out
+        while self._keys:
+            key, state = next(iter(self._keys.items()))
+            idle = now - state.last_seen > 2 * self.window_seconds
+            if not (len(self._keys) > self.max_keys or idle):
+                break
+            if state.locked_until > now and len(self._keys) <= self.max_keys:
+                break
+            del self._keys[key]
+
+
+class SharedSlidingWindowLimiter(SlidingWindowLimiter):
+    """SlidingWindowLimiter whose per-key state lives in a SQLite table shared by every process.
+
+    Each call loads the key's row, applies the same window and lockout logic
+    under the database write lock and writes the row back, so attempts made
+    through different server workers count against one budget. It uses the
+    wall clock, since monotonic clocks differ between processes. Rows idle for
+    two windows and not locked out are swept every SWEEP_EVERY calls.
+    """
+
+    def __init__(self, limit: int, path: str = None, **kwargs):
+        kwargs.setdefault("clock", time.time)
+        super().__init__(limit, **kwargs)
+        self._conn = storage.connect(path)
+        self._conn.executescript(SCHEMA)
+        # The base class's lock guards its methods; this one guards the connection
+        self._shared_lock = threading.Lock()
+        self._calls = 0
+
+    def retry_after(self, key: str) -> float:
+        return self._shared(key, super().retry_after)
+
+    def hit(self, key: str) -> None:
+        self._shared(key, super().hit)
+
+    def failure(self, key: str) -> float:
+        return self._shared(key, super().failure)
+
+    def success(self, key: str) -> None:
+        self._shared(key, super().success)
+
+    def __len__(self) -> int:
+        with self._shared_lock:
+            return self._conn.execute("SELECT COUNT(*) FROM lockmind_login_limits").fetchone()[0]
+
+    def _shared(self, key: str, method):
+        # Run a base-class method on the key's stored state, in one write transaction
+        with self._shared_lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            row = self._conn.execute("SELECT * FROM lockmind_login_limits WHERE key = ?", (key,)).fetchone()
+            self._keys.clear()
+            if row is not None:
+                state = self._keys[key] = _KeyState(row["window"], row["last_seen"])
+                state.previous = row["previous"]
+                state.current = row["current"]
+                state.failures = row["failures"]
+                state.locked_until = row["locked_until"]
+
+            result = method(key)
+
+            state = self._keys.pop(key, None)
+            if state is None:
+                # Evicted as idle
+                self._conn.execute("DELETE FROM lockmind_login_limits WHERE key = ?", (key,))
+            else:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO lockmind_login_limits VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, state.window, state.previous, state.current, state.failures, state.locked_until, state.last_seen),
+                )
+
+            self._calls += 1
+            if self._calls % SWEEP_EVERY == 0:
+                now = self._clock()
+                self._conn.execute(
+                    "DELETE FROM lockmind_login_limits WHERE last_seen < ? AND locked_until < ?",
+                    (now - 2 * self.window_seconds, now),
+                )
+        return result
+
+
+class LoginRateLimiter:
+    """Login limits keyed by username and by session, checked before any login work.
+
+    With shared=True the per-username limits are kept in the database, so they
+    hold across processes. Sessions stay in memory: a session is only ever
+    served by one process.
+    """
+
+    def __init__(self, username_limit: int = USERNAME_LIMIT, session_limit: int = SESSION_LIMIT, shared: bool = SHARED, **kwargs):
+        if shared:
+            self.by_username = SharedSlidingWindowLimiter(username_limit, **kwargs)
+        else:
+            self.by_username = SlidingWindowLimiter(username_limit, **kwargs)
+        self.by_session = SlidingWindowLimiter(session_limit, **kwargs)
+
+    def check(self, username: str, session_id: str = None) -> float:
+        """Count a login attempt if it is allowed.
+
+        Returns:
+            0 if the attempt may go ahead, else seconds until the next allowed attempt
+        """
+
+        wait = self.by_username.retry_after(username)
+        if session_id:
+            wait = max(wait, self.by_session.retry_after(session_id))
+        if wait:
+            return wait
+
+        self.by_username.hit(username)
+        if session_id:
+            self.by_session.hit(session_id)
+        return 0.0
+
+    def retry_after(self, username: str = None, session_id: str = None) -> float:
+        """Seconds until a login attempt would be allowed, without counting one (0 if allowed now)."""
+
+        wait = self.by_username.retry_after(username) if username else 0.0
+        if session_id:
+            wait = max(wait, self.by_session.retry_after(session_id))
+        return wait
+
+    def failure(self, username: str, session_id: str = None) -> float:
+        """Record a failed login; returns the username lockout duration (0 if not locked)."""
+
+        if session_id:
+            self.by_session.failure(session_id)
+        return self.by_username.failure(username)
+
+    def success(self, username: str, session_id: str = None) -> None:
+        """Record a successful login, clearing failure streaks."""
+
+        self.by_username.success(username)
+        if session_id:
+            self.by_session.success(session_id)
+
+
+def lockout_seconds(
+    failures: int,
+    threshold: int = LOCKOUT_THRESHOLD,
+    base_seconds: float = LOCKOUT_BASE_SECONDS,
+    max_seconds: float = LOCKOUT_MAX_SECONDS,
+) -> float:
+    """Lockout after a number of consecutive failures: 0 below threshold, then doubling up to max_seconds."""
+
+    excess = failures - threshold
+    if excess < 0:
+        return 0.0
+    # Past 2**32 the doubling is far beyond any max_seconds; capping it avoids float overflow
+    return min(base_seconds * 2 ** min(excess, 32), max_seconds)
+
+
+def too_many_attempts(retry_after: float) -> dict:
+    """Tool result for an attempt rejected by the rate limiter."""
+
+    return {
+        "status": "locked",
+        "message": f"Too many attempts. Please wait {math.ceil(retry_after)} seconds before trying again.",
+        "validated": False,
+        "retry_after_seconds": math.ceil(retry_after)
+    }
+
+
+@functools.lru_cache(maxsize=None)
+def get_rate_limiter() -> LoginRateLimiter:
+    """Shared login rate limiter for the auth tools."""
+
+    return LoginRateLimiter()
@@ -0,0 +1,232 @@
+import functools
+import json
+import sqlite3
+import threading
+from datetime import datetime
+
+from Agency import storage
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lockmind_users (
+    username TEXT NOT NULL PRIMARY KEY,
+    email TEXT,
+    password TEXT NOT NULL,
+    personal_data TEXT NOT NULL,
+    created_at TEXT NOT NULL,
+    last_login TEXT,
+    failed_attempts INTEGER NOT NULL DEFAULT 0,
+    account_locked INTEGER NOT NULL DEFAULT 0,
+    vault_key TEXT,
+    locked_until REAL,
+    key_generation INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS ix_lockmind_users_email ON lockmind_users (email);
+"""
+
+COLUMNS = (
+    "username", "email", "password", "personal_data", "created_at", "last_login",
+    "failed_attempts", "account_locked", "vault_key", "locked_until", "key_generation",
+)
+
+# Columns added after the table was first shipped, with their type
+ADDED_COLUMNS = {"vault_key": "TEXT", "locked_until": "REAL", "key_generation": "INTEGER NOT NULL DEFAULT 0"}
+
+
+class UserStore:
+    """Account table keyed by username with a secondary index on email.
+
+    Each account is one compact row instead of a record serialized into the
+    session state, and both lookups are a single index probe, so lookup time
+    stays flat as the number of accounts grows (see benchmarks/user_store_bench.py).
+    """
+
+    def __init__(self, path: str = None):
+        self._conn = storage.connect(path)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+            # Older tables lack the columns added since (vault_key, locked_until, key_generation)
+            columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(lockmind_users)")}
+            for column, column_type in ADDED_COLUMNS.items():
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE lockmind_users ADD COLUMN {column} {column_type}")
+
+    def get(self, username: str) -> dict:
+        """Get a user record by username, or None if the account does not exist."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM lockmind_users WHERE username = ?", (username,)).fetchone()
+        return self._to_record(row)
+
+    def get_by_email(self, email: str) -> dict:
+        """Get a user record by email address, or None if no account uses it."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM lockmind_users WHERE email = ?", (email.strip().lower(),)).fetchone()
+        return self._to_record(row)
+
+    def exists(self, username: str) -> bool:
+        """Check whether an account exists for the username."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM lockmind_users WHERE username = ?", (username,)).fetchone()
+        return row is not None
+
+    def create(self, username: str, password: str, personal_data: dict, email: str = None) -> dict:
+        """Create a new account.
+
+        Args:
+            username: The unique username for the account
+            password: The stored password value
+            personal_data: Security questions and answers
+            email: Optional email address, indexed for lookup
+
+        Returns:
+            The stored user record
+
+        Raises:
+            ValueError: If the username is already taken
+        """
+
+        record = {
+            "username": username,
+            "email": email.strip().lower() if email else None,
+            "password": password,
+            "personal_data": personal_data,
+            "created_at": str(datetime.now()),
+            "last_login": None,
+            "failed_attempts": 0,
+            "account_locked": False,
+            "vault_key": None,
+            "locked_until": None,
+            "key_generation": 0,
+        }
+
+        try:
+            self.put_many([record])
+        except sqlite3.IntegrityError:
+            raise ValueError(f"Username '{username}' is already taken.")
+
+        return record
+
+    def put_many(self, records: list) -> None:
+        """Insert new user records in a single transaction."""
+
+        rows = [self._to_row(record) for record in records]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT INTO lockmind_users ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})",
+                rows,
+            )
+
+    def update(self, username: str, **fields) -> bool:
+        """Update only the given fields of one account.
+
+        Args:
+            username: The account to update
+            fields: Column values to set, e.g. password or last_login
+
+        Returns:
+            True if the account exists and was updated
+        """
+
+        unknown = set(fields) - set(COLUMNS[1:])
+        if unknown:
+            raise ValueError(f"Unknown user fields: {', '.join(sorted(unknown))}")
+
+        row = self._to_row(fields)
+        assignments = ", ".join(f"{column} = ?" for column in fields)
+        values = [row[COLUMNS.index(column)] for column in fields]
+
+        with self._lock, self._conn:
+            cursor = self._conn.execute(f"UPDATE lockmind_users SET {assignments} WHERE username = ?", (*values, username))
+        return cursor.rowcount == 1
+
+    def replace_vault_key(self, username: str, vault_key: str, **fields) -> int:
+        """Store a new wrapped vault key and bump the account's key generation, in one update.
+
+        Sessions in any process compare the generation they unlocked with the
+        stored one, so they stop using the replaced key.
+
+        Args:
+            username: The account whose key is replaced
+            vault_key: The new wrapped vault key
+            fields: Other column values to set in the same update
+
+        Returns:
+            The new key generation, or 0 if the account does not exist
+        """
+
+        unknown = set(fields) - set(COLUMNS[1:])
+        if unknown:
+            raise ValueError(f"Unknown user fields: {', '.join(sorted(unknown))}")
+
+        row = self._to_row(fields)
+        assignments = "".join(f", {column} = ?" for column in fields)
+        values = [row[COLUMNS.index(column)] for column in fields]
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                f"UPDATE lockmind_users SET vault_key = ?, key_generation = key_generation + 1{assignments}"
+                " WHERE username = ? RETURNING key_generation",
+                (vault_key, *values, username),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def key_generation(self, username: str) -> int:
+        """The account's current vault key generation, or None if it does not exist."""
+
+        with self._lock:
+            row = self._conn.execute("SELECT key_generation FROM lockmind_users WHERE username = ?", (username,)).fetchone()
+        return row[0] if row else None
+
+    def record_failure(self, username: str) -> int:
+        """Count a failed login for an account, atomically across processes.
+
+        Returns:
+            The account's consecutive failures, or 0 if it does not exist
+        """
+
+        with self._lock, self._conn:
+            row = self._conn.execute(
+                "UPDATE lockmind_users SET failed_attempts = failed_attempts + 1 WHERE username = ? RETURNING failed_attempts",
+                (username,),
+            ).fetchone()
+        return row[0] if row else 0
+
+    def count(self) -> int:
+        """Number of accounts in the store."""
+
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM lockmind_users").fetchone()[0]
+
+    @staticmethod
+    def _to_row(record: dict) -> tuple:
+        row = []
+        for column in COLUMNS:
+            value = record.get(column)
+            if column == "personal_data" and value is not None:
+                value = json.dumps(value, separators=(",", ":"))
+            elif column == "account_locked" and value is not None:
+                value = int(value)
+            elif column == "key_generation" and value is None:
+                value = 0
+            row.append(value)
+        return tuple(row)
+
+    @staticmethod
+    def _to_record(row) -> dict:
+        if row is None:
+            return None
+
+        record = dict(row)
+        record["personal_data"] = json.loads(record["personal_data"])
+        record["account_locked"] = bool(record["account_locked"])
+        return record
+
+
+@functools.lru_cache(maxsize=None)
+def get_user_store() -> UserStore:
+    """Shared user store for the auth tools, opened on first use."""
+
+    return UserStore()
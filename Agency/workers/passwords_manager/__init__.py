@@ -1,3 +1,10 @@
-from .agent import PasswordsManager
+def __getattr__(name):
+    # Importing the package (e.g. for the vault or search) doesn't build the agent
+    if name == "PasswordsManager":
+        from .agent import PasswordsManager
 
-__all__ = ["Passwords_Manager"]
\ No newline at end of file
+        return PasswordsManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ["PasswordsManager"]
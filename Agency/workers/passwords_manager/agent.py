@@ -1,6 +1,19 @@
+import functools
+
 from google.adk.agents import Agent
 from google.adk.tools.tool_context import ToolContext
 
+from Agency import prompts
+from Agency.audit import get_audit_log, session_id_of
+from Agency.models import get_model
+from Agency.state import update_state
+from Agency.workers.auth_manager.keyring import get_key_cache
+from Agency.workers.auth_manager.user_store import get_user_store
+
+from .read_cache import get_read_cache
+from .search import DEFAULT_LIMIT
+from .vault import get_vault
+
 def check_authentication_status(tool_context: ToolContext) -> dict:
     """Check if user is authenticated and authorized to access password manager.
     
@@ -14,41 +27,167 @@ def check_authentication_status(tool_context: ToolContext) -> dict:
     validated = tool_context.state.get("validated", False)
     current_user = tool_context.state.get("current_user", None)
 
-    if not validated:
+    def compute():
+        if not validated:
+            return {
+                "status": "unauthorized",
+                "message": "Access denied. You must authenticate first through the authentication system.",
+                "authenticated": False
+            }
+
         return {
-            "status": "unauthorized",
-            "message": "Access denied. You must authenticate first through the authentication system.",
-            "authenticated": False
+            "status": "authorized",
+            "message": f"Access granted. Welcome to your password manager, {current_user}!",
+            "authenticated": True,
+            "current_user": current_user
         }
 
+    return get_read_cache().read(session_id_of(tool_context), validated, current_user, ("auth",), compute)
+
+def _vault_cipher(tool_context: ToolContext, owner: str):
+    # Entry cipher of the session's unlocked vault key, or None once it has expired
+    # or was replaced by a password reset (in any process, hence the stored generation)
+    generation = get_user_store().key_generation(owner)
+    cipher = get_key_cache().cipher(session_id_of(tool_context), owner, generation)
+    if cipher is not None:
+        get_vault().encrypt_plaintext(owner, cipher)
+    return cipher
+
+def _vault_locked(event: str, owner: str, tool_context: ToolContext) -> dict:
+    # The key expired or was replaced (or the process restarted), so the session has to log in again
+    get_audit_log().record(event, "vault_locked", owner, tool_context)
+    update_state(tool_context.state, validated=False, current_user=None)
     return {
-        "status": "authorized",
-        "message": f"Access granted. Welcome to your password manager, {current_user}!",
-        "authenticated": True,
-        "current_user": current_user
+        "status": "locked",
+        "message": "Your vault was locked after a period of inactivity or a password reset. Please log in again.",
+        "authenticated": False
     }
 
+def _cached_read(tool_context: ToolContext, owner: str, key: tuple, compute) -> dict:
+    # A vault read from the session's read cache; callers have checked that the
+    # session is validated for owner and that its vault key is unlocked. Keyed by
+    # the vault version too, so changes made by other processes are never missed.
+    key = (*key, get_vault().version(owner))
+    return get_read_cache().read(session_id_of(tool_context), True, owner, key, compute)
+
 def get_passwords(tool_context: ToolContext) -> dict:
-    """Get passwords from the database. 
-    
+    """List the saved services and usernames, without decrypting any password.
+
+    Args:
+        tool_context: Context for accessing and updating session state
+
+    Returns:
+        Passwords dictionary with the service and username of each entry
+    """
+
+    # Check authentication first
+    auth_check = check_authentication_status(tool_context)
+    if not auth_check.get("authenticated", False):
+        get_audit_log().record("vault.list", "unauthorized", tool_context=tool_context)
+        return auth_check
+
+    if _vault_cipher(tool_context, auth_check["current_user"]) is None:
+        return _vault_locked("vault.list", auth_check["current_user"], tool_context)
+
+    def compute():
+        passwords = get_vault().list(auth_check["current_user"])
+        return {
+            "status": "success",
+            "passwords": passwords,
+            "count": len(passwords)
+        }
+
+    result = _cached_read(tool_context, auth_check["current_user"], ("list",), compute)
+    get_audit_log().record("vault.list", "success", auth_check["current_user"], tool_context, count=result["count"])
+    return result
+
+def search_passwords(query: str, tool_context: ToolContext) -> dict:
+    """Find saved entries by service name or username, tolerating typos and partial names.
+
+    Use this instead of get_passwords to find a specific entry.
+
+    Args:
+        query: Part of a service name or username, e.g. "git" or "gthub"
+        tool_context: Context for accessing and updating session state
+
+    Returns:
+        Up to five best matching entries (service and username only), best first
+    """
+
+    # Check authentication first
+    auth_check = check_authentication_status(tool_context)
+    if not auth_check.get("authenticated", False):
+        get_audit_log().record("vault.search", "unauthorized", tool_context=tool_context)
+        return auth_check
+
+    if _vault_cipher(tool_context, auth_check["current_user"]) is None:
+        return _vault_locked("vault.search", auth_check["current_user"], tool_context)
+
+    def compute():
+        matches = get_vault().search(auth_check["current_user"], query, DEFAULT_LIMIT)
+        return {
+            "status": "success",
+            "matches": matches,
+            "count": len(matches)
+        }
+
+    result = _cached_read(tool_context, auth_check["current_user"], ("search", query), compute)
+    get_audit_log().record("vault.search", "success", auth_check["current_user"], tool_context, count=result["count"])
+    return result
+
+def reveal_password(service_name: str, username: str, tool_context: ToolContext) -> dict:
+    """Decrypt and return the password of one saved entry.
+
+    Only run by the /reveal command, never offered to the model, so the
+    password is shown to the user without entering the model's context or
+    the session's stored events.
+
     Args:
+        service_name: The name of the service
+        username: The username for the service
         tool_context: Context for accessing and updating session state
 
     Returns:
-        Passwords dictionary
+        The entry with its password
     """
 
     # Check authentication first
     auth_check = check_authentication_status(tool_context)
     if not auth_check.get("authenticated", False):
+        get_audit_log().record("vault.reveal", "unauthorized", tool_context=tool_context)
         return auth_check
 
-    passwords = tool_context.state.get("passwords", [])
+    cipher = _vault_cipher(tool_context, auth_check["current_user"])
+    if cipher is None:
+        return _vault_locked("vault.reveal", auth_check["current_user"], tool_context)
 
+    try:
+        password = get_vault().reveal(auth_check["current_user"], service_name, username, cipher)
+    except ValueError:
+        get_audit_log().record("vault.reveal", "undecryptable", auth_check["current_user"], tool_context, service_name=service_name, account=username)
+        return {
+            "status": "error",
+            "message": f"The password for service '{service_name}' was saved under a previous master password and can't be decrypted.",
+            "service_name": service_name,
+            "username": username
+        }
+
+    if password is None:
+        get_audit_log().record("vault.reveal", "not_found", auth_check["current_user"], tool_context, service_name=service_name, account=username)
+        return {
+            "status": "error",
+            "message": f"Password not found for service '{service_name}' and username '{username}'.",
+            "service_name": service_name,
+            "username": username
+        }
+
+    get_audit_log().record("vault.reveal", "success", auth_check["current_user"], tool_context, service_name=service_name, account=username)
     return {
         "status": "success",
-        "passwords": passwords,
-        "count": len(passwords)
+        "message": f"Password for service '{service_name}' and username '{username}'.",
+        "service_name": service_name,
+        "username": username,
+        "password": password
     }
 
 def add_password(service_name: str, username: str, password: str, tool_context: ToolContext) -> dict:
@@ -67,19 +206,24 @@ def add_password(service_name: str, username: str, password: str, tool_context:
     # Check authentication first
     auth_check = check_authentication_status(tool_context)
     if not auth_check.get("authenticated", False):
+        get_audit_log().record("vault.add", "unauthorized", tool_context=tool_context)
         return auth_check
 
-    password_record = {
-        "service": service_name,
-        "username": username,
-        "password": password,
-    }
-
-    if "passwords" not in tool_context.state:
-        tool_context.state["passwords"] = []
+    cipher = _vault_cipher(tool_context, auth_check["current_user"])
+    if cipher is None:
+        return _vault_locked("vault.add", auth_check["current_user"], tool_context)
 
-    tool_context.state["passwords"].append(password_record)
+    if not get_vault().add(auth_check["current_user"], service_name, username, password, cipher):
+        get_audit_log().record("vault.add", "exists", auth_check["current_user"], tool_context, service_name=service_name, account=username)
+        return {
+            "status": "error",
+            "message": f"A password for service '{service_name}' and username '{username}' already exists. Modify it instead.",
+            "service_name": service_name,
+            "username": username
+        }
 
+    get_read_cache().invalidate_owner(auth_check["current_user"])
+    get_audit_log().record("vault.add", "success", auth_check["current_user"], tool_context, service_name=service_name, account=username)
     return {
         "status": "success",
         "message": f"Password added successfully for service '{service_name}'.",
@@ -102,21 +246,24 @@ def modify_password(service_name: str, username: str, new_password: str, tool_co
     # Check authentication first
     auth_check = check_authentication_status(tool_context)
     if not auth_check.get("authenticated", False):
+        get_audit_log().record("vault.modify", "unauthorized", tool_context=tool_context)
         return auth_check
 
-    passwords = tool_context.state.get("passwords", [])
+    cipher = _vault_cipher(tool_context, auth_check["current_user"])
+    if cipher is None:
+        return _vault_locked("vault.modify", auth_check["current_user"], tool_context)
 
-    for password in passwords:
-        if password["service"] == service_name and password["username"] == username:
-            password["password"] = new_password
-            tool_context.state["passwords"] = passwords
-            return {
-                "status": "success",
-                "message": f"Password modified successfully for service '{service_name}'.",
-                "service_name": service_name,
-                "username": username
-            }
+    # Cached listings and searches hold no passwords, so a new password leaves them valid
+    if get_vault().modify(auth_check["current_user"], service_name, username, new_password, cipher):
+        get_audit_log().record("vault.modify", "success", auth_check["current_user"], tool_context, service_name=service_name, account=username)
+        return {
+            "status": "success",
+            "message": f"Password modified successfully for service '{service_name}'.",
+            "service_name": service_name,
+            "username": username
+        }
 
+    get_audit_log().record("vault.modify", "not_found", auth_check["current_user"], tool_context, service_name=service_name, account=username)
     return {
         "status": "error",
         "message": f"Password not found for service '{service_name}' and username '{username}'.",
@@ -139,21 +286,23 @@ def remove_password(service_name: str, username: str, tool_context: ToolContext)
     # Check authentication first
     auth_check = check_authentication_status(tool_context)
     if not auth_check.get("authenticated", False):
+        get_audit_log().record("vault.remove", "unauthorized", tool_context=tool_context)
         return auth_check
 
-    passwords = tool_context.state.get("passwords", [])
+    if _vault_cipher(tool_context, auth_check["current_user"]) is None:
+        return _vault_locked("vault.remove", auth_check["current_user"], tool_context)
 
-    for password in passwords:
-        if password["service"] == service_name and password["username"] == username:
-            passwords.remove(password)
-            tool_context.state["passwords"] = passwords
-            return {
-                "status": "success",
-                "message": f"Password removed successfully for service '{service_name}'.",
-                "service_name": service_name,
-                "username": username
-            }
+    if get_vault().remove(auth_check["current_user"], service_name, username):
+        get_read_cache().invalidate_owner(auth_check["current_user"])
+        get_audit_log().record("vault.remove", "success", auth_check["current_user"], tool_context, service_name=service_name, account=username)
+        return {
+            "status": "success",
+            "message": f"Password removed successfully for service '{service_name}'.",
+            "service_name": service_name,
+            "username": username
+        }
 
+    get_audit_log().record("vault.remove", "not_found", auth_check["current_user"], tool_context, service_name=service_name, account=username)
     return {
         "status": "error",
         "message": f"Password not found for service '{service_name}' and username '{username}'.",
@@ -161,35 +310,39 @@ def remove_password(service_name: str, username: str, tool_context: ToolContext)
         "username": username
     }
 
-PasswordsManager = Agent(
-    name="Passwords_Manager",
-    model="gemini-2.0-flash",
-    description="Secure password manager that requires authentication before providing access to password management features.",
-    instruction="""
-    You are a Passwords Manager that provides secure password management services.
-
-    ## Core Responsibilities:
-    1. **Password Management**:
-       - Add new passwords
-       - Modify existing passwords
-       - Remove passwords
-       - Get passwords
-
-    2. **User Experience**:
-       - Welcome authenticated users warmly
-       - Provide helpful password management guidance
-       - Help users organize and secure their passwords
-       - Suggest strong password practices
-
-    3. **Security**:
-       - All tools include authentication checks
-       - Maintain secure password storage
-       - Provide strong password recommendations
-
-    ## Note:
-    You will only receive user messages when they are authenticated.
-    The main system filters out your responses when users are not authenticated.
-    Focus on providing excellent password management services!
-    """,
-    tools=[check_authentication_status, get_passwords, add_password, modify_password, remove_password],
-)
\ No newline at end of file
+INSTRUCTION = """
+    You are the Passwords Manager of Lockmind. You only run for logged-in users, and every tool
+    checks authentication again. Entries are encrypted with the user's vault key.
+
+    - Add, modify and remove entries with add_password, modify_password and remove_password
+    - Find a particular entry by (partial or misspelled) service name or username with search_passwords
+    - List all saved services and usernames with get_passwords (it never returns passwords);
+      prefer search_passwords when the user is after one entry
+    - You can't see passwords. To see one, the user types /reveal <service> <username>, which
+      shows it without it passing through you or being stored in the conversation
+
+    Be warm and helpful, and suggest strong, unique passwords when it fits.
+    """
+
+
+@functools.cache
+def build_passwords_manager() -> Agent:
+    """The PasswordsManager agent, built on first use rather than at import."""
+
+    return Agent(
+        name="Passwords_Manager",
+        model=get_model(),
+        description="Secure password manager that requires authentication before providing access to password management features.",
+        instruction=INSTRUCTION,
+        before_model_callback=prompts.budget_history,
+        after_model_callback=prompts.record_model_response,
+        # No reveal_password: a tool response would put the decrypted password in the
+        # model's context and in the session's stored events. /reveal shows it instead.
+        tools=[check_authentication_status, get_passwords, search_passwords, add_password, modify_password, remove_password],
+    )
+
+
+def __getattr__(name):
+    if name == "PasswordsManager":
+        return build_passwords_manager()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,155 @@
+import csv
+import json
+import os
+import time
+
+from .read_cache import get_read_cache
+
+# Entries written per transaction during an import
+BATCH_SIZE = int(os.environ.get("LOCKMIND_IMPORT_BATCH_SIZE", "500"))
+
+FORMATS = ("csv", "jsonl")
+
+# Column names accepted for each field, covering the CSV exports of common
+# password managers; the first non-empty one wins
+FIELD_ALIASES = {
+    "service": ("service", "service_name", "name", "title", "url", "login_uri"),
+    "username": ("username", "login_username", "login", "user", "email"),
+    "password": ("password", "login_password"),
+}
+
+
+def detect_format(path: str) -> str:
+    """Guess the file format from its extension (JSON-lines for .jsonl/.ndjson/.json, else CSV)."""
+
+    extension = os.path.splitext(path)[1].lower()
+    return "jsonl" if extension in (".jsonl", ".ndjson", ".json") else "csv"
+
+
+def read_rows(lines, fmt: str):
+    """Parse rows lazily from an iterable of text lines.
+
+    Yields:
+        One dict per row; None for a JSON line that doesn't parse
+    """
+
+    if fmt == "csv":
+        yield from csv.DictReader(lines)
+        return
+
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def normalize_entry(row) -> tuple:
+    """Validate an imported row.
+
+    Returns:
+        (service, username, password)
+
+    Raises:
+        ValueError: If the row is not an object or a field is missing
+    """
+
+    if not isinstance(row, dict):
+        raise ValueError("Row is not an object.")
+
+    fields = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+    entry = []
+    for field, aliases in FIELD_ALIASES.items():
+        value = next((fields[alias] for alias in aliases if fields.get(alias) not in (None, "")), None)
+        if value is None or (field != "password" and not str(value).strip()):
+            raise ValueError(f"Missing {field}.")
+        # Passwords are kept byte for byte; surrounding spaces can be part of them
+        entry.append(str(value) if field == "password" else str(value).strip())
+    return tuple(entry)
+
+
+def import_entries(vault, owner: str, rows, cipher, batch_size: int = BATCH_SIZE) -> dict:
+    """Stream rows into an owner's vault: validate, encrypt and commit in batches.
+
+    At most batch_size rows are held in memory at a time. Rows whose
+    (service, username) already exists, in the vault or earlier in the input,
+    are skipped.
+
+    Args:
+        vault: The Vault to import into
+        owner: The vault owner
+        rows: Iterable of row dicts, e.g. from read_rows()
+        cipher: The owner's entry cipher
+        batch_size: Entries committed per transaction
+
+    Returns:
+        Counts of rows read, imported, skipped as duplicates and rejected as invalid, plus rows/sec
+    """
+
+    start = time.perf_counter()
+    read = imported = invalid = 0
+    batch = []
+    for row in rows:
+        read += 1
+        try:
+            batch.append(normalize_entry(row))
+        except ValueError:
+            invalid += 1
+            continue
+
+        if len(batch) >= batch_size:
+            imported += vault.add_many(owner, batch, cipher)
+            batch = []
+
+    if batch:
+        imported += vault.add_many(owner, batch, cipher)
+    if imported:
+        get_read_cache().invalidate_owner(owner)
+
+    elapsed = time.perf_counter() - start
+    return {
+        "read": read,
+        "imported": imported,
+        "duplicates": read - invalid - imported,
+        "invalid": invalid,
+        "rows_per_second": read / elapsed if elapsed else 0.0,
+    }
+
+
+def export_entries(vault, owner: str, out, fmt: str, cipher, batch_size: int = BATCH_SIZE) -> dict:
+    """Stream an owner's decrypted entries to a text file as CSV or JSON-lines.
+
+    Entries are read page by page, so memory use does not grow with the vault.
+    Entries encrypted under a previous master password can't be decrypted and
+    are left out.
+
+    Returns:
+        Counts of rows exported and left out, plus rows/sec
+    """
+
+    start = time.perf_counter()
+    exported = skipped = 0
+    writer = None
+    if fmt == "csv":
+        writer = csv.writer(out)
+        writer.writerow(("service", "username", "password"))
+
+    for service, username, password in vault.iter_passwords(owner, cipher, batch_size):
+        if password is None:
+            skipped += 1
+            continue
+        if writer is not None:
+            writer.writerow((service, username, password))
+        else:
+            out.write(json.dumps({"service": service, "username": username, "password": password}) + "\n")
+        exported += 1
+
+    elapsed = time.perf_counter() - start
+    return {
+        "exported": exported,
+        "undecryptable": skipped,
+        "rows_per_second": exported / elapsed if elapsed else 0.0,
+    }
@@ -0,0 +1,137 @@
+import functools
+import os
+import threading
+from collections import OrderedDict
+
+# Sessions whose vault reads are cached at once, least recently used evicted first (0 turns the cache off)
+MAX_SESSIONS = int(os.environ.get("LOCKMIND_READ_CACHE_SESSIONS", "1024"))
+# Cached results per session (the auth status, the listing and recent searches)
+MAX_ENTRIES = int(os.environ.get("LOCKMIND_READ_CACHE_ENTRIES", "32"))
+
+
+class _SessionReads:
+    __slots__ = ("validated", "current_user", "results")
+
+    def __init__(self, validated: bool, current_user: str):
+        self.validated = validated
+        self.current_user = current_user
+        self.results = OrderedDict()
+
+
+class ReadCache:
+    """Per-session LRU of vault tool results: the auth status, listings and searches.
+
+    A session's results are only valid for the validated/current_user they were
+    cached under; any change to either drops them. Tools that change an owner's
+    entries call invalidate_owner(), which drops the cached reads of every
+    session of that owner. Cached results are shared, so callers must not
+    modify them. Decrypted passwords are never cached.
+    """
+
+    def __init__(self, max_sessions: int = MAX_SESSIONS, max_entries: int = MAX_ENTRIES):
+        self.max_sessions = max_sessions
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        # Ordered by last use, least recent first
+        self._sessions = OrderedDict()
+        # Bumped by invalidate_owner(), so a result computed across a change is not cached
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def read(self, session_id: str, validated: bool, current_user: str, key: tuple, compute) -> dict:
+        """A session's cached result for key, or compute() cached on a miss.
+
+        Args:
+            session_id: The session reading, or None to skip the cache
+            validated: The session's validated flag the result is computed for
+            current_user: The session's current_user the result is computed for
+            key: What is read, e.g. ("list",) or ("search", query)
+            compute: Builds the result when it isn't cached
+
+        Returns:
+            The result
+        """
+
+        with self._lock:
+            reads = self._reads(session_id, validated, current_user)
+            result = None if reads is None else reads.results.get(key)
+            if result is not None:
+                self.hits += 1
+                reads.results.move_to_end(key)
+                return result
+            self.misses += 1
+            generation = self._generations.get(current_user, 0)
+
+        result = compute()
+        if session_id is None or not self.max_sessions:
+            return result
+
+        with self._lock:
+            # An entry changed while computing: the result may already be stale
+            if self._generations.get(current_user, 0) != generation:
+                return result
+
+            reads = self._reads(session_id, validated, current_user)
+            if reads is None:
+                reads = self._sessions[session_id] = _SessionReads(validated, current_user)
+                if len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+
+            reads.results[key] = result
+            if len(reads.results) > self.max_entries:
+                reads.results.popitem(last=False)
+        return result
+
+    def invalidate_owner(self, owner: str) -> None:
+        """Drop the cached vault reads of every session of an owner (after a change to their entries)."""
+
+        with self._lock:
+            self._generations[owner] = self._generations.get(owner, 0) + 1
+            for reads in self._sessions.values():
+                if reads.current_user == owner:
+                    # The auth status doesn't depend on the entries
+                    for key in [key for key in reads.results if key[0] != "auth"]:
+                        del reads.results[key]
+            self.invalidations += 1
+
+    def evict(self, session_id: str) -> None:
+        """Drop everything cached for a session (on logout)."""
+
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "sessions": len(self._sessions),
+            }
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def _reads(self, session_id: str, validated: bool, current_user: str) -> _SessionReads:
+        # Caller holds the lock
+        reads = self._sessions.get(session_id)
+        if reads is None:
+            return None
+        if reads.validated != validated or reads.current_user != current_user:
+            # Logged in, out or as someone else since these were cached
+            del self._sessions[session_id]
+            return None
+
+        self._sessions.move_to_end(session_id)
+        return reads
+
+
+@functools.lru_cache(maxsize=None)
+def get_read_cache() -> ReadCache:
+    """Shared cache of vault read results."""
+
+    return ReadCache(MAX_SESSIONS, MAX_ENTRIES)
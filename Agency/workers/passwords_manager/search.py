@@ -0,0 +1,138 @@
+import bisect
+import heapq
+import re
+from collections import Counter
+
+# Results returned by a search unless asked otherwise
+DEFAULT_LIMIT = 5
+# Least trigram (Dice) similarity for a fuzzy match
+MIN_FUZZY_SCORE = 0.35
+
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    """Case- and punctuation-insensitive form of a service name, username or query."""
+
+    return " ".join(_NON_WORD.sub(" ", text.casefold()).split())
+
+
+def trigrams(text: str) -> set:
+    """Trigrams of a normalized string, padded so short strings still have some."""
+
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SearchIndex:
+    """Prefix and fuzzy index over one owner's (service, username) keys.
+
+    A sorted list of (term, key) pairs answers prefix queries with two binary
+    searches, where the terms are the whole service name and username plus each
+    of their words. An inverted trigram index answers fuzzy queries ("gthub")
+    by counting the trigrams each key shares with the query. Both are updated
+    per entry, so adding or removing one entry never rebuilds the index.
+    """
+
+    def __init__(self, keys=()):
+        self._terms = []
+        self._grams = {}
+        self._key_grams = {}
+        for key in keys:
+            if key not in self._key_grams:
+                self._terms.extend((term, key) for term in self._terms_of(key))
+                self._index_grams(key)
+        # One sort instead of an insertion per term
+        self._terms.sort()
+
+    def add(self, key: tuple) -> None:
+        """Index a (service, username) key."""
+
+        if key in self._key_grams:
+            return
+
+        for term in self._terms_of(key):
+            bisect.insort(self._terms, (term, key))
+        self._index_grams(key)
+
+    def remove(self, key: tuple) -> None:
+        """Drop a (service, username) key from the index."""
+
+        if self._key_grams.pop(key, None) is None:
+            return
+
+        for term in self._terms_of(key):
+            index = bisect.bisect_left(self._terms, (term, key))
+            if index < len(self._terms) and self._terms[index] == (term, key):
+                del self._terms[index]
+
+        for gram in trigrams(normalize(" ".join(key))):
+            keys = self._grams.get(gram)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._grams[gram]
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list:
+        """Best matching keys for a query, best first.
+
+        Exact matches rank above prefix matches, which rank above fuzzy ones;
+        within each group shorter (closer) terms and higher similarity win.
+
+        Returns:
+            Up to limit (service, username) keys
+        """
+
+        query = normalize(query)
+        if not query:
+            return []
+
+        scores = {}
+
+        # Prefix matches: the range of terms starting with the query
+        start = bisect.bisect_left(self._terms, (query,))
+        for term, key in self._terms[start:]:
+            if not term.startswith(query):
+                break
+            score = 2.0 + len(query) / len(term)
+            if score > scores.get(key, 0.0):
+                scores[key] = score
+
+        # Fuzzy matches score below every prefix match, so they can't change a full result
+        if len(scores) >= limit:
+            return self._best(scores, limit)
+
+        # Fuzzy matches: Dice similarity of trigram sets
+        query_grams = trigrams(query)
+        shared = Counter()
+        for gram in query_grams:
+            shared.update(self._grams.get(gram, ()))
+        for key, count in shared.items():
+            score = 2 * count / (len(query_grams) + self._key_grams[key])
+            if score >= MIN_FUZZY_SCORE and score > scores.get(key, 0.0):
+                scores[key] = score
+
+        return self._best(scores, limit)
+
+    def __len__(self) -> int:
+        return len(self._key_grams)
+
+    def _index_grams(self, key: tuple) -> None:
+        grams = trigrams(normalize(" ".join(key)))
+        self._key_grams[key] = len(grams)
+        for gram in grams:
+            self._grams.setdefault(gram, set()).add(key)
+
+    @staticmethod
+    def _best(scores: dict, limit: int) -> list:
+        return [key for key, _ in heapq.nsmallest(limit, scores.items(), key=lambda item: (-item[1], item[0]))]
+
+    @staticmethod
+    def _terms_of(key: tuple) -> set:
+        terms = set()
+        for field in key:
+            text = normalize(field)
+            if text:
+                terms.add(text)
+                terms.update(text.split())
+        return terms
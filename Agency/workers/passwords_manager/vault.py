@@ -0,0 +1,344 @@
+import functools
+import threading
+
+from Agency import storage
+
+from .search import DEFAULT_LIMIT, SearchIndex
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS lockmind_vault (
+    owner TEXT NOT NULL,
+    service TEXT NOT NULL,
+    username TEXT NOT NULL,
+    password BLOB NOT NULL,
+    PRIMARY KEY (owner, service, username)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS lockmind_vault_versions (
+    owner TEXT NOT NULL PRIMARY KEY,
+    version INTEGER NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _associated_data(owner: str, service: str, username: str) -> bytes:
+    # Binds each ciphertext to its row
+    return "\0".join((owner, service, username)).encode()
+
+
+class Vault:
+    """Password vault keyed by (service, username) for each owner.
+
+    Entries for an owner are loaded into a dict keyed by (service, username),
+    so add, modify and remove are constant time. Every change writes only the
+    affected row.
+
+    Every change also bumps the owner's row in lockmind_vault_versions. Each
+    access compares it with the version the loaded entries came from and
+    reloads them if another process (a server worker, vault_io.py) changed
+    them. Changes take the database write lock before that check, so they
+    always apply to the current entries.
+
+    Passwords are stored encrypted with the owner's entry cipher. Listing only
+    returns metadata; reveal() decrypts the one entry asked for. An owner's
+    SearchIndex is built on their first search and then updated alongside the
+    entries, so search() never scans them.
+    """
+
+    def __init__(self, path: str = None):
+        self._conn = storage.connect(path)
+        self._lock = threading.RLock()
+        self._entries = {}
+        self._indexes = {}
+        self._encrypted_owners = set()
+        # Owner to the lockmind_vault_versions version their loaded entries match
+        self._versions = {}
+        with self._lock:
+            self._conn.executescript(SCHEMA)
+
+    def list(self, owner: str) -> list:
+        """Service and username of all entries for an owner, without passwords."""
+
+        with self._lock:
+            return [{"service": service, "username": username} for service, username in self._load(owner)]
+
+    def search(self, owner: str, query: str, limit: int = DEFAULT_LIMIT) -> list:
+        """Metadata of the entries best matching a query on service name or username."""
+
+        with self._lock:
+            entries = self._load(owner)
+            index = self._indexes.get(owner)
+            if index is None:
+                index = self._indexes[owner] = SearchIndex(entries)
+            keys = index.search(query, limit)
+        return [{"service": service, "username": username} for service, username in keys]
+
+    def reveal(self, owner: str, service: str, username: str, cipher) -> str:
+        """Decrypt the password of one entry.
+
+        Returns:
+            The password, or None if the entry does not exist
+
+        Raises:
+            ValueError: If the entry was encrypted under another key
+        """
+
+        with self._lock:
+            stored = self._load(owner).get((service, username))
+        if stored is None:
+            return None
+        if isinstance(stored, str):
+            # Stored before vault encryption and not yet upgraded
+            return stored
+        return cipher.decrypt(stored, _associated_data(owner, service, username))
+
+    def add(self, owner: str, service: str, username: str, password: str, cipher) -> bool:
+        """Encrypt and add an entry.
+
+        Returns:
+            False if the owner already has an entry for (service, username)
+        """
+
+        encrypted = cipher.encrypt(password, _associated_data(owner, service, username))
+        with self._lock, self._conn:
+            entries = self._begin(owner)
+            # The primary key decides, even if another process added the entry
+            cursor = self._conn.execute(
+                "INSERT OR IGNORE INTO lockmind_vault (owner, service, username, password) VALUES (?, ?, ?, ?)",
+                (owner, service, username, encrypted),
+            )
+            if cursor.rowcount == 0:
+                return False
+
+            self._bump(owner)
+            key = (service, username)
+            entries[key] = encrypted
+            if owner in self._indexes:
+                self._indexes[owner].add(key)
+            return True
+
+    def modify(self, owner: str, service: str, username: str, password: str, cipher) -> bool:
+        """Encrypt and store a new password for an existing entry.
+
+        Returns:
+            False if the entry does not exist
+        """
+
+        encrypted = cipher.encrypt(password, _associated_data(owner, service, username))
+        with self._lock, self._conn:
+            entries = self._begin(owner)
+            if (service, username) not in entries:
+                return False
+
+            self._conn.execute(
+                "UPDATE lockmind_vault SET password = ? WHERE owner = ? AND service = ? AND username = ?",
+                (encrypted, owner, service, username),
+            )
+            self._bump(owner)
+            entries[(service, username)] = encrypted
+            return True
+
+    def add_many(self, owner: str, entries: list, cipher) -> int:
+        """Encrypt and add a batch of entries in one transaction, skipping existing ones.
+
+        Args:
+            owner: The vault owner
+            entries: (service, username, password) tuples
+            cipher: The owner's entry cipher
+
+        Returns:
+            Number of entries added
+        """
+
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN IMMEDIATE")
+            # Only dedup in memory when the owner is loaded and current; otherwise
+            # the primary key does it, without loading the owner's entries
+            cached = self._entries.get(owner)
+            if cached is not None and self._versions.get(owner) != self._stored_version(owner):
+                self._forget(owner)
+                cached = None
+            if cached is not None:
+                fresh = {}
+                for service, username, password in entries:
+                    if (service, username) not in cached:
+                        fresh.setdefault((service, username), password)
+                entries = [(service, username, password) for (service, username), password in fresh.items()]
+
+            rows = [
+                (owner, service, username, cipher.encrypt(password, _associated_data(owner, service, username)))
+                for service, username, password in entries
+            ]
+            before = self._conn.total_changes
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO lockmind_vault (owner, service, username, password) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            added = self._conn.total_changes - before
+            if added:
+                self._bump(owner)
+
+            if cached is not None:
+                index = self._indexes.get(owner)
+                for _, service, username, encrypted in rows:
+                    cached[(service, username)] = encrypted
+                    if index is not None:
+                        index.add((service, username))
+            return added
+
+    def iter_passwords(self, owner: str, cipher, batch_size: int = 500):
+        """Stream an owner's entries with decrypted passwords, ordered by service and username.
+
+        Rows are read from the database in pages of batch_size, so memory use
+        does not grow with the size of the vault.
+
+        Yields:
+            (service, username, password); password is None for entries
+            encrypted under another key
+        """
+
+        after = ("", "")
+        while True:
+            with self._lock:
+                rows = self._conn.execute(
+                    """
+                    SELECT service, username, password FROM lockmind_vault
+                    WHERE owner = ? AND (service, username) > (?, ?)
+                    ORDER BY service, username
+                    LIMIT ?
+                    """,
+                    (owner, *after, batch_size),
+                ).fetchall()
+            if not rows:
+                return
+
+            for service, username, stored in rows:
+                if isinstance(stored, str):
+                    yield service, username, stored
+                    continue
+                try:
+                    yield service, username, cipher.decrypt(stored, _associated_data(owner, service, username))
+                except ValueError:
+                    yield service, username, None
+            after = (rows[-1]["service"], rows[-1]["username"])
+
+    def remove(self, owner: str, service: str, username: str) -> bool:
+        """Remove an entry.
+
+        Returns:
+            False if the entry does not exist
+        """
+
+        with self._lock, self._conn:
+            entries = self._begin(owner)
+            if (service, username) not in entries:
+                return False
+
+            self._conn.execute(
+                "DELETE FROM lockmind_vault WHERE owner = ? AND service = ? AND username = ?",
+                (owner, service, username),
+            )
+            self._bump(owner)
+            del entries[(service, username)]
+            if owner in self._indexes:
+                self._indexes[owner].remove((service, username))
+            return True
+
+    def count(self, owner: str) -> int:
+        """Number of entries an owner has."""
+
+        with self._lock:
+            return len(self._load(owner))
+
+    def encrypt_plaintext(self, owner: str, cipher) -> int:
+        """Encrypt an owner's entries stored before vault encryption, once per owner.
+
+        Returns:
+            Number of entries encrypted
+        """
+
+        with self._lock:
+            # Reloading entries changed elsewhere also clears the owner's flag
+            entries = self._load(owner)
+            if owner in self._encrypted_owners:
+                return 0
+
+            if not any(isinstance(stored, str) for stored in entries.values()):
+                self._encrypted_owners.add(owner)
+                return 0
+
+            with self._conn:
+                entries = self._begin(owner)
+                upgraded = {
+                    key: cipher.encrypt(stored, _associated_data(owner, *key))
+                    for key, stored in entries.items() if isinstance(stored, str)
+                }
+                if upgraded:
+                    self._conn.executemany(
+                        "UPDATE lockmind_vault SET password = ? WHERE owner = ? AND service = ? AND username = ?",
+                        ((encrypted, owner, service, username) for (service, username), encrypted in upgraded.items()),
+                    )
+                    self._bump(owner)
+                    entries.update(upgraded)
+            self._encrypted_owners.add(owner)
+            return len(upgraded)
+
+    def version(self, owner: str) -> int:
+        """Version of an owner's entries, bumped by every change from any process."""
+
+        with self._lock:
+            self._load(owner)
+            return self._versions[owner]
+
+    def _stored_version(self, owner: str) -> int:
+        # Caller holds the lock
+        row = self._conn.execute("SELECT version FROM lockmind_vault_versions WHERE owner = ?", (owner,)).fetchone()
+        return row[0] if row else 0
+
+    def _begin(self, owner: str) -> dict:
+        # Caller holds the lock and commits. Takes the write lock before checking
+        # the version, so no other process can change the entries until commit
+        self._conn.execute("BEGIN IMMEDIATE")
+        return self._load(owner)
+
+    def _bump(self, owner: str) -> None:
+        # Caller holds the lock, inside the change's transaction
+        self._versions[owner] = self._conn.execute(
+            """
+            INSERT INTO lockmind_vault_versions (owner, version) VALUES (?, 1)
+            ON CONFLICT (owner) DO UPDATE SET version = version + 1
+            RETURNING version
+            """,
+            (owner,),
+        ).fetchone()[0]
+
+    def _forget(self, owner: str) -> None:
+        # Caller holds the lock
+        self._entries.pop(owner, None)
+        self._indexes.pop(owner, None)
+        self._encrypted_owners.discard(owner)
+
+    def _load(self, owner: str) -> dict:
+        # Caller holds the lock
+        version = self._stored_version(owner)
+        entries = self._entries.get(owner)
+        if entries is not None and self._versions.get(owner) == version:
+            return entries
+
+        # Not loaded yet, or changed by another process since
+        self._forget(owner)
+
+        rows = self._conn.execute(
+            "SELECT service, username, password FROM lockmind_vault WHERE owner = ?", (owner,)
+        ).fetchall()
+        entries = {(row["service"], row["username"]): row["password"] for row in rows}
+
+        self._entries[owner] = entries
+        self._versions[owner] = version
+        return entries
+
+
+@functools.lru_cache(maxsize=None)
+def get_vault() -> Vault:
+    """Shared vault for the password tools, opened on first use."""
+
+    return Vault()
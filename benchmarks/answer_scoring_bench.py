@@ -0,0 +1,107 @@
+"""Accuracy on a typo corpus and per-verification latency of the answer scoring engine.
+
+Accuracy compares the engine with the previous substring check on pairs of
+(stored answer, given answer, should match). Latency is measured for one
+verification against a profile with dozens of questions.
+
+Usage:
+    python benchmarks/answer_scoring_bench.py [--questions 48] [--iterations 2000]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Agency.workers.auth_manager.answer_scoring import MATCH_THRESHOLD, AnswerProfile
+
+SPRAY = "red blue green paris london tunis rex max smith pizza"
+
+# (stored answer, given answer, should match)
+CORPUS = [
+    # Typos, casing, accents and punctuation
+    ("Blue", "blue", True),
+    ("Tunis", "Tunsi", True),
+    ("Esperance Sportive de Tunis", "esperance sportive de tunis", True),
+    ("Rex", "rex!", True),
+    ("Saint-Étienne", "saint etienne", True),
+    ("Margherita pizza", "margarita pizza", True),
+    ("Elementary School No. 5", "elementary school no 5", True),
+    ("The Godfather", "Godfather", True),
+    ("Barcelona", "Barcleona", True),
+    ("Kuala Lumpur", "kuala lumpor", True),
+    ("Mohamed", "Mohammed", True),
+    ("Manchester United", "United Manchester", True),
+    # Partial answers
+    ("dark blue", "blue", True),
+    ("New York City", "new york city", True),
+    ("Bora Bora, French Polynesia", "bora bora", True),
+    (27, "27", True),
+    # Answers that must not match
+    ("Blue", "", False),
+    ("Blue", "   ", False),
+    ("Blue", "red", False),
+    ("Tunis", "Paris", False),
+    ("Rex", "Max", False),
+    ("Esperance", "Club Africain", False),
+    ("27", "72", False),
+    ("Sushi", "s", False),
+    ("Margherita pizza", "pasta", False),
+    ("Barcelona", "Madrid", False),
+    ("Smith", "Smithers-Jones", False),
+    ("Inception", "Interstellar", False),
+    # One bag of likely answers sprayed at every question
+    ("Blue", SPRAY, False),
+    ("Tunis", SPRAY, False),
+    ("Rex", SPRAY, False),
+    ("Smith", SPRAY, False),
+    ("dark blue", "dark blue red green", False),
+    ("Rex", "rex max", False),
+]
+
+
+def legacy_match(stored, given) -> bool:
+    user_answer = str(given).lower().strip()
+    stored_answer = str(stored).lower().strip()
+    return user_answer == stored_answer or user_answer in stored_answer or stored_answer in user_answer
+
+
+def engine_match(stored, given) -> bool:
+    profile = AnswerProfile({"question": stored})
+    return profile.score({"question": given})["question"] >= MATCH_THRESHOLD
+
+
+def accuracy(matcher) -> tuple:
+    wrong = [(stored, given) for stored, given, expected in CORPUS if matcher(stored, given) != expected]
+    return 1 - len(wrong) / len(CORPUS), wrong
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--questions", type=int, default=48)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    for name, matcher in (("substring (previous)", legacy_match), ("scoring engine", engine_match)):
+        score, wrong = accuracy(matcher)
+        print(f"{name:<21} accuracy {score:6.1%}  misclassified: {wrong}")
+
+    # Every question answered with the same bag of words must not verify
+    spray = AnswerProfile({"color": "Blue", "city": "Tunis", "pet": "Rex", "maiden name": "Smith"})
+    print(f"sprayed answers: {spray.confidence({question: SPRAY for question in spray.answers}):.0f}% confidence")
+
+    stored = {f"question_{i}": f"{CORPUS[i % len(CORPUS)][0]} {i}" for i in range(args.questions)}
+    answers = {f"Question {i}": f"{CORPUS[i % len(CORPUS)][1]} {i}" for i in range(args.questions)}
+    profile = AnswerProfile(stored)
+
+    start = time.perf_counter()
+    for _ in range(args.iterations):
+        profile.confidence(answers)
+    per_call = (time.perf_counter() - start) / args.iterations
+    print(f"{args.questions} questions: {per_call * 1e6:.0f} us per verification")
+
+
+if __name__ == "__main__":
+    main()
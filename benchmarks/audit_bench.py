@@ -0,0 +1,87 @@
+"""Cost of audit logging to the caller and time-range query latency.
+
+Compares the per-record latency a tool call sees with the background writer
+(record() only queues) against committing each record synchronously, then
+queries one-minute windows out of a log of --rows records.
+
+Usage:
+    python benchmarks/audit_bench.py [--records 2000] [--rows 1000000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Agency import storage
+from Agency.audit import SCHEMA, AuditLog
+
+
+def synchronous(path: str, records: int) -> float:
+    conn = storage.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=FULL")
+    conn.executescript(SCHEMA)
+    start = time.perf_counter()
+    for i in range(records):
+        with conn:
+            conn.execute(
+                "INSERT INTO lockmind_audit (timestamp, event, outcome, username) VALUES (?, ?, ?, ?)",
+                (time.time(), "login", "success", f"user{i}"),
+            )
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--records", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        sync_elapsed = synchronous(os.path.join(tmp, "sync.db"), args.records)
+
+        audit_log = AuditLog(os.path.join(tmp, "audit.db"))
+        start = time.perf_counter()
+        for i in range(args.records):
+            audit_log.record("login", "success", f"user{i}")
+        queued_elapsed = time.perf_counter() - start
+        audit_log.flush()
+        drained_elapsed = time.perf_counter() - start
+
+        print(f"{'writer':>12} {'us/record (caller)':>19} {'records/s (durable)':>20}")
+        print(f"{'synchronous':>12} {sync_elapsed / args.records * 1e6:>19.1f} {args.records / sync_elapsed:>20.0f}")
+        print(f"{'background':>12} {queued_elapsed / args.records * 1e6:>19.1f} {args.records / drained_elapsed:>20.0f}")
+
+        # Bulk-load a long history spread over 30 days, then query short windows
+        now = time.time()
+        span = 30 * 24 * 3600
+        conn = storage.connect(os.path.join(tmp, "audit.db"))
+        with conn:
+            conn.executemany(
+                "INSERT INTO lockmind_audit (timestamp, event, outcome, username) VALUES (?, ?, ?, ?)",
+                ((now - random.random() * span, "vault.list", "success", f"user{i % 1000}") for i in range(args.rows)),
+            )
+        conn.close()
+
+        queries = 200
+        found = 0
+        start = time.perf_counter()
+        for _ in range(queries):
+            window_start = now - random.random() * span
+            found += len(audit_log.query(window_start, window_start + 60))
+        elapsed = time.perf_counter() - start
+        print(f"\n{args.rows + args.records} records: one-minute range query {elapsed / queries * 1000:.2f} ms"
+              f" ({found / queries:.0f} records per window)")
+
+        audit_log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Rows/sec and peak memory of streaming vault import and export.
+
+Writes CSV and JSON-lines files of --rows entries (5% duplicates, 1% invalid),
+imports each into an empty vault and exports it again, reporting rows/sec and
+the peak memory traced during each run. A one-add_password-call-per-row loop
+(what the conversational path does, minus the model) is timed for comparison.
+
+Usage:
+    python benchmarks/bulk_import_bench.py [--rows 5000 50000] [--batch-size 500]
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Agency.workers.auth_manager.keyring import EntryCipher
+from Agency.workers.passwords_manager import bulk
+from Agency.workers.passwords_manager.vault import Vault
+
+OWNER = "bench-user"
+CIPHER = EntryCipher(os.urandom(32))
+
+
+def generate(rows: int):
+    for i in range(rows):
+        if i % 100 == 99:
+            yield {"service": f"service{i}", "username": "", "password": "x"}
+        elif i % 20 == 19:
+            yield {"service": f"service{i - 1}", "username": "me", "password": "duplicate"}
+        else:
+            yield {"service": f"service{i}", "username": "me", "password": f"secret-{i}"}
+
+
+def write_file(path: str, fmt: str, rows: int) -> None:
+    with open(path, "w", newline="", encoding="utf-8") as out:
+        if fmt == "csv":
+            writer = csv.DictWriter(out, fieldnames=("service", "username", "password"))
+            writer.writeheader()
+            writer.writerows(generate(rows))
+        else:
+            for row in generate(rows):
+                out.write(json.dumps(row) + "\n")
+
+
+def traced(fn):
+    tracemalloc.start()
+    try:
+        result = fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return result, peak
+
+
+def per_row_baseline(path: str, rows: int) -> float:
+    vault = Vault(path)
+    vault.count(OWNER)
+    start = time.perf_counter()
+    for row in generate(rows):
+        try:
+            vault.add(OWNER, *bulk.normalize_entry(row), CIPHER)
+        except ValueError:
+            pass
+    return rows / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[5_000, 50_000])
+    parser.add_argument("--batch-size", type=int, default=bulk.BATCH_SIZE)
+    args = parser.parse_args()
+
+    print(f"{'rows':>7} {'format':>6} {'import rows/s':>14} {'peak KiB':>9} {'export rows/s':>14} {'peak KiB':>9}"
+          f" {'imported':>9} {'dups':>6} {'invalid':>8}")
+    for rows in args.rows:
+        for fmt in bulk.FORMATS:
+            with tempfile.TemporaryDirectory() as tmp:
+                source = os.path.join(tmp, f"entries.{fmt}")
+                write_file(source, fmt, rows)
+                vault = Vault(os.path.join(tmp, "vault.db"))
+
+                def run_import():
+                    with open(source, newline="", encoding="utf-8") as lines:
+                        return bulk.import_entries(vault, OWNER, bulk.read_rows(lines, fmt), CIPHER, args.batch_size)
+
+                def run_export():
+                    with open(os.path.join(tmp, f"export.{fmt}"), "w", newline="", encoding="utf-8") as out:
+                        return bulk.export_entries(vault, OWNER, out, fmt, CIPHER, args.batch_size)
+
+                imported, import_peak = traced(run_import)
+                exported, export_peak = traced(run_export)
+                assert exported["exported"] == imported["imported"]
+                print(
+                    f"{rows:>7} {fmt:>6} {imported['rows_per_second']:>14.0f} {import_peak / 1024:>9.0f}"
+                    f" {exported['rows_per_second']:>14.0f} {export_peak / 1024:>9.0f}"
+                    f" {imported['imported']:>9} {imported['duplicates']:>6} {imported['invalid']:>8}"
+                )
+
+    baseline_rows = min(args.rows)
+    with tempfile.TemporaryDirectory() as tmp:
+        rate = per_row_baseline(os.path.join(tmp, "vault.db"), baseline_rows)
+    print(f"\none add per row (no model), {baseline_rows} rows: {rate:.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Cold start of main.py: process launch to first prompt, and to the first reply.
+
+Launches `python main.py` --runs times with the stub model and a fresh
+database. It times how long the "You:" prompt takes to appear, then sends
+one message and times how long its reply takes, counting from launch.
+It also runs `python -X importtime` on `import main` and on `import Agency`,
+and lists the slowest imports by cumulative time.
+
+Usage:
+    python benchmarks/cold_start_bench.py [--runs 5] [--top 8]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_until(process: subprocess.Popen, marker: bytes) -> None:
+    seen = b""
+    while marker not in seen:
+        byte = process.stdout.read(1)
+        if not byte:
+            raise RuntimeError(f"main.py exited before printing {marker!r}: {seen.decode(errors='replace')}")
+        seen += byte
+
+
+def launch(env: dict) -> tuple:
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-u", "main.py"], cwd=ROOT, env=env,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    try:
+        read_until(process, b"You: ")
+        prompt = time.perf_counter() - start
+
+        process.stdin.write(b"hello\n")
+        process.stdin.flush()
+        read_until(process, b"AI: ")
+        reply = time.perf_counter() - start
+
+        process.stdin.write(b"exit\n")
+        process.stdin.flush()
+        process.wait(timeout=60)
+    finally:
+        process.kill()
+    return prompt, reply
+
+
+def import_times(statement: str, env: dict, top: int) -> tuple:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", statement], cwd=ROOT, env=env,
+        capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), name))
+    # Nested imports are indented past the single space after the bar
+    total = sum(cumulative for cumulative, name in rows if not name.startswith("  "))
+    return total, sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            LOCKMIND_MODEL="stub",
+            LOCKMIND_DB_PATH=os.path.join(tmp, "lockmind.db"),
+            LOCKMIND_AUDIT_DB_PATH=os.path.join(tmp, "audit.db"),
+            LOCKMIND_HASH_TARGET_MS="20",
+        )
+
+        prompts, replies = [], []
+        for _ in range(args.runs):
+            prompt, reply = launch(env)
+            prompts.append(prompt)
+            replies.append(reply)
+        print(f"launch to first prompt: median {statistics.median(prompts) * 1000:.0f} ms")
+        print(f"launch to first reply:  median {statistics.median(replies) * 1000:.0f} ms")
+
+        for statement in ("import main", "import Agency"):
+            total, slowest = import_times(statement, env, args.top)
+            print(f"\n-X importtime, {statement}: {total / 1000:.0f} ms")
+            for cumulative, name in slowest:
+                print(f"  {cumulative / 1000:>8.1f} ms  {name.strip()}")
+
+
+if __name__ == "__main__":
+    main()
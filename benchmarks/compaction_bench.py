@@ -0,0 +1,94 @@
+"""Session load time and database size for a long-lived session, with and without compaction.
+
+Appends turns (user message, tool call, tool response, reply) to one session and,
+at each checkpoint, measures DatabaseSessionService.get_session and the database
+file size. The compacted run calls compact_all after every checkpoint, as the
+background task in main.py does on its interval, and checks that the loaded
+state still reflects every turn, since compaction only deletes events.
+
+Usage:
+    python benchmarks/compaction_bench.py [--turns 2000] [--checkpoint 250]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from Agency import compaction
+
+APP_NAME = "Lockmind"
+USER_ID = "bench-user"
+
+
+def append_turn(session_service, session, turn: int) -> None:
+    invocation_id = f"inv-{turn}"
+    parts = [
+        ("user", types.Part(text=f"message {turn} " + "x" * 200)),
+        ("Passwords_Manager", types.Part(function_call=types.FunctionCall(name="get_passwords", args={}))),
+        ("Passwords_Manager", types.Part(function_response=types.FunctionResponse(name="get_passwords", response={"count": turn}))),
+        ("Passwords_Manager", types.Part(text=f"reply {turn} " + "y" * 400)),
+    ]
+    for author, part in parts:
+        session_service.append_event(
+            session,
+            Event(
+                invocation_id=invocation_id,
+                author=author,
+                content=types.Content(role="user" if author == "user" else "model", parts=[part]),
+                actions=EventActions(state_delta={"authentication_attempts": turn % 3}),
+            ),
+        )
+
+
+def run(path: str, turns: int, checkpoint: int, compact: bool) -> list:
+    session_service = DatabaseSessionService(db_url=f"sqlite:///{path}")
+    session = session_service.create_session(app_name=APP_NAME, user_id=USER_ID, state={"validated": True})
+
+    rows = []
+    for turn in range(1, turns + 1):
+        append_turn(session_service, session, turn)
+        if turn % checkpoint:
+            continue
+
+        if compact:
+            compaction.compact_all(path, max_events=compaction.KEEP_INVOCATIONS * 4)
+
+        start = time.perf_counter()
+        loaded = session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session.id)
+        # The state lives in the session row, not in the deleted events
+        assert loaded.state == {"validated": True, "authentication_attempts": turn % 3}, loaded.state
+        rows.append((turn, len(loaded.events), time.perf_counter() - start, os.path.getsize(path)))
+        session = loaded
+
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--checkpoint", type=int, default=250)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        plain = run(os.path.join(tmp, "plain.db"), args.turns, args.checkpoint, compact=False)
+        compacted = run(os.path.join(tmp, "compacted.db"), args.turns, args.checkpoint, compact=True)
+
+    print(f"{'turns':>6} | {'events':>7} {'load ms':>8} {'db KiB':>8} | {'events':>7} {'load ms':>8} {'db KiB':>8}")
+    print(f"{'':>6} | {'without compaction':^25} | {'with compaction':^25}")
+    for (turn, events, load, size), (_, c_events, c_load, c_size) in zip(plain, compacted):
+        print(
+            f"{turn:>6} | {events:>7} {load * 1000:>8.1f} {size / 1024:>8.0f} | "
+            f"{c_events:>7} {c_load * 1000:>8.1f} {c_size / 1024:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""Login throughput of the scrypt password hasher against its cost setting.
+
+Runs bursts of concurrent verify_async calls for each scrypt cost (n) and reports
+logins/sec, per-login latency and the longest event loop stall seen meanwhile.
+
+Usage:
+    python benchmarks/hashing_bench.py [--costs 12 13 14 15 16] [--logins 64] [--workers 4]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Agency.workers.auth_manager.hashing import PasswordHasher
+
+
+async def watch_loop(stop: asyncio.Event, interval: float = 0.005) -> float:
+    # Longest gap between ticks beyond the expected interval
+    worst = 0.0
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(interval)
+        now = time.perf_counter()
+        worst = max(worst, now - last - interval)
+        last = now
+    return worst
+
+
+async def burst(hasher: PasswordHasher, encoded: str, logins: int) -> tuple:
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(hasher.verify_async("correct horse", encoded) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    stall = await watcher
+    assert all(results)
+    return elapsed, stall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--costs", type=int, nargs="+", default=[12, 13, 14, 15, 16], help="log2 of scrypt n")
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    calibrated = PasswordHasher.calibrate()
+    print(f"calibrated cost for this machine: n=2^{calibrated.n.bit_length() - 1}")
+
+    print(f"{'n':>6} {'ms/login':>9} {'logins/s':>9} {'max loop stall (ms)':>20}")
+    for cost in args.costs:
+        hasher = PasswordHasher(n=2 ** cost, max_workers=args.workers)
+        encoded = hasher.hash("correct horse")
+
+        start = time.perf_counter()
+        hasher.verify("correct horse", encoded)
+        single = time.perf_counter() - start
+
+        elapsed, stall = asyncio.run(burst(hasher, encoded, args.logins))
+        print(f"{'2^' + str(cost):>6} {single * 1000:>9.1f} {args.logins / elapsed:>9.1f} {stall * 1000:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
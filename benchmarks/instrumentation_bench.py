@@ -0,0 +1,126 @@
+"""Overhead of the instrumentation layer, and the span breakdown it gives for the conversation scripts.
+
+First times a trivial sync and async tool called directly, through the timed()
+wrapper, and inside a disabled span() (as router commands are). Then replays
+the scripts in benchmarks/scripts (see pipeline_bench.py) with
+instrumentation off and on, reporting the wall time per run of each and the
+span summary printed at exit (whose model and session totals also
+cover the uninstrumented runs).
+
+Usage:
+    python benchmarks/instrumentation_bench.py [--calls 200000] [--repeat 5] [--model-latency-ms 0]
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pipeline_bench import APP_NAME, SCRIPTS_DIR, run_script  # noqa: E402
+
+
+def tool(service_name: str) -> dict:
+    return {"status": "success"}
+
+
+async def async_tool(service_name: str) -> dict:
+    return {"status": "success"}
+
+
+def per_call_ns(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn("github")
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+async def per_await_ns(fn, calls: int) -> float:
+    start = time.perf_counter()
+    for _ in range(calls):
+        await fn("github")
+    return (time.perf_counter() - start) / calls * 1e9
+
+
+def micro(calls: int) -> None:
+    from Agency import instrumentation
+
+    def in_disabled_span(service_name):
+        with instrumentation.span("command", "tool"):
+            return tool(service_name)
+
+    instrumentation.ENABLED = False
+    rows = [
+        ("sync tool", per_call_ns(tool, calls)),
+        ("sync tool, disabled span()", per_call_ns(in_disabled_span, calls)),
+        ("sync tool, timed()", per_call_ns(instrumentation.timed("tool")(tool), calls)),
+        ("async tool", asyncio.run(per_await_ns(async_tool, calls))),
+        ("async tool, timed()", asyncio.run(per_await_ns(instrumentation.timed("tool")(async_tool), calls))),
+    ]
+    print(f"{'call':<30} {'ns/call':>8}")
+    for name, ns in rows:
+        print(f"{name:<30} {ns:>8.0f}")
+    instrumentation.spans.clear()
+
+
+async def replay_all(scripts: list, runner, agents: dict, repeat: int, latency_ms: float) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for script in scripts:
+            await run_script(script, runner, agents, defaultdict(float), latency_ms)
+    return (time.perf_counter() - start) / repeat
+
+
+async def pipeline(args) -> None:
+    from google.adk.runners import Runner
+
+    from Agency import LockmindAgent, instrumentation
+    from Agency.session_store import PooledDatabaseSessionService
+
+    agents = {agent.name: agent for agent in LockmindAgent.sub_agents}
+    runner = Runner(
+        agent=LockmindAgent,
+        app_name=APP_NAME,
+        session_service=PooledDatabaseSessionService(f"sqlite:///{os.environ['LOCKMIND_DB_PATH']}"),
+    )
+    scripts = [json.load(open(path)) for path in sorted(glob.glob(os.path.join(SCRIPTS_DIR, "*.json")))]
+
+    # One untimed pass warms up imports, the hasher and the database
+    await replay_all(scripts, runner, agents, 1, args.model_latency_ms)
+    off = await replay_all(scripts, runner, agents, args.repeat, args.model_latency_ms)
+
+    instrumentation.ENABLED = True
+    instrumentation.instrument_runner(runner)
+    on = await replay_all(scripts, runner, agents, args.repeat, args.model_latency_ms)
+
+    print(f"\nall scripts, ms per run: instrumentation off {off * 1000:.1f}, on {on * 1000:.1f}\n")
+    print(instrumentation.summary())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model-latency-ms", type=float, default=0)
+    parser.add_argument("--hash-target-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the Agency package builds its agents
+        os.environ["LOCKMIND_MODEL"] = "stub"
+        os.environ["LOCKMIND_DB_PATH"] = os.path.join(tmp, "instrumentation.db")
+        os.environ["LOCKMIND_AUDIT_DB_PATH"] = os.path.join(tmp, "audit.db")
+        os.environ["LOCKMIND_HASH_TARGET_MS"] = str(args.hash_target_ms)
+        micro(args.calls)
+        asyncio.run(pipeline(args))
+
+
+if __name__ == "__main__":
+    main()
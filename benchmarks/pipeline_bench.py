@@ -0,0 +1,171 @@
+"""Offline benchmark of the whole LockmindAgent pipeline with scripted model replies.
+
+Drives the conversation scripts in benchmarks/scripts through Runner and
+PooledDatabaseSessionService, with StubLlm replaying each agent's scripted tool calls
+and replies, and reports per-stage timings: model, tools, session service and
+everything else (runner, agent framework, Lockmind glue). Needs no network.
+
+Script format: {"name", "turns": [{"user": "...", "<agent name>": [steps]}]}
+where steps are StubLlm steps listed in call order. "{user}" in any string is
+replaced with a username unique to the run.
+
+Usage:
+    python benchmarks/pipeline_bench.py [scripts ...] [--repeat 5] [--model-latency-ms 0] [--hash-target-ms 20]
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+SCRIPTS_DIR = os.path.join(ROOT, "benchmarks", "scripts")
+APP_NAME = "Lockmind"
+
+
+def fill(value, user: str):
+    if isinstance(value, str):
+        return value.replace("{user}", user)
+    if isinstance(value, list):
+        return [fill(item, user) for item in value]
+    if isinstance(value, dict):
+        return {key: fill(item, user) for key, item in value.items()}
+    return value
+
+
+def timed_session_service(db_url: str, timings: dict):
+    from Agency.session_store import PooledDatabaseSessionService
+
+    class TimedSessionService(PooledDatabaseSessionService):
+        def create_session(self, **kwargs):
+            start = time.perf_counter()
+            try:
+                return super().create_session(**kwargs)
+            finally:
+                timings["session"] += time.perf_counter() - start
+
+        def get_session(self, **kwargs):
+            start = time.perf_counter()
+            try:
+                return super().get_session(**kwargs)
+            finally:
+                timings["session"] += time.perf_counter() - start
+
+        def append_event(self, session, event):
+            start = time.perf_counter()
+            try:
+                return super().append_event(session, event)
+            finally:
+                timings["session"] += time.perf_counter() - start
+
+    return TimedSessionService(db_url=db_url)
+
+
+def install_tool_timers(agents: list, timings: dict) -> None:
+    started = {}
+
+    def before_tool(tool, args, tool_context):
+        started[tool_context.function_call_id] = time.perf_counter()
+
+    def after_tool(tool, args, tool_context, tool_response):
+        timings["tools"] += time.perf_counter() - started.pop(tool_context.function_call_id)
+
+    for agent in agents:
+        agent.before_tool_callback = before_tool
+        agent.after_tool_callback = after_tool
+
+
+async def run_script(script: dict, runner, agents: dict, timings: dict, latency_ms: float) -> tuple:
+    from Agency.session_view import SessionStateView
+    from Agency.stub_model import StubLlm
+    from Agency.turns import handle_turn
+
+    user = f"bench_{uuid.uuid4().hex[:8]}"
+    turns = fill(script["turns"], user)
+
+    stubs = {name: StubLlm(latency_ms=latency_ms) for name in agents}
+    for turn in turns:
+        for name, stub in stubs.items():
+            stub.queue(turn.get(name, []))
+    for name, agent in agents.items():
+        agent.model = stubs[name]
+
+    session = runner.session_service.create_session(app_name=APP_NAME, user_id=user, state={"validated": False})
+    view = SessionStateView(runner.session_service, APP_NAME, user, session.id, state=session.state)
+
+    replies = 0
+    start = time.perf_counter()
+    for turn in turns:
+        async for _ in handle_turn(runner, view, APP_NAME, user, session.id, turn["user"]):
+            replies += 1
+    total = time.perf_counter() - start
+
+    timings["model"] += sum(stub.elapsed for stub in stubs.values())
+    leftover = sum(len(stub.script) for stub in stubs.values())
+    if leftover:
+        raise RuntimeError(f"{script['name']}: {leftover} scripted step(s) were never used")
+
+    return total, replies
+
+
+async def run(args) -> None:
+    from google.adk.runners import Runner
+
+    from Agency import LockmindAgent
+
+    agents = {agent.name: agent for agent in LockmindAgent.sub_agents}
+
+    paths = args.scripts or sorted(glob.glob(os.path.join(SCRIPTS_DIR, "*.json")))
+    scripts = [json.load(open(path)) for path in paths]
+
+    print(f"{'script':<22} {'turns':>5} {'total ms':>9} {'model':>8} {'tools':>8} {'session':>8} {'other':>8}")
+    for script in scripts:
+        timings = defaultdict(float)
+        runner = Runner(
+            agent=LockmindAgent,
+            app_name=APP_NAME,
+            session_service=timed_session_service(f"sqlite:///{os.environ['LOCKMIND_DB_PATH']}", timings),
+        )
+        install_tool_timers(agents.values(), timings)
+
+        total = 0.0
+        for _ in range(args.repeat):
+            elapsed, _ = await run_script(script, runner, agents, timings, args.model_latency_ms)
+            total += elapsed
+
+        per_run = {stage: value * 1000 / args.repeat for stage, value in timings.items()}
+        total_ms = total * 1000 / args.repeat
+        other = total_ms - per_run["model"] - per_run["tools"] - per_run["session"]
+        print(
+            f"{script['name']:<22} {len(script['turns']):>5} {total_ms:>9.1f} {per_run['model']:>8.1f} "
+            f"{per_run['tools']:>8.1f} {per_run['session']:>8.1f} {other:>8.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scripts", nargs="*", help="Script files (default: benchmarks/scripts/*.json)")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--model-latency-ms", type=float, default=0)
+    parser.add_argument("--hash-target-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the Agency package builds its agents
+        os.environ["LOCKMIND_MODEL"] = "stub"
+        os.environ["LOCKMIND_DB_PATH"] = os.path.join(tmp, "pipeline.db")
+        os.environ["LOCKMIND_AUDIT_DB_PATH"] = os.path.join(tmp, "audit.db")
+        os.environ["LOCKMIND_HASH_TARGET_MS"] = str(args.hash_target_ms)
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
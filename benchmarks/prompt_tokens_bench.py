@@ -0,0 +1,103 @@
+"""Prompt tokens per turn with and without prompt slimming, on the conversation scripts.
+
+Replays each script in benchmarks/scripts (see pipeline_bench.py) twice: with
+LOCKMIND_PROMPT_SLIMMING off (every AuthManager phase's instructions, every
+tool schema, the whole history) and on (the current phase's instructions and
+tools, history trimmed to LOCKMIND_HISTORY_TOKEN_BUDGET). Prints the estimated
+prompt tokens of each turn (all model calls, 4 characters per token) and the
+time spent in the model. The "full" baseline is already smaller than the
+original single AuthManager instruction (~450 tokens for all phases together
+against ~1470). --long N also replays the vault turns of signup_login_vault
+N times in one session, where history trimming kicks in.
+
+Usage:
+    python benchmarks/prompt_tokens_bench.py [scripts ...] [--long 10] [--model-latency-ms 0]
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import tempfile
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pipeline_bench import APP_NAME, SCRIPTS_DIR, run_script  # noqa: E402
+
+
+def long_script(turns: int) -> dict:
+    script = json.load(open(os.path.join(SCRIPTS_DIR, "signup_login_vault.json")))
+    setup, vault_turns = script["turns"][:2], script["turns"][2:]
+    return {"name": f"long_session_x{turns}", "turns": setup + vault_turns * turns}
+
+
+async def replay(script: dict, runner, agents: dict, slimming: bool, latency_ms: float) -> list:
+    from Agency import metrics, prompts
+
+    prompts.SLIMMING = slimming
+    first = len(metrics.recent_turns)
+    await run_script(script, runner, agents, defaultdict(float), latency_ms)
+    return list(metrics.recent_turns)[first:]
+
+
+async def run(args) -> None:
+    from google.adk.runners import Runner
+
+    from Agency import LockmindAgent
+    from Agency.session_store import PooledDatabaseSessionService
+
+    agents = {agent.name: agent for agent in LockmindAgent.sub_agents}
+    runner = Runner(
+        agent=LockmindAgent,
+        app_name=APP_NAME,
+        session_service=PooledDatabaseSessionService(f"sqlite:///{os.environ['LOCKMIND_DB_PATH']}"),
+    )
+
+    paths = args.scripts or sorted(glob.glob(os.path.join(SCRIPTS_DIR, "*.json")))
+    scripts = [json.load(open(path)) for path in paths]
+    if args.long:
+        scripts.append(long_script(args.long))
+
+    for script in scripts:
+        full = await replay(script, runner, agents, False, args.model_latency_ms)
+        slim = await replay(script, runner, agents, True, args.model_latency_ms)
+
+        print(f"\n{script['name']}")
+        print(f"{'turn':>5} {'calls':>5} {'tokens: full':>13} {'slim':>6} {'saved':>6} {'trimmed':>8} {'model ms':>9}")
+        for number, (before, after) in enumerate(zip(full, slim), 1):
+            if len(script["turns"]) > 12 and 3 < number < len(script["turns"]) - 2:
+                continue
+            saved = 1 - after.prompt_tokens / before.prompt_tokens if before.prompt_tokens else 0.0
+            print(
+                f"{number:>5} {after.model_calls:>5} {before.prompt_tokens:>13} {after.prompt_tokens:>6}"
+                f" {saved:>6.0%} {after.history_tokens_dropped:>8} {after.model_seconds * 1000:>9.1f}"
+            )
+
+        before = sum(turn.prompt_tokens for turn in full)
+        after = sum(turn.prompt_tokens for turn in slim)
+        print(f"{'total':>5} {'':>5} {before:>13} {after:>6} {1 - after / before:>6.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scripts", nargs="*", help="Script files (default: benchmarks/scripts/*.json)")
+    parser.add_argument("--long", type=int, default=10, help="Vault turn repeats for the long session (0 to skip)")
+    parser.add_argument("--model-latency-ms", type=float, default=0)
+    parser.add_argument("--hash-target-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the Agency package builds its agents
+        os.environ["LOCKMIND_MODEL"] = "stub"
+        os.environ["LOCKMIND_DB_PATH"] = os.path.join(tmp, "prompt_tokens.db")
+        os.environ["LOCKMIND_AUDIT_DB_PATH"] = os.path.join(tmp, "audit.db")
+        os.environ["LOCKMIND_HASH_TARGET_MS"] = str(args.hash_target_ms)
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
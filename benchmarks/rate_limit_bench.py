@@ -0,0 +1,99 @@
+"""Brute-force login flood against authenticate_user, with and without the rate limiter.
+
+Fires attempts with wrong passwords at one account from a few sessions and
+reports attempts/sec, how many attempts reached the password hasher and how
+long the event loop stalled. With the limiter, rejected attempts return before
+any database or hashing work.
+
+Usage:
+    python benchmarks/rate_limit_bench.py [--attempts 2000] [--sessions 4]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from google.adk.sessions.state import State
+
+from Agency.audit import AuditLog
+from Agency.workers.auth_manager import agent as auth_agent
+from Agency.workers.auth_manager.hashing import PasswordHasher
+from Agency.workers.auth_manager.rate_limit import LoginRateLimiter
+from Agency.workers.auth_manager.user_store import UserStore
+from hashing_bench import watch_loop
+
+
+class FakeToolContext:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        self.state = State(value={}, delta={})
+
+
+class CountingHasher(PasswordHasher):
+    verifications = 0
+
+    async def verify_async(self, password: str, encoded: str) -> bool:
+        CountingHasher.verifications += 1
+        return await super().verify_async(password, encoded)
+
+
+class NoLimit(LoginRateLimiter):
+    def check(self, username, session_id=None):
+        return 0.0
+
+
+async def flood(attempts: int, sessions: int) -> tuple:
+    contexts = [FakeToolContext(f"session-{i}") for i in range(sessions)]
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(
+        auth_agent.authenticate_user("victim", f"guess-{i}", contexts[i % sessions]) for i in range(attempts)
+    ))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    stall = await watcher
+    locked = sum(1 for result in results if result["status"] == "locked")
+    return elapsed, locked, stall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--attempts", type=int, default=2000)
+    parser.add_argument("--sessions", type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = UserStore(os.path.join(tmp, "users.db"))
+        hasher = CountingHasher()
+        store.create("victim", hasher.hash("the real one"), {"favorite_color": "blue"}, "victim@example.com")
+
+        # Point the tool's shared singletons at the benchmark's instances
+        auth_agent.get_user_store = lambda: store
+        auth_agent.get_hasher = lambda: hasher
+        audit_log = AuditLog(os.path.join(tmp, "audit.db"))
+        auth_agent.get_audit_log = lambda: audit_log
+
+        print(f"{'limiter':>8} {'attempts/s':>11} {'hashed':>7} {'rejected':>9} {'max loop stall (ms)':>20}")
+        for name, limiter in (("off", NoLimit()), ("on", LoginRateLimiter())):
+            auth_agent.get_rate_limiter = lambda limiter=limiter: limiter
+            CountingHasher.verifications = 0
+            # Start each run unlocked: the persisted lockout would reject every attempt
+            store.update("victim", failed_attempts=0, account_locked=False, locked_until=None)
+            elapsed, locked, stall = asyncio.run(flood(args.attempts, args.sessions))
+            print(
+                f"{name:>8} {args.attempts / elapsed:>11.0f} {CountingHasher.verifications:>7}"
+                f" {locked:>9} {stall * 1000:>20.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
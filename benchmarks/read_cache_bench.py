@@ -0,0 +1,128 @@
+"""Cost of repeated vault reads in one turn, with and without the per-session read cache.
+
+Fills a vault with --sizes entries and replays turns in which the model calls
+check_authentication_status, get_passwords --lists times and
+search_passwords --searches times (the same query), as it often does. Reports
+the time per turn and the hit/miss counts with the cache on and off
+(LOCKMIND_READ_CACHE_SESSIONS=0). Then checks that a cached listing is never
+served stale: after add_password and remove_password it must show the change,
+after an import by another process (as vault_io.py does) it must show the
+imported entry, and after logout_user the session must be refused.
+
+Usage:
+    python benchmarks/read_cache_bench.py [--sizes 10 100 1000] [--turns 200] [--lists 3] [--searches 2]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+OWNER = "bench-user"
+
+
+# Adds one entry to an owner's vault from a separate process
+IMPORT_SCRIPT = """
+import sys
+from Agency.workers.auth_manager.keyring import EntryCipher
+from Agency.workers.passwords_manager.vault import get_vault
+get_vault().add_many(sys.argv[1], [("imported-service", "me", "secret")], EntryCipher(bytes(32)))
+"""
+
+
+def unlock(owner: str, size: int) -> str:
+    from Agency.workers.auth_manager.keyring import EntryCipher, get_key_cache
+    from Agency.workers.passwords_manager.vault import get_vault
+
+    session_id = f"session-{owner}"
+    key = bytearray(os.urandom(32))
+    get_key_cache().put(session_id, owner, key)
+    get_vault().add_many(owner, [(f"service{i}", "me", f"secret-{i}") for i in range(size)], EntryCipher(key))
+    return session_id
+
+
+def turn(tool_context, args) -> None:
+    from Agency.workers.passwords_manager.agent import check_authentication_status, get_passwords, search_passwords
+
+    check_authentication_status(tool_context)
+    for _ in range(args.lists):
+        get_passwords(tool_context)
+    for _ in range(args.searches):
+        search_passwords("service4", tool_context)
+
+
+def measure(size: int, max_sessions: int, args) -> tuple:
+    from Agency.router import DirectToolContext
+    from Agency.workers.passwords_manager import read_cache
+
+    read_cache.MAX_SESSIONS = max_sessions
+    read_cache.get_read_cache.cache_clear()
+
+    owner = f"{OWNER}-{size}-{max_sessions}"
+    session_id = unlock(owner, size)
+    state = {"validated": True, "current_user": owner}
+    turn(DirectToolContext(state, session_id=session_id), args)
+
+    start = time.perf_counter()
+    for _ in range(args.turns):
+        turn(DirectToolContext(state, session_id=session_id), args)
+    elapsed = time.perf_counter() - start
+    return elapsed / args.turns, read_cache.get_read_cache().stats()
+
+
+def check_fresh(size: int) -> None:
+    from Agency.router import DirectToolContext
+    from Agency.workers.auth_manager.agent import logout_user
+    from Agency.workers.passwords_manager.agent import add_password, get_passwords, remove_password
+    from Agency.workers.passwords_manager.read_cache import get_read_cache
+
+    owner = f"{OWNER}-{size}-fresh"
+    session_id = unlock(owner, size)
+    state = {"validated": True, "current_user": owner}
+    tool_context = DirectToolContext(state, session_id=session_id)
+
+    assert get_passwords(tool_context)["count"] == size
+    assert add_password("new-service", "me", "secret", tool_context)["status"] == "success"
+    assert get_passwords(tool_context)["count"] == size + 1, "stale listing after add_password"
+    assert remove_password("new-service", "me", tool_context)["status"] == "success"
+    assert get_passwords(tool_context)["count"] == size, "stale listing after remove_password"
+    subprocess.run([sys.executable, "-c", IMPORT_SCRIPT, owner], cwd=ROOT, check=True)
+    assert get_passwords(tool_context)["count"] == size + 1, "stale listing after an import by another process"
+
+    logout_user(tool_context)
+    assert get_passwords(tool_context)["status"] == "unauthorized", "listing served after logout_user"
+    assert get_read_cache().stats()["hits"] > 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--lists", type=int, default=3)
+    parser.add_argument("--searches", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the Agency package opens its stores
+        os.environ["LOCKMIND_DB_PATH"] = os.path.join(tmp, "lockmind.db")
+        os.environ["LOCKMIND_AUDIT_DB_PATH"] = os.path.join(tmp, "audit.db")
+
+        from Agency.workers.passwords_manager import read_cache
+
+        max_sessions = read_cache.MAX_SESSIONS
+        print(f"{'vault size':>10} {'cache':>6} {'us/turn':>9} {'hits':>6} {'misses':>7}")
+        for size in args.sizes:
+            for cached in (False, True):
+                per_turn, stats = measure(size, max_sessions if cached else 0, args)
+                print(f"{size:>10} {'on' if cached else 'off':>6} {per_turn * 1e6:>9.1f} {stats['hits']:>6} {stats['misses']:>7}")
+            check_fresh(size)
+        print("\nNo stale reads after add_password, remove_password, an out-of-process import or logout_user.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Tool result size and latency of search_passwords against listing the whole vault.
+
+For vaults of 100 to 100k entries, compares what the model receives when it
+looks for one entry: the full list with passwords (the original get_passwords),
+the metadata-only list (get_passwords now) and the top-5 search result.
+Tokens are estimated at 4 characters per token of the JSON tool result.
+Also reports the one-off index build on an owner's first search and the
+cost of keeping the index up to date on add/remove.
+
+Usage:
+    python benchmarks/search_bench.py [--sizes 100 1000 10000 100000] [--queries 200]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Agency.workers.auth_manager.keyring import EntryCipher
+from Agency.workers.passwords_manager.vault import Vault
+
+OWNER = "bench-user"
+CIPHER = EntryCipher(os.urandom(32))
+WORDS = ["github", "gitlab", "google", "netflix", "bank", "amazon", "spotify", "slack", "dropbox", "paypal",
+         "twitter", "linkedin", "reddit", "steam", "apple", "microsoft", "zoom", "notion", "figma", "stripe"]
+
+
+def tokens(result: dict) -> int:
+    return len(json.dumps(result)) // 4
+
+
+def typo(word: str) -> str:
+    i = random.randrange(len(word) - 1)
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'tokens: full':>13} {'list':>8} {'search':>7} {'ms: list':>9} {'search':>7}"
+          f" {'fuzzy':>7} {'index build ms':>15} {'add/remove us':>14}")
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            vault = Vault(os.path.join(tmp, "vault.db"))
+            entries = [(f"{WORDS[i % len(WORDS)]} {i}", f"user{i}@example.com", f"secret-{i:08d}") for i in range(size)]
+            for start in range(0, size, 1000):
+                vault.add_many(OWNER, entries[start:start + 1000], CIPHER)
+
+            vault.count(OWNER)
+            build_start = time.perf_counter()
+            vault.search(OWNER, "warm up")
+            build = time.perf_counter() - build_start
+
+            full = {"status": "success", "passwords": [
+                {"service": service, "username": username, "password": password} for service, username, password in entries
+            ], "count": size}
+
+            start = time.perf_counter()
+            for _ in range(args.queries):
+                listed = vault.list(OWNER)
+                json.dumps(listed)
+            list_ms = (time.perf_counter() - start) / args.queries * 1000
+
+            prefixes = [f"{random.choice(WORDS)} {random.randrange(size)}" for _ in range(args.queries)]
+            start = time.perf_counter()
+            for query in prefixes:
+                matches = vault.search(OWNER, query)
+            search_ms = (time.perf_counter() - start) / args.queries * 1000
+
+            misspelled = [typo(random.choice(WORDS)) for _ in range(args.queries)]
+            start = time.perf_counter()
+            for query in misspelled:
+                vault.search(OWNER, query)
+            fuzzy_ms = (time.perf_counter() - start) / args.queries * 1000
+
+            index = vault._indexes[OWNER]
+            start = time.perf_counter()
+            for i in range(args.queries):
+                index.add((f"extra {i}", "me"))
+                index.remove((f"extra {i}", "me"))
+            update_us = (time.perf_counter() - start) / (2 * args.queries) * 1e6
+
+            search_result = {"status": "success", "matches": matches, "count": len(matches)}
+            print(
+                f"{size:>8} {tokens(full):>13} {tokens({'passwords': listed}):>8} {tokens(search_result):>7}"
+                f" {list_ms:>9.2f} {search_ms:>7.3f} {fuzzy_ms:>7.3f} {build * 1000:>15.1f} {update_us:>14.1f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
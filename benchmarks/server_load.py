@@ -0,0 +1,84 @@
+"""Load generator for server.py: p50/p99 turn latency at increasing client counts.
+
+Starts the server in-process against StubLlm (no network) and a temporary
+database, then runs N concurrent clients that each send free-form messages.
+
+Usage:
+    python benchmarks/server_load.py [--clients 1 10 100] [--turns 5] [--model-latency-ms 50] [--max-concurrent-turns 8]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+async def client(port: int, user_id: str, turns: int, latencies: list) -> None:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"{user_id}\n".encode())
+    await reader.readline()
+
+    for i in range(turns):
+        start = time.perf_counter()
+        writer.write(f"hello, this is message {i}\n".encode())
+        await writer.drain()
+        while json.loads(await reader.readline())["type"] != "end":
+            pass
+        latencies.append(time.perf_counter() - start)
+
+    writer.close()
+
+
+def percentile(values: list, pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def run(args) -> None:
+    from server import build_server
+
+    lockmind_server = build_server(args.max_concurrent_turns)
+    server = await lockmind_server.serve("127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+
+    print(f"{'clients':>8} {'turns':>6} {'p50 (ms)':>9} {'p99 (ms)':>9} {'turns/s':>8}")
+    for clients in args.clients:
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(client(port, f"load-{clients}-{i}", args.turns, latencies) for i in range(clients)))
+        elapsed = time.perf_counter() - start
+        print(
+            f"{clients:>8} {len(latencies):>6} {percentile(latencies, 50) * 1000:>9.1f} "
+            f"{percentile(latencies, 99) * 1000:>9.1f} {len(latencies) / elapsed:>8.1f}"
+        )
+        assert statistics.mean(latencies) > 0
+
+    server.close()
+    await server.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--model-latency-ms", type=float, default=50)
+    parser.add_argument("--max-concurrent-turns", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the Agency package builds its agents
+        os.environ["LOCKMIND_MODEL"] = "stub"
+        os.environ["LOCKMIND_STUB_LATENCY_MS"] = str(args.model_latency_ms)
+        os.environ["LOCKMIND_DB_PATH"] = os.path.join(tmp, "load.db")
+        os.environ["LOCKMIND_AUDIT_DB_PATH"] = os.path.join(tmp, "audit.db")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Session write throughput and event loop stall, default vs pooled/tuned session service.
+
+Runs --users concurrent users on one event loop, each appending --events state
+delta events to its own session, the way turns do. "default" is ADK's
+DatabaseSessionService on its default SQLite settings, called on the event
+loop (as main.py did). "pooled" is PooledDatabaseSessionService (WAL, tuned
+pragmas, connection pool) with calls offloaded through session_store.run.
+Pass --db-url to run the pooled case against another database, e.g. a local
+PostgreSQL stand-in.
+
+Usage:
+    python benchmarks/session_store_bench.py [--users 1 8 32] [--events 50] [--db-url URL]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from Agency import session_store
+from hashing_bench import watch_loop
+
+APP_NAME = "Lockmind"
+
+
+def make_event(i: int) -> Event:
+    return Event(
+        invocation_id=f"inv-{i}",
+        author="Lockmind_Router",
+        content=types.Content(role="model", parts=[types.Part(text=f"reply {i}")]),
+        actions=EventActions(state_delta={"authentication_attempts": i}),
+    )
+
+
+async def user(session_service, user_id: str, events: int, offload: bool) -> None:
+    if offload:
+        session = await session_store.run(session_service.create_session, app_name=APP_NAME, user_id=user_id, state={})
+    else:
+        session = session_service.create_session(app_name=APP_NAME, user_id=user_id, state={})
+
+    for i in range(events):
+        if offload:
+            await session_store.run(session_service.append_event, session, make_event(i))
+        else:
+            session_service.append_event(session, make_event(i))
+        # Let other users' turns run in between, as real turns do
+        await asyncio.sleep(0)
+
+
+async def run(session_service, users: int, events: int, offload: bool) -> tuple:
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(session_service, f"user-{users}-{i}", events, offload) for i in range(users)))
+    elapsed = time.perf_counter() - start
+
+    stop.set()
+    stall = await watcher
+    return users * events / elapsed, stall
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--events", type=int, default=50)
+    parser.add_argument("--db-url", help="database for the pooled case (default: a temporary SQLite file)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        default = DatabaseSessionService(db_url=f"sqlite:///{os.path.join(tmp, 'default.db')}")
+        pooled = session_store.PooledDatabaseSessionService(args.db_url or f"sqlite:///{os.path.join(tmp, 'pooled.db')}")
+
+        print(f"{'users':>6} {'service':>8} {'events/s':>9} {'max loop stall (ms)':>20}")
+        for users in args.users:
+            for name, session_service, offload in (("default", default, False), ("pooled", pooled, True)):
+                rate, stall = asyncio.run(run(session_service, users, args.events, offload))
+                print(f"{users:>6} {name:>8} {rate:>9.0f} {stall * 1000:>20.1f}")
+
+
+if __name__ == "__main__":
+    main()
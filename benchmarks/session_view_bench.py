@@ -0,0 +1,80 @@
+"""Per-turn cost of checking "validated" while streaming, as a session grows.
+
+Compares the old main.py behaviour (one get_session per streamed event) with
+SessionStateView (state deltas applied in memory) on a DatabaseSessionService
+session that already holds N events of history.
+
+Usage:
+    python benchmarks/session_view_bench.py [--events-per-turn 8] [--sizes 100 1000 5000]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from Agency.session_view import SessionStateView
+
+APP_NAME = "Lockmind"
+USER_ID = "bench-user"
+
+
+def make_event(i: int) -> Event:
+    return Event(
+        invocation_id=f"inv-{i}",
+        author="Auth_Manager",
+        content=types.Content(role="model", parts=[types.Part(text=f"reply {i}")]),
+        actions=EventActions(state_delta={"validated": i % 2 == 0, "current_user": "alice"}),
+    )
+
+
+def grow_session(session_service, session, target: int) -> None:
+    while len(session.events) < target:
+        session_service.append_event(session, make_event(len(session.events)))
+
+
+def turn_old(session_service, session_id: str, turn_events: list) -> float:
+    start = time.perf_counter()
+    for _ in turn_events:
+        current_session = session_service.get_session(app_name=APP_NAME, user_id=USER_ID, session_id=session_id)
+        current_session.state.get("validated", False)
+    return time.perf_counter() - start
+
+
+def turn_view(session_service, session, turn_events: list) -> float:
+    start = time.perf_counter()
+    view = SessionStateView(session_service, APP_NAME, USER_ID, session.id, state=session.state)
+    for event in turn_events:
+        view.apply(event)
+        view.get("validated", False)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events-per-turn", type=int, default=8)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 5000])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        session_service = DatabaseSessionService(db_url=f"sqlite:///{tmp}/bench.db")
+        session = session_service.create_session(app_name=APP_NAME, user_id=USER_ID, state={"validated": False})
+        turn_events = [make_event(i) for i in range(args.events_per_turn)]
+
+        print(f"{'history':>8} {'get_session/turn (ms)':>22} {'view/turn (ms)':>15}")
+        for size in sorted(args.sizes):
+            grow_session(session_service, session, size)
+            old = turn_old(session_service, session.id, turn_events)
+            new = turn_view(session_service, session, turn_events)
+            print(f"{size:>8} {old * 1000:>22.2f} {new * 1000:>15.3f}")
+
+
+if __name__ == "__main__":
+    main()
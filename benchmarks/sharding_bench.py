@@ -0,0 +1,150 @@
+"""Turns/sec of server.py with users sharded across 1 to N worker processes.
+
+Launches `python server.py --workers N` for each --workers value with the stub
+model (no model latency by default, so turns are CPU-bound) and a fresh
+database, waits for it to listen, then runs --clients concurrent clients that
+each send --turns free-form messages. Reports turns/sec and the speedup over
+the first run. With --workers 1 the server runs turns in its own process;
+otherwise the front forwards each user to its worker. Scaling is bounded by
+the cores available (os.cpu_count() is printed).
+
+With more than one worker it also checks that an account stays consistent
+when two connections routed to different workers log into it: an entry added
+through one must be listed, and refused as a duplicate, through the other.
+
+Usage:
+    python benchmarks/sharding_bench.py [--workers 1 2 4] [--clients 32] [--turns 20] [--model-latency-ms 0]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from server_load import client, percentile  # noqa: E402
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+async def start_server(workers: int, env: dict) -> tuple:
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "server.py", "--port", "0", "--workers", str(workers), cwd=ROOT, env=env,
+        stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT, start_new_session=True,
+    )
+    while True:
+        line = (await process.stdout.readline()).decode()
+        if not line:
+            raise RuntimeError(f"server.py --workers {workers} exited before listening")
+        # Workers print the same line prefixed with their index
+        if line.startswith("Lockmind server listening on"):
+            return process, int(line.rsplit(":", 1)[1])
+
+
+async def drain(stream: asyncio.StreamReader) -> None:
+    while await stream.readline():
+        pass
+
+
+async def say(reader: asyncio.StreamReader, writer: asyncio.StreamWriter, line: str) -> str:
+    writer.write(f"{line}\n".encode())
+    await writer.drain()
+    replies = []
+    while (message := json.loads(await reader.readline()))["type"] != "end":
+        replies.append(message.get("text") or message.get("message", ""))
+    return "\n".join(replies)
+
+
+async def check_shared_account(port: int, workers: int) -> None:
+    from server import shard_for
+
+    # Two connection user ids that the front sends to different workers
+    first = "account-check-0"
+    second = next(f"account-check-{i}" for i in range(1, 100) if shard_for(f"account-check-{i}", workers) != shard_for(first, workers))
+
+    connections = []
+    for user_id in (first, second):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"{user_id}\n".encode())
+        await reader.readline()
+        assert "successful" in await say(reader, writer, "/login shared hunter2")
+        connections.append((reader, writer))
+
+    (first_reader, first_writer), (second_reader, second_writer) = connections
+    assert "don't have any" in await say(second_reader, second_writer, "/list")
+    assert "successfully" in await say(first_reader, first_writer, "/add github me first-secret")
+    assert "github: me" in await say(second_reader, second_writer, "/list"), "stale vault on the other worker"
+    assert "already exists" in await say(second_reader, second_writer, "/add github me second-secret")
+    for _, writer in connections:
+        writer.close()
+
+
+async def measure(workers: int, env: dict, args) -> tuple:
+    process, port = await start_server(workers, env)
+    draining = asyncio.create_task(drain(process.stdout))
+    try:
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(client(port, f"shard-{workers}-{i}", args.turns, latencies) for i in range(args.clients)))
+        elapsed = time.perf_counter() - start
+        if workers > 1:
+            await check_shared_account(port, workers)
+    finally:
+        process.send_signal(signal.SIGINT)
+        await process.wait()
+        await draining
+    return len(latencies) / elapsed, percentile(latencies, 50), percentile(latencies, 99)
+
+
+def create_account(env: dict) -> None:
+    # In its own process, so this one never opens the benchmark's stores
+    script = (
+        "import asyncio; from Agency.router import DirectToolContext; "
+        "from Agency.workers.auth_manager.agent import save_user_data; "
+        "asyncio.run(save_user_data('shared', 'hunter2', {'favorite_color': 'blue'}, DirectToolContext({})))"
+    )
+    subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env, check=True, capture_output=True)
+
+
+async def run(args) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            LOCKMIND_MODEL="stub",
+            LOCKMIND_STUB_LATENCY_MS=str(args.model_latency_ms),
+            LOCKMIND_DB_PATH=os.path.join(tmp, "sharding.db"),
+            LOCKMIND_AUDIT_DB_PATH=os.path.join(tmp, "audit.db"),
+            LOCKMIND_HASH_TARGET_MS="20",
+        )
+        create_account(env)
+
+        print(f"cpu count: {os.cpu_count()}")
+        print(f"{'workers':>8} {'turns/s':>8} {'speedup':>8} {'p50 (ms)':>9} {'p99 (ms)':>9}")
+        baseline = None
+        for workers in args.workers:
+            throughput, p50, p99 = await measure(workers, env, args)
+            baseline = baseline or throughput
+            print(f"{workers:>8} {throughput:>8.1f} {throughput / baseline:>7.2f}x {p50 * 1000:>9.1f} {p99 * 1000:>9.1f}")
+        if max(args.workers) > 1:
+            print("\nOne account over two workers: listings and duplicate checks stay consistent.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--model-latency-ms", type=float, default=0)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
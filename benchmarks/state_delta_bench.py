@@ -0,0 +1,111 @@
+"""Session database growth per 1,000 vault edits: whole-list state deltas vs per-change deltas.
+
+"full list" replays what the original tools did: the vault lived in
+state["passwords"] and every edit wrote the whole list into the event's
+state_delta. "per change" runs the current modify_password tool against the
+encrypted vault, so the event only carries the state keys that actually
+changed (none, for a vault edit). Both cases append one event per edit with
+the same short history text, as quick commands do, and report the session
+database growth (after a WAL checkpoint) and state_delta bytes per event.
+
+Usage:
+    python benchmarks/state_delta_bench.py [--sizes 10 100 1000] [--edits 1000]
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+APP_NAME = "Lockmind"
+OWNER = "bench-user"
+
+
+def db_size(path: str) -> int:
+    connection = sqlite3.connect(path)
+    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    connection.close()
+    return os.path.getsize(path)
+
+
+def edit_event(invocation: int, state_delta: dict):
+    from google.adk.events import Event, EventActions
+    from google.genai import types
+
+    return Event(
+        invocation_id=f"edit-{invocation}",
+        author="Lockmind_Router",
+        content=types.Content(role="model", parts=[types.Part(text="Password modified successfully for service 'github'.")]),
+        actions=EventActions(state_delta=state_delta),
+    )
+
+
+def full_list(tmp: str, size: int, edits: int) -> tuple:
+    from Agency.session_store import PooledDatabaseSessionService
+
+    path = os.path.join(tmp, f"full-{size}.db")
+    session_service = PooledDatabaseSessionService(f"sqlite:///{path}")
+    passwords = [{"service": f"service{i}", "username": "me", "password": f"secret-{i}"} for i in range(size)]
+    session = session_service.create_session(app_name=APP_NAME, user_id=OWNER, state={"validated": True, "passwords": passwords})
+
+    start = db_size(path)
+    delta_bytes = 0
+    for i in range(edits):
+        passwords[i % size]["password"] = f"changed-{i}"
+        state_delta = {"passwords": passwords}
+        delta_bytes += len(json.dumps(state_delta))
+        session_service.append_event(session, edit_event(i, state_delta))
+    return db_size(path) - start, delta_bytes / edits
+
+
+def per_change(tmp: str, size: int, edits: int) -> tuple:
+    from Agency.router import DirectToolContext
+    from Agency.session_store import PooledDatabaseSessionService
+    from Agency.workers.auth_manager.keyring import EntryCipher, get_key_cache
+    from Agency.workers.passwords_manager.agent import modify_password
+    from Agency.workers.passwords_manager.vault import get_vault
+
+    path = os.path.join(tmp, f"per-change-{size}.db")
+    session_service = PooledDatabaseSessionService(f"sqlite:///{path}")
+    owner = f"{OWNER}-{size}"
+    session = session_service.create_session(app_name=APP_NAME, user_id=owner, state={"validated": True, "current_user": owner})
+
+    key = bytearray(os.urandom(32))
+    get_key_cache().put(session.id, owner, key)
+    get_vault().add_many(owner, [(f"service{i}", "me", f"secret-{i}") for i in range(size)], EntryCipher(key))
+
+    start = db_size(path)
+    delta_bytes = 0
+    for i in range(edits):
+        tool_context = DirectToolContext(session.state, session_id=session.id)
+        result = modify_password(f"service{i % size}", "me", f"changed-{i}", tool_context)
+        assert result["status"] == "success", result
+        delta_bytes += len(json.dumps(tool_context.state_delta))
+        session_service.append_event(session, edit_event(i, tool_context.state_delta))
+    return db_size(path) - start, delta_bytes / edits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--edits", type=int, default=1000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the Agency package opens its stores
+        os.environ["LOCKMIND_DB_PATH"] = os.path.join(tmp, "lockmind.db")
+        os.environ["LOCKMIND_AUDIT_DB_PATH"] = os.path.join(tmp, "audit.db")
+
+        print(f"{'vault size':>10} {'state':>10} {'KiB per 1000 edits':>19} {'delta bytes/event':>18}")
+        for size in args.sizes:
+            for name, run in (("full list", full_list), ("per change", per_change)):
+                growth, delta_bytes = run(tmp, size, args.edits)
+                print(f"{size:>10} {name:>10} {growth / 1024 * 1000 / args.edits:>19.0f} {delta_bytes:>18.0f}")
+
+
+if __name__ == "__main__":
+    main()
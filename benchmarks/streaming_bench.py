@@ -0,0 +1,140 @@
+"""Time to first shown text, streaming vs whole messages, for long model replies.
+
+Replays a short conversation (an account creation explanation, a login and a
+vault request) through Runner and stream_turn with StubLlm replies of --words
+words taking --model-latency-ms each. With streaming off the user sees a reply
+once the model has finished it; with streaming on the stub sends it word by
+word, as Gemini does with SSE. Reports time to first shown text and to the end
+of the turn, and checks that the streamed text adds up to the whole messages.
+
+Usage:
+    python benchmarks/streaming_bench.py [--words 120] [--model-latency-ms 1500] [--repeat 3]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+APP_NAME = "Lockmind"
+
+
+def long_reply(topic: str, words: int) -> str:
+    return " ".join([f"{topic}:"] + [f"word{i}" for i in range(words - 1)])
+
+
+def conversation(user: str, words: int) -> list:
+    return [
+        ("How do I create an account?", {
+            "Auth_Manager": [{"text": long_reply("signup", words)}],
+        }),
+        (f"Log me in as {user}, my password is hunter2.", {
+            "Auth_Manager": [
+                {"call": "authenticate_user", "args": {"username": user, "password": "hunter2"}},
+                {"text": "You are logged in."},
+            ],
+            "Passwords_Manager": [{"text": long_reply("welcome", words)}],
+        }),
+        ("What can you do for me?", {
+            "Auth_Manager": [{"text": "You are already authenticated."}],
+            "Passwords_Manager": [{"text": long_reply("vault", words)}],
+        }),
+    ]
+
+
+async def replay(runner, agents: dict, streaming: bool, args) -> list:
+    from Agency.session_view import SessionStateView
+    from Agency.stub_model import StubLlm
+    from Agency.turns import stream_turn
+    from Agency.workers.auth_manager.agent import save_user_data
+    from Agency.router import DirectToolContext
+
+    user = f"bench_{uuid.uuid4().hex[:8]}"
+    await save_user_data(user, "hunter2", {"favorite_color": "blue"}, DirectToolContext({}))
+
+    turns = conversation(user, args.words)
+    stubs = {name: StubLlm(latency_ms=args.model_latency_ms) for name in agents}
+    for _, steps in turns:
+        for name, stub in stubs.items():
+            stub.queue(steps.get(name, []))
+    for name, agent in agents.items():
+        agent.model = stubs[name]
+
+    session = runner.session_service.create_session(app_name=APP_NAME, user_id=user, state={"validated": False})
+    view = SessionStateView(runner.session_service, APP_NAME, user, session.id, state=session.state)
+
+    results = []
+    for user_input, _ in turns:
+        chunks, messages = {}, {}
+        first = None
+        start = time.perf_counter()
+        async for author, text, partial in stream_turn(runner, view, APP_NAME, user, session.id, user_input, streaming=streaming):
+            if first is None:
+                first = time.perf_counter() - start
+            if partial:
+                chunks[author] = chunks.get(author, "") + text
+            else:
+                messages[author] = text
+        total = time.perf_counter() - start
+
+        for author, text in chunks.items():
+            assert messages.get(author, "").endswith(text), f"{author}: streamed text does not match the message"
+        results.append((user_input, first, total))
+    return results
+
+
+async def run(args) -> None:
+    from google.adk.runners import Runner
+
+    from Agency import LockmindAgent
+    from Agency.session_store import PooledDatabaseSessionService
+
+    agents = {agent.name: agent for agent in LockmindAgent.sub_agents}
+    runner = Runner(
+        agent=LockmindAgent,
+        app_name=APP_NAME,
+        session_service=PooledDatabaseSessionService(f"sqlite:///{os.environ['LOCKMIND_DB_PATH']}"),
+    )
+
+    timings = {}
+    for streaming in (False, True):
+        for _ in range(args.repeat):
+            for number, (user_input, first, total) in enumerate(await replay(runner, agents, streaming, args)):
+                entry = timings.setdefault((number, streaming), [user_input, 0.0, 0.0])
+                entry[1] += first / args.repeat
+                entry[2] += total / args.repeat
+
+    print(f"{'turn':<45} {'first text ms: whole':>21} {'streamed':>9} {'turn ms: whole':>15} {'streamed':>9}")
+    for number in range(len(timings) // 2):
+        user_input, whole_first, whole_total = timings[(number, False)]
+        _, streamed_first, streamed_total = timings[(number, True)]
+        print(
+            f"{user_input[:45]:<45} {whole_first * 1000:>21.0f} {streamed_first * 1000:>9.0f}"
+            f" {whole_total * 1000:>15.0f} {streamed_total * 1000:>9.0f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--words", type=int, default=120)
+    parser.add_argument("--model-latency-ms", type=float, default=1500)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--hash-target-ms", type=float, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Must be set before the Agency package builds its agents
+        os.environ["LOCKMIND_MODEL"] = "stub"
+        os.environ["LOCKMIND_DB_PATH"] = os.path.join(tmp, "streaming.db")
+        os.environ["LOCKMIND_AUDIT_DB_PATH"] = os.path.join(tmp, "audit.db")
+        os.environ["LOCKMIND_HASH_TARGET_MS"] = str(args.hash_target_ms)
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""Lookup latency of the user store by username and by email as it grows.
+
+Usage:
+    python benchmarks/user_store_bench.py [--sizes 1000 100000 1000000] [--lookups 20000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Agency.workers.auth_manager.user_store import UserStore
+
+BATCH_SIZE = 50_000
+
+
+def make_record(i: int) -> dict:
+    return {
+        "username": f"user{i}",
+        "email": f"user{i}@example.com",
+        "password": "x" * 32,
+        "personal_data": {"favorite_color": "blue", "birth_city": "Tunis", "first_pet_name": f"pet{i}"},
+        "created_at": "2025-01-01 00:00:00",
+        "failed_attempts": 0,
+        "account_locked": False,
+    }
+
+
+def fill(store: UserStore, start: int, stop: int) -> None:
+    for batch_start in range(start, stop, BATCH_SIZE):
+        store.put_many([make_record(i) for i in range(batch_start, min(batch_start + BATCH_SIZE, stop))])
+
+
+def time_lookups(lookup, keys: list) -> float:
+    start = time.perf_counter()
+    for key in keys:
+        lookup(key)
+    return (time.perf_counter() - start) / len(keys)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=20_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = UserStore(os.path.join(tmp, "users.db"))
+        accounts = 0
+
+        print(f"{'accounts':>10} {'by username (us)':>17} {'by email (us)':>14}")
+        for size in sorted(args.sizes):
+            fill(store, accounts, size)
+            accounts = size
+
+            ids = [random.randrange(accounts) for _ in range(args.lookups)]
+            by_username = time_lookups(store.get, [f"user{i}" for i in ids])
+            by_email = time_lookups(store.get_by_email, [f"user{i}@example.com" for i in ids])
+            print(f"{accounts:>10} {by_username * 1e6:>17.1f} {by_email * 1e6:>14.1f}")
+
+
+if __name__ == "__main__":
+    main()
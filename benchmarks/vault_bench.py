@@ -0,0 +1,84 @@
+"""Per-operation cost of vault add/modify/remove from 10 to 100k entries.
+
+Compares the previous session-state list (linear scan plus re-serializing the
+whole list on every change) with the keyed Vault, which writes one row per change.
+
+Usage:
+    python benchmarks/vault_bench.py [--sizes 10 100 1000 10000 100000] [--ops 200]
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Agency.workers.auth_manager.keyring import EntryCipher
+from Agency.workers.passwords_manager.vault import Vault
+
+OWNER = "bench-user"
+CIPHER = EntryCipher(os.urandom(32))
+
+
+def legacy_ops(size: int, ops: int) -> float:
+    passwords = [{"service": f"service{i}", "username": "me", "password": "secret"} for i in range(size)]
+    targets = [f"service{random.randrange(size)}" for _ in range(ops)]
+
+    start = time.perf_counter()
+    for service in targets:
+        # modify_password: linear scan, then the whole list goes back into state
+        for password in passwords:
+            if password["service"] == service and password["username"] == "me":
+                password["password"] = "changed"
+                break
+        json.dumps({"passwords": passwords})
+    return (time.perf_counter() - start) / ops
+
+
+def vault_ops(vault: Vault, size: int, ops: int) -> float:
+    targets = [f"service{random.randrange(size)}" for _ in range(ops)]
+
+    start = time.perf_counter()
+    for service in targets:
+        vault.modify(OWNER, service, "me", "changed", CIPHER)
+    return (time.perf_counter() - start) / ops
+
+
+def vault_add_remove(vault: Vault, ops: int) -> float:
+    start = time.perf_counter()
+    for i in range(ops):
+        vault.add(OWNER, f"extra{i}", "me", "secret", CIPHER)
+        vault.remove(OWNER, f"extra{i}", "me")
+    return (time.perf_counter() - start) / (2 * ops)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1_000, 10_000, 100_000])
+    parser.add_argument("--ops", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'entries':>8} {'list modify (ms)':>17} {'vault modify (ms)':>18} {'vault add/remove (ms)':>22}")
+    for size in sorted(args.sizes):
+        with tempfile.TemporaryDirectory() as tmp:
+            vault = Vault(os.path.join(tmp, "vault.db"))
+            with vault._conn:
+                vault._conn.executemany(
+                    "INSERT INTO lockmind_vault (owner, service, username, password) VALUES (?, ?, ?, ?)",
+                    ((OWNER, f"service{i}", "me", "secret") for i in range(size)),
+                )
+            # Load (and encrypt) the owner's entries once so the timings below are per operation
+            vault.encrypt_plaintext(OWNER, CIPHER)
+
+            legacy = legacy_ops(size, args.ops)
+            modify = vault_ops(vault, size, args.ops)
+            add_remove = vault_add_remove(vault, args.ops)
+            print(f"{size:>8} {legacy * 1000:>17.3f} {modify * 1000:>18.3f} {add_remove * 1000:>22.3f}")
+
+
+if __name__ == "__main__":
+    main()
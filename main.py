@@ -1,70 +1,125 @@
 import asyncio
+import os
 from dotenv import load_dotenv
-from google.adk.sessions import DatabaseSessionService
-from google.adk.runners import Runner
-from Agency import LockmindAgent
-from google.genai import types
 
+# Before the Agency imports: its settings are read from the environment at import time
 load_dotenv()
 
-db_url = "sqlite:///./my_agent_data.db"
-session_service = DatabaseSessionService(db_url=db_url)
+from Agency import compaction, instrumentation, metrics  # noqa: E402
+
+# Print model calls, prompt tokens and model time after every turn
+TURN_REPORT = os.environ.get("LOCKMIND_TURN_REPORT", "0") == "1"
 
 
 initial_state = {
-    "passwords": [],
     "validated": False,
     "current_user": None,
     "authentication_attempts": 0,
     "password_reset_in_progress": False,
 }
 
-async def main_async():
-    new_session = session_service.create_session(
-        app_name="Lockmind",
-        user_id="ThisIsMyId",
-        state=initial_state,
-    )
+
+class Lockmind:
+    """Runner, session and state view for the CLI user, built by start()."""
+
+    def __init__(self, runner, session_view, session_id: str, compaction_path: str):
+        self.runner = runner
+        self.session_view = session_view
+        self.session_id = session_id
+        self.compaction_path = compaction_path
+
+
+def start() -> Lockmind:
+    """Import ADK, build the agents and session service and open the session.
+
+    This takes seconds (ADK's imports alone dominate), so main_async runs it in a
+    thread while the first prompt is already waiting for input.
+    """
+
+    from google.adk.runners import Runner
+    from Agency import LockmindAgent, session_store
+    from Agency.session_view import SessionStateView
+    from Agency.workers.auth_manager.hashing import get_hasher
+
+    # Calibrate the password hashing cost before the first login needs it
+    get_hasher()
+
+    session_service = session_store.PooledDatabaseSessionService()
+    new_session = session_service.create_session(app_name="Lockmind", user_id="ThisIsMyId", state=initial_state)
 
     runner = Runner(
         agent=LockmindAgent,
         app_name="Lockmind",
         session_service=session_service,
     )
-    
+    # Time tools, agents, runner invocations and session-service calls (LOCKMIND_INSTRUMENT=1)
+    if instrumentation.ENABLED:
+        instrumentation.instrument_runner(runner)
+
+    # Track validated/current_user from event state deltas instead of
+    # reloading the session (and all of its events) for every event
+    session_view = SessionStateView(
+        session_service,
+        app_name="Lockmind",
+        user_id="ThisIsMyId",
+        session_id=new_session.id,
+        state=new_session.state,
+    )
+    return Lockmind(runner, session_view, new_session.id, session_store.sqlite_path(session_service.db_url))
+
+
+async def main_async():
+    starting = asyncio.create_task(asyncio.to_thread(start))
+    lockmind = None
+
     while True:
-        user_input = input("You: ")
+        # Read input off the event loop so background work keeps running
+        user_input = await asyncio.to_thread(input, "You: ")
 
         if user_input.lower() in ["exit", "quit"]:
+            print(f"Session summary: {metrics.summary()}")
+            if instrumentation.ENABLED:
+                print(instrumentation.summary())
+                print(f"Metrics written to {instrumentation.write_metrics_file()}")
             print("Ending conversation. Goodbye!")
             break
 
-        content = types.Content(role="user", parts=[types.Part(text=user_input)])
+        if lockmind is None:
+            lockmind = await starting
+            from Agency.turns import STREAMING, stream_turn
 
+            # Trim old events so long sessions stay cheap to load (SQLite only)
+            if lockmind.compaction_path:
+                compaction_task = asyncio.create_task(compaction.run_periodically(lockmind.compaction_path))
+
+        turns_before = metrics.totals["turns"]
+        # Author whose streamed reply is being printed (LOCKMIND_STREAMING=1)
+        streaming_author = None
         try:
-            async for event in runner.run_async(user_id="ThisIsMyId", session_id=new_session.id, new_message=content):
-                if event.content and event.content.parts and event.content.parts[0].text:
-                    current_session = session_service.get_session(
-                        app_name="Lockmind",
-                        user_id="ThisIsMyId",
-                        session_id=new_session.id
-                    )
-                    is_validated = current_session.state.get("validated", False)
-
-                    # Get agent name from event.author (as seen in other examples)
-                    agent_name = getattr(event, 'author', '') or ""
-
-                    # Check if this response is from PasswordsManager
-                    is_passwords_manager = "Passwords_Manager" in str(agent_name)
-
-                    # Only print PasswordsManager responses if user is authenticated
-                    if is_passwords_manager and not is_validated:
-                        continue
-
-                    print(f"AI: {event.content.parts[0].text}")
+            async for author, text, partial in stream_turn(
+                lockmind.runner, lockmind.session_view, "Lockmind", "ThisIsMyId", lockmind.session_id, user_input,
+                streaming=STREAMING,
+            ):
+                if partial:
+                    if streaming_author != author:
+                        print("AI: ", end="")
+                        streaming_author = author
+                    print(text, end="", flush=True)
+                elif streaming_author == author:
+                    # Already printed chunk by chunk; just end the line
+                    print()
+                    streaming_author = None
+                else:
+                    print(f"AI: {text}")
         except Exception as e:
+            if streaming_author is not None:
+                print()
             print(f"Error during agent run: {e}")
 
+        # Quick commands skip the model and record no turn
+        if TURN_REPORT and metrics.totals["turns"] > turns_before:
+            print(f"[{metrics.recent_turns[-1].report()}]")
+
 
 if __name__ == "__main__":
-    asyncio.run(main_async())
\ No newline at end of file
+    asyncio.run(main_async())
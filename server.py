@@ -0,0 +1,369 @@
+"""Concurrent multi-user Lockmind server over a JSON-lines TCP protocol.
+
+Protocol:
+    1. The client sends its user id as the first line.
+       The server answers {"type": "session", "session_id": ...}. Each
+       connection gets a new, logged-out session of its own; the user id is
+       not authenticated, so it never joins another connection's session.
+       The session's vault is locked when the connection closes.
+    2. Every following line is a user message. The server streams one
+       {"type": "message", "author": ..., "text": ...} line per reply as it
+       arrives, then {"type": "end"} once the turn is finished. With --stream,
+       each reply is preceded by {"type": "delta", "author": ..., "text": ...}
+       lines carrying its text as the model generates it; the "message" line
+       still holds the whole reply.
+       Failures are reported as {"type": "error", "message": ...} before "end".
+
+With --workers N the process is a front that starts N worker servers on
+local ports and forwards each connection, unchanged, to the worker chosen by
+a hash of its user id, so a connection's session stays in one worker process.
+Per-account state doesn't depend on that routing, since any connection can
+log into any account: workers reload an account's vault when another process
+changes it, and share the per-username login limits and lockouts through the
+database.
+
+Usage:
+    python server.py [--host 127.0.0.1] [--port 8765] [--max-concurrent-turns 8] [--stream] [--workers 1]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import zlib
+
+from dotenv import load_dotenv
+
+# Before the Agency imports: its settings are read from the environment at import time
+load_dotenv()
+
+from google.adk.runners import Runner  # noqa: E402
+
+from Agency import LockmindAgent, compaction, instrumentation, session_store  # noqa: E402
+from Agency.session_view import SessionStateView  # noqa: E402
+from Agency.turns import STREAMING, stream_turn  # noqa: E402
+from Agency.workers.auth_manager.hashing import get_hasher  # noqa: E402
+from Agency.workers.auth_manager.keyring import get_key_cache  # noqa: E402
+from Agency.workers.passwords_manager.read_cache import get_read_cache  # noqa: E402
+
+APP_NAME = "Lockmind"
+
+initial_state = {
+    "validated": False,
+    "current_user": None,
+    "authentication_attempts": 0,
+    "password_reset_in_progress": False,
+}
+
+
+class UserSession:
+    """One connection's session; never shared with another connection."""
+
+    def __init__(self, session_id: str, view: SessionStateView):
+        self.session_id = session_id
+        self.view = view
+
+
+class LockmindServer:
+    """Serves many users from one Runner, one session per connection."""
+
+    def __init__(self, runner: Runner, max_concurrent_turns: int = 8, streaming: bool = False):
+        self.runner = runner
+        self.streaming = streaming
+        self.model_slots = asyncio.Semaphore(max_concurrent_turns)
+        # Sessions are created one at a time: concurrent first creates race on the app's state row
+        self._creating = asyncio.Lock()
+
+    async def open_session(self, user_id: str) -> UserSession:
+        """A new session for a connection.
+
+        The user id line is not authenticated, so it never selects an existing
+        session: every connection starts logged out, with its own state and
+        vault key.
+        """
+
+        session_service = self.runner.session_service
+        async with self._creating:
+            session = await session_store.run(
+                session_service.create_session, app_name=APP_NAME, user_id=user_id, state=initial_state
+            )
+        view = SessionStateView(session_service, APP_NAME, user_id, session.id, state=session.state)
+        return UserSession(session.id, view)
+
+    def close_session(self, user_session: UserSession) -> None:
+        """Lock the vault of a connection's session once the connection is gone."""
+
+        get_key_cache().evict(user_session.session_id)
+        get_read_cache().evict(user_session.session_id)
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            user_id = (await reader.readline()).decode().strip()
+            if not user_id:
+                return
+
+            user_session = await self.open_session(user_id)
+            try:
+                await send(writer, {"type": "session", "session_id": user_session.session_id})
+
+                while True:
+                    line = await reader.readline()
+                    if not line:
+                        break
+
+                    user_input = line.decode().strip()
+                    if not user_input:
+                        continue
+
+                    try:
+                        async for author, text, partial in stream_turn(
+                            self.runner,
+                            user_session.view,
+                            APP_NAME,
+                            user_id,
+                            user_session.session_id,
+                            user_input,
+                            model_slots=self.model_slots,
+                            streaming=self.streaming,
+                        ):
+                            await send(writer, {"type": "delta" if partial else "message", "author": author, "text": text})
+                    except Exception as e:
+                        await send(writer, {"type": "error", "message": str(e)})
+
+                    await send(writer, {"type": "end"})
+            finally:
+                self.close_session(user_session)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_client, host, port)
+
+
+async def send(writer: asyncio.StreamWriter, message: dict) -> None:
+    writer.write(json.dumps(message).encode() + b"\n")
+    await writer.drain()
+
+
+def shard_for(user_id: str, workers: int) -> int:
+    """The worker index serving a user id; stable across processes and restarts."""
+
+    return zlib.crc32(user_id.encode()) % workers
+
+
+class ShardedFront:
+    """Forwards each connection to the worker process that owns its user id."""
+
+    def __init__(self, processes: list, ports: list):
+        self.processes = processes
+        self.ports = ports
+
+    async def handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            first_line = await reader.readline()
+            user_id = first_line.decode().strip()
+            if not user_id:
+                return
+
+            port = self.ports[shard_for(user_id, len(self.ports))]
+            try:
+                worker_reader, worker_writer = await asyncio.open_connection("127.0.0.1", port)
+            except OSError as e:
+                await send(writer, {"type": "error", "message": f"Worker unavailable: {e}"})
+                return
+
+            try:
+                worker_writer.write(first_line)
+                await asyncio.gather(pipe(reader, worker_writer), pipe(worker_reader, writer))
+            finally:
+                worker_writer.close()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str, port: int) -> asyncio.AbstractServer:
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def stop(self) -> None:
+        """Interrupt the workers (so they write their metrics) and wait for them to exit."""
+
+        for process in self.processes:
+            if process.returncode is None:
+                try:
+                    process.send_signal(signal.SIGINT)
+                except ProcessLookupError:
+                    pass
+        await asyncio.gather(*(process.wait() for process in self.processes))
+
+
+async def pipe(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    try:
+        while data := await reader.read(65536):
+            writer.write(data)
+            await writer.drain()
+        if writer.can_write_eof():
+            writer.write_eof()
+    except ConnectionError:
+        writer.close()
+
+
+async def forward_output(index: int, stream: asyncio.StreamReader) -> None:
+    while line := await stream.readline():
+        print(f"[worker {index}] {line.decode().rstrip()}", flush=True)
+
+
+async def start_workers(workers: int, max_concurrent_turns: int, streaming: bool, hash_n: int) -> ShardedFront:
+    """Start worker servers on free local ports and wait until each is listening.
+
+    Workers hash with the scrypt cost hash_n, calibrated once by the front:
+    calibrating in each worker at once, on shared cores, picks different (and
+    lower) costs, and logins would then rehash whenever they changed worker.
+    """
+
+    command = [sys.executable, os.path.abspath(__file__), "--host", "127.0.0.1", "--port", "0", "--no-compaction"]
+    command += ["--max-concurrent-turns", str(max_concurrent_turns)] + (["--stream"] if streaming else [])
+
+    processes = []
+    for index in range(workers):
+        env = dict(os.environ)
+        # Count login attempts per username across all workers, not per worker
+        env["LOCKMIND_SHARED_RATE_LIMIT"] = "1"
+        env["LOCKMIND_HASH_N"] = str(hash_n)
+        # Each worker writes its own metrics file and serves its own /metrics port
+        root, extension = os.path.splitext(instrumentation.METRICS_FILE)
+        env["LOCKMIND_METRICS_FILE"] = f"{root}.worker{index}{extension}"
+        if instrumentation.METRICS_PORT:
+            env["LOCKMIND_METRICS_PORT"] = str(instrumentation.METRICS_PORT + 1 + index)
+        processes.append(await asyncio.create_subprocess_exec(
+            *command, env=env, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.STDOUT,
+            # Not in our process group: Ctrl-C reaches the front, which then stops the workers
+            start_new_session=True,
+        ))
+
+    ports = []
+    for index, process in enumerate(processes):
+        while True:
+            line = (await process.stdout.readline()).decode()
+            if not line:
+                raise RuntimeError(f"Worker {index} exited before listening")
+            if line.startswith("Lockmind server listening on"):
+                ports.append(int(line.rsplit(":", 1)[1]))
+                break
+            print(f"[worker {index}] {line.rstrip()}", flush=True)
+        asyncio.create_task(forward_output(index, process.stdout))
+    return ShardedFront(processes, ports)
+
+
+def prepare_database() -> None:
+    """Create the session tables and the app's state row before workers start.
+
+    Workers would otherwise race to create both on a fresh database.
+    """
+
+    session_service = session_store.PooledDatabaseSessionService()
+    session = session_service.create_session(app_name=APP_NAME, user_id="lockmind-front", state={})
+    session_service.delete_session(app_name=APP_NAME, user_id="lockmind-front", session_id=session.id)
+    session_service.db_engine.dispose()
+
+
+def build_server(max_concurrent_turns: int = 8, db_url: str = None, streaming: bool = False) -> LockmindServer:
+    """Create the session service, runner and server."""
+
+    session_service = session_store.PooledDatabaseSessionService(db_url)
+    runner = Runner(agent=LockmindAgent, app_name=APP_NAME, session_service=session_service)
+    if instrumentation.ENABLED:
+        instrumentation.instrument_runner(runner)
+    return LockmindServer(runner, max_concurrent_turns=max_concurrent_turns, streaming=streaming)
+
+
+async def main_async(
+    host: str,
+    port: int,
+    max_concurrent_turns: int,
+    streaming: bool = False,
+    workers: int = 1,
+    compact: bool = True,
+) -> None:
+    front = None
+    try:
+        if workers > 1:
+            prepare_database()
+            front = await start_workers(workers, max_concurrent_turns, streaming, get_hasher().n)
+            compaction_path = session_store.sqlite_path(session_store.DB_URL)
+            server = await front.serve(host, port)
+        else:
+            # Calibrate the password hashing cost before the first login needs it
+            get_hasher()
+
+            lockmind_server = build_server(max_concurrent_turns, streaming=streaming)
+            compaction_path = session_store.sqlite_path(lockmind_server.runner.session_service.db_url)
+
+            # Prometheus scrape endpoint for the instrumentation spans and counters
+            if instrumentation.ENABLED and instrumentation.METRICS_PORT:
+                metrics_server = await instrumentation.serve_metrics(host, instrumentation.METRICS_PORT)
+                print(f"Metrics on http://{host}:{instrumentation.METRICS_PORT}/metrics")
+
+            server = await lockmind_server.serve(host, port)
+
+        # Trim old events so long sessions stay cheap to load (SQLite only);
+        # with workers, only the front does this
+        if compact and compaction_path:
+            compaction_task = asyncio.create_task(compaction.run_periodically(compaction_path))
+
+        # The front reads the port of workers started with --port 0 from this line
+        print(f"Lockmind server listening on {host}:{server.sockets[0].getsockname()[1]}", flush=True)
+        async with server:
+            await server.serve_forever()
+    finally:
+        if front is not None:
+            await front.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lockmind multi-user server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument(
+        "--max-concurrent-turns",
+        type=int,
+        default=int(os.environ.get("LOCKMIND_MAX_CONCURRENT_TURNS", "8")),
+        help="Maximum number of turns calling the model at the same time",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        default=STREAMING,
+        help="Send reply text as the model generates it (delta messages)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.environ.get("LOCKMIND_WORKERS", "1")),
+        help="Worker processes to shard users across (1 serves in this process)",
+    )
+    parser.add_argument(
+        "--no-compaction",
+        dest="compact",
+        action="store_false",
+        help="Do not compact sessions in this process (workers leave it to the front)",
+    )
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(main_async(args.host, args.port, args.max_concurrent_turns, args.stream, args.workers, args.compact))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # The front runs no turns; each worker reports its own
+        if instrumentation.ENABLED and args.workers <= 1:
+            print(instrumentation.summary())
+            print(f"Metrics written to {instrumentation.write_metrics_file()}")
+
+
+if __name__ == "__main__":
+    main()
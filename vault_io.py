@@ -0,0 +1,85 @@
+"""Bulk import and export of a user's vault entries as CSV or JSON-lines.
+
+Imports accept CSV with a header row (service, username, password, or the
+column names used by common password managers' exports) or one JSON object per
+line with the same fields. Files are streamed, so memory use stays flat for
+any file size. The master password is asked for interactively; the session
+logs in and out like a normal one, so rate limits and the audit log apply.
+
+Usage:
+    python vault_io.py import <username> <file> [--format csv|jsonl] [--batch-size 500]
+    python vault_io.py export <username> <file> [--format csv|jsonl]
+"""
+
+import argparse
+import asyncio
+import getpass
+import sys
+import uuid
+
+from dotenv import load_dotenv
+
+# Before the Agency imports: its settings are read from the environment at import time
+load_dotenv()
+
+from Agency.audit import get_audit_log  # noqa: E402
+from Agency.router import DirectToolContext  # noqa: E402
+from Agency.workers.auth_manager.agent import authenticate_user, logout_user  # noqa: E402
+from Agency.workers.auth_manager.keyring import get_key_cache  # noqa: E402
+from Agency.workers.auth_manager.user_store import get_user_store  # noqa: E402
+from Agency.workers.passwords_manager import bulk  # noqa: E402
+from Agency.workers.passwords_manager.vault import get_vault  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("action", choices=("import", "export"))
+    parser.add_argument("username")
+    parser.add_argument("file", help="path, or - for stdin/stdout")
+    parser.add_argument("--format", choices=bulk.FORMATS, help="defaults to the file extension")
+    parser.add_argument("--batch-size", type=int, default=bulk.BATCH_SIZE)
+    args = parser.parse_args()
+
+    fmt = args.format or bulk.detect_format(args.file)
+    tool_context = DirectToolContext({}, session_id=f"vault-io-{uuid.uuid4()}")
+
+    result = asyncio.run(authenticate_user(args.username, getpass.getpass("Master password: "), tool_context))
+    if result["status"] != "success":
+        sys.exit(result["message"])
+
+    try:
+        generation = get_user_store().key_generation(args.username)
+        cipher = get_key_cache().cipher(tool_context.session_id, args.username, generation)
+        if args.action == "import":
+            with _open(args.file, "r") as source:
+                rows = _checked(bulk.read_rows(source, fmt), args.username, generation, args.batch_size)
+                stats = bulk.import_entries(get_vault(), args.username, rows, cipher, args.batch_size)
+        else:
+            with _open(args.file, "w") as out:
+                stats = bulk.export_entries(get_vault(), args.username, out, fmt, cipher, args.batch_size)
+        get_audit_log().record(f"vault.{args.action}", "success", args.username, tool_context, format=fmt, **stats)
+    finally:
+        logout_user(tool_context)
+
+    print(", ".join(f"{key.replace('_', ' ')}: {value:.0f}" for key, value in stats.items()), file=sys.stderr)
+
+
+def _checked(rows, username: str, generation: int, every: int):
+    # Stop an import once a password reset (in any process) has replaced the vault
+    # key; later entries would be encrypted under a key the owner no longer has
+    for i, row in enumerate(rows):
+        if i % every == 0 and get_user_store().key_generation(username) != generation:
+            sys.exit("The vault key was replaced by a password reset; import stopped. Log in again to continue.")
+        yield row
+
+
+def _open(path: str, mode: str):
+    if path == "-":
+        stream = sys.stdin if mode == "r" else sys.stdout
+        # Don't close the standard streams on exit from the with block
+        return open(stream.fileno(), mode, newline="", encoding="utf-8", closefd=False)
+    return open(path, mode, newline="", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()